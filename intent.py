@@ -43,7 +43,7 @@ from intent.scripts.conversion.text_to_xigt import text_to_xigtxml
 from intent.scripts.evaluation import evaluate_intent
 from intent.scripts.extraction import extract_from_xigt
 from intent.utils.arg_consts import PARSE_LANG_PROJ, PARSE_TRANS, POS_TYPES, PARSE_TYPES, ALN_TYPES, ALN_VAR, POS_VAR, \
-    PARSE_VAR, ALN_SYM_VAR, ALN_SYM_TYPES
+    PARSE_VAR, ALN_SYM_VAR, ALN_SYM_TYPES, STREAM_VAR, JOBS_VAR, ALN_INCREMENTAL_VAR, ALN_SERVER_VAR
 from intent.utils.listutils import flatten_list
 from xigt.codecs.xigtxml import dump
 from intent.utils.env import classifier
@@ -60,6 +60,11 @@ main = DefaultHelpParser(description="This is the main module for the INTENT pac
                          formatter_class=argparse.ArgumentDefaultsHelpFormatter,
                          fromfile_prefix_chars='@')
 
+main.add_argument('--cache', dest='corpus_cache', action='store_true', default=None,
+                  help='Keep binary snapshots of the XIGT files that are loaded, so that loading them again is faster. Defaults to the corpus_cache setting in env.conf.')
+main.add_argument('--no-cache', dest='corpus_cache', action='store_false',
+                  help='Do not use the corpus cache.')
+
 subparsers = main.add_subparsers(help='Valid subcommands', dest='subcommand')
 subparsers.required = True
 
@@ -85,6 +90,12 @@ enrich.add_argument('--giza-symmetric', dest=ALN_SYM_VAR, choices=ALN_SYM_TYPES,
                     help='Symmetricization heuristic to apply to statistical alignment',
                     default=None)
 
+enrich.add_argument('--giza-incremental', dest=ALN_INCREMENTAL_VAR, action='store_true', default=False,
+                    help='Only realign the instances whose gloss or translation changed since their statistical alignment was made.')
+
+enrich.add_argument('--giza-server', dest=ALN_SERVER_VAR, action='store_true', default=False,
+                    help='Align with the GIZA server set in env.conf, which gives the Model 2 Viterbi alignments from the saved models, rather than resuming mgiza.')
+
 enrich.add_argument('--pos', dest=POS_VAR,
                     type=csv_choices(POS_TYPES), default=[],
                     help='''Comma-separated list of POS tags to add (no spaces):
@@ -96,6 +107,12 @@ enrich.add_argument('--parse', dest=PARSE_VAR,
 
 enrich.add_argument('--class', dest='class_path', default=classifier)
 
+enrich.add_argument('--stream', dest=STREAM_VAR, action='store_true', default=False,
+                    help='Read, enrich and write one instance at a time, rather than loading the whole corpus into memory.')
+
+enrich.add_argument('-j', '--jobs', dest=JOBS_VAR, type=int, default=1,
+                    help='Number of worker processes to enrich instances with. Each worker starts its own tagger, parser and classifier. Implies --stream.')
+
 #===============================================================================
 # ODIN subcommand
 #===============================================================================
@@ -216,6 +233,16 @@ from intent import subcommands
 
 logging.getLogger().setLevel(logging.WARNING - 10 * (min(args.verbose, 2)))
 
+#===============================================================================
+# Turn the corpus cache on or off
+#===============================================================================
+from intent.igt import corpus_cache
+
+if args.corpus_cache is True:
+    corpus_cache.enable()
+elif args.corpus_cache is False:
+    corpus_cache.disable()
+
 # ENRICH
 if args.subcommand == 'enrich':
     subcommands.enrich(**vars(args))
@@ -420,13 +420,53 @@ class AlignmentError(Exception):
 # Alignment Class
 #===============================================================================
 
+def _bits(mask):
+    """
+    Return the positions of the bits that are set in ``mask``, lowest first.
+    """
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low.bit_length() - 1)
+        mask ^= low
+    return bits
+
 class Alignment(set):
     """
     Simply, a set of (src_index, tgt_index) pairs in a set.
+
+    The lookups by source or target index use a table of the targets of each
+    source, and the sources of each target. The table is built the first time
+    it is needed, and thrown away whenever the alignment changes.
     """
 
+    # The lookup table, (src -> [tgt], tgt -> [src]), or None if not yet built.
+    # There are a great many alignments, so don't give each one a __dict__.
+    __slots__ = ('_index',)
+
     def __init__(self, iter=list()):
         super().__init__(iter)
+        self._index = None
+
+    def _lookup(self):
+        if self._index is None:
+            rows, cols = {}, {}
+            for src, tgt in self:
+                rows.setdefault(src, []).append(tgt)
+                cols.setdefault(tgt, []).append(src)
+            self._index = rows, cols
+        return self._index
+
+    def row_masks(self):
+        """
+        Return the alignment as a bit matrix: a dict mapping each source
+        index to an int, with the bit for each of its target indices set.
+        (Target indices must not be negative.)
+
+        :rtype: dict
+        """
+        rows, cols = self._lookup()
+        return {src: sum(1 << tgt for tgt in tgts) for src, tgts in rows.items()}
 
     def __str__(self):
         ret_str = ''
@@ -435,7 +475,7 @@ class Alignment(set):
         return ret_str[:-2]
 
     def contains_tgt(self, key):
-        return bool([tgt for src,tgt in self if tgt==key])
+        return key in self._lookup()[1]
 
     @classmethod
     def from_giza(cls, giza):
@@ -503,24 +543,31 @@ class Alignment(set):
         new_alignment = intersection.copy()
 
         # -------------------------------------------
-        # 2) Now, for each aligned point, see if one of the
-        #    e or f portions are in the intersection, and the
-
-        neighboring = ((-1,0),(0,-1),(1,0),(0,1),(-1,-1),(-1,1),(1,-1),(1,1))
+        # 2) Now, add each point of the union that neighbors (including
+        #    diagonally) a point in the intersection, unless both its
+        #    e and f are already aligned in the intersection.
+        #
+        #    This is done a row at a time on the bit matrices: the
+        #    neighbors of row e are the intersection's rows e-1, e
+        #    and e+1, shifted one bit each way.
+        inter_rows = intersection.row_masks()
+        union_rows = union.row_masks()
 
-        e_indices = set([e for e, f in intersection])
-        f_indices = set([f for e, f in intersection])
+        inter_f = 0
+        for mask in inter_rows.values():
+            inter_f |= mask
 
-        for e, f in intersection:
-            for e_offset, f_offset in neighboring:
-                e_new = e + e_offset
-                f_new = f + f_offset
+        for e_new, union_mask in union_rows.items():
+            neighbors = 0
+            for e in (e_new-1, e_new, e_new+1):
+                mask = inter_rows.get(e, 0)
+                neighbors |= mask | (mask << 1) | (mask >> 1)
 
-                if ((not intersection.contains_src(e_new) or
-                     not intersection.contains_tgt(f_new)) and
-                    (e_new, f_new) in union):
+            new_mask = union_mask & neighbors
+            if e_new in inter_rows:
+                new_mask &= ~inter_f
 
-                    new_alignment.add((e_new, f_new))
+            new_alignment.update((e_new, f_new) for f_new in _bits(new_mask))
 
         return new_alignment
 
@@ -539,9 +586,8 @@ class Alignment(set):
         # 1) for the alignments in the provided alignment...
         #    if one of the points is unaligned in ourselves,
         #    add it.
-        for e, f in a:
-            if (not self.contains_src(e) or not self.contains_tgt(f)):
-                new_alignment.add((e,f))
+        rows, cols = self._lookup()
+        new_alignment.update((e, f) for e, f in a if e not in rows or f not in cols)
 
         return new_alignment
 
@@ -557,7 +603,7 @@ class Alignment(set):
         return Alignment([(y, x) for x, y in self])
 
     def contains_src(self, key):
-        return bool([src for src,tgt in self if src==key])
+        return key in self._lookup()[0]
 
     def __sub__(self, o):
         return self.__class__(set.__sub__(self, o))
@@ -570,16 +616,31 @@ class Alignment(set):
         return ' '.join([':'.join([str(b) for b in a]) for a in self])
 
     def src_to_tgt(self, key):
-        return [tgt for src, tgt in self if src == key]
+        return list(self._lookup()[0].get(key, []))
 
     def tgt_to_src(self, key):
-        return [src for src, tgt in self if tgt == key]
+        return list(self._lookup()[1].get(key, []))
 
     def all_src(self):
-        return set([src for src, tgt in self])
+        return set(self._lookup()[0])
 
     def all_tgt(self):
-        return set([tgt for src, tgt in self])
+        return set(self._lookup()[1])
+
+def _invalidating(name):
+    method = getattr(set, name)
+    def wrapper(self, *args):
+        self._index = None
+        return method(self, *args)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+# Throw away the lookup table whenever the alignment changes.
+for _name in ['add', 'discard', 'remove', 'pop', 'clear', 'update', 'difference_update',
+              'intersection_update', 'symmetric_difference_update',
+              '__ior__', '__iand__', '__isub__', '__ixor__']:
+    setattr(Alignment, _name, _invalidating(_name))
 
 
 #===============================================================================
@@ -643,6 +704,102 @@ def stem_match(src, tgt):
 def gram_match(src, tgt):
     return str(tgt).lower() in gramdict.get(str(src).lower(), [])
 
+# -----------------------------------------------------------------------------
+# Match tables
+#
+#  Rather than calling a comparison function on every (gloss, trans) pair on
+# each pass, build a table up front that lists, for every gloss token, the
+# (ascending) indices of the trans tokens that it matches. The exact, stem and
+# gram matches have table builders that only normalize or stem each token once.
+# -----------------------------------------------------------------------------
+
+def _key_table(gloss_keys, trans_keys):
+    positions = {}
+    for trans_i, key in enumerate(trans_keys):
+        positions.setdefault(key, []).append(trans_i)
+    return [positions.get(key, []) for key in gloss_keys]
+
+def exact_table(gloss_tokens, trans_tokens):
+    return _key_table([str(g) for g in gloss_tokens], [str(t) for t in trans_tokens])
+
+def stem_table(gloss_tokens, trans_tokens):
+    stems = {}
+    def stem(w):
+        w = str(w)
+        if w not in stems:
+            stems[w] = lemmatize_token(w)
+        return stems[w]
+
+    return _key_table([stem(g) for g in gloss_tokens], [stem(t) for t in trans_tokens])
+
+def gram_table(gloss_tokens, trans_tokens):
+    trans_lower = [str(t).lower() for t in trans_tokens]
+
+    table = []
+    for gloss_w in gloss_tokens:
+        grams = gramdict.get(str(gloss_w).lower())
+        table.append([trans_i for trans_i, trans_w in enumerate(trans_lower) if trans_w in grams] if grams else [])
+    return table
+
+MATCH_TABLES = {exact_match: exact_table,
+                stem_match: stem_table,
+                gram_match: gram_table}
+
+def match_table(gloss_tokens, trans_tokens, comparison_function):
+    """
+    Build the match table for the given comparison function, falling
+    back to comparing every pair for functions without a table builder.
+
+    :rtype: list[list[int]]
+    """
+    table_function = MATCH_TABLES.get(comparison_function)
+    if table_function is not None:
+        return table_function(gloss_tokens, trans_tokens)
+
+    return [[trans_i for trans_i, trans_w in enumerate(trans_tokens) if comparison_function(gloss_w, trans_w)]
+            for gloss_w in gloss_tokens]
+
+def table_iteration(table, aln, multiple_matches = True, iteration=1):
+    """
+    Add the alignments found in a match table to aln.
+
+    The first pass moves left to right, aligning each unaligned gloss token
+    to the first unaligned trans token that it matches. If multiple_matches
+    is set, a second pass moves right to left, aligning each gloss token
+    still unaligned after the first pass to every trans token it matches.
+
+    :param table: The match table, as built by :py:func:`match_table`
+    :type table: list[list[int]]
+    :type aln: Alignment
+    :rtype: Alignment
+    """
+    aligned_gloss_w = aln.all_src()
+
+    if iteration == 1:
+        aligned_trans_w = aln.all_tgt()
+
+        for gloss_i, matches in enumerate(table):
+            if gloss_i+1 in aligned_gloss_w:
+                continue
+
+            for trans_i in matches:
+                if trans_i+1 not in aligned_trans_w:
+                    aln.add((gloss_i+1, trans_i+1))
+                    aligned_gloss_w.add(gloss_i+1)
+                    aligned_trans_w.add(trans_i+1)
+                    break
+
+        if not multiple_matches:
+            return aln
+
+    # On the second pass, let's move from the right
+    # backward, allowing multiple matches per gloss token.
+    for gloss_i in reversed(range(len(table))):
+        if gloss_i+1 not in aligned_gloss_w:
+            aln.update((gloss_i+1, trans_i+1) for trans_i in table[gloss_i])
+
+    return aln
+
 def heuristic_chain(gloss_tokens, trans_tokens, methods, aln = None, multiple_matches = True):
 
     if aln is None:
@@ -664,48 +821,16 @@ def heuristic_iteration(gloss_tokens, trans_tokens, aln, comparison_function, mu
     :param comparison_function:
     :param iteration:
     """
+    table = match_table(gloss_tokens, trans_tokens, comparison_function)
 
-    gloss_indices = range(0, len(gloss_tokens))
-    trans_indices = range(0, len(trans_tokens))
-
-    # On the second pass, let's move from the right
-    # backward
-    if iteration > 1:
-        gloss_indices = gloss_indices[::-1]
-        trans_indices = trans_indices[::-1]
-
-    aligned_gloss_w = set(aln.all_src())
-    aligned_trans_w = set(aln.all_tgt())
-
-    for gloss_i in gloss_indices:
-
-        # Only allow one alignment from gloss to trans.
-        if gloss_i+1 in aligned_gloss_w:
-            continue
-
-        gloss_w = gloss_tokens[gloss_i]
-        for trans_i in trans_indices:
-            trans_w = trans_tokens[trans_i]
-
-            # Skip any attempt to align already aligned words on the first pass.
-            if iteration == 1 and trans_i+1 in aligned_trans_w:
-                continue
-
-            if comparison_function(gloss_w, trans_w):
-                if report:
-                    print('ADDING "{}"--"{}"'.format(gloss_w, trans_w))
-                aln.add((gloss_i+1, trans_i+1))
-                aligned_gloss_w.add(gloss_i+1)
-                aligned_trans_w.add(trans_i+1)
-                if iteration == 1: break # On the first iteration, let's move to another
+    old_aln = aln.copy() if report else None
+    aln = table_iteration(table, aln, multiple_matches=multiple_matches, iteration=iteration)
 
+    if report:
+        for gloss_i, trans_i in sorted(aln - old_aln):
+            print('ADDING "{}"--"{}"'.format(gloss_tokens[gloss_i-1], trans_tokens[trans_i-1]))
 
-
-
-    if iteration == 2 or not multiple_matches:
-        return aln
-    else:
-        return heuristic_iteration(gloss_tokens, trans_tokens, aln, comparison_function, multiple_matches, iteration+1)
+    return aln
 
 
 
@@ -755,6 +880,29 @@ def intersect(a1, a2):
 def union(a1, a2):
     pass
 
+def symmetricize(forward, reverse, heuristic):
+    """
+    Combine each of a list of source-to-target alignments with the
+    matching target-to-source alignment, using one of the symmetricization
+    heuristics of :py:class:`Alignment` (such as ``intersection`` or
+    ``grow_diag_final``).
+
+    :type forward: list[Alignment]
+    :param reverse: The alignments in the other direction, which are flipped before combining.
+    :type reverse: list[Alignment]
+    :param heuristic: Name of the :py:class:`Alignment` method to combine them with.
+    :type heuristic: str
+    :rtype: list[Alignment]
+    """
+    combine = getattr(Alignment, heuristic, None)
+    if combine is None:
+        raise AlignmentError('Unimplemented symmetricization heuristic "{}"'.format(heuristic))
+
+    if len(forward) != len(reverse):
+        raise AlignmentError('Cannot symmetricize {} alignments with {} reverse alignments.'.format(len(forward), len(reverse)))
+
+    return [combine(f, r.flip()) for f, r in zip(forward, reverse)]
+
 #===============================================================================
 # Unit tests
 #===============================================================================
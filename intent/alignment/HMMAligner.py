@@ -0,0 +1,361 @@
+"""
+An in-process statistical word aligner: IBM Model 1, followed by an
+HMM alignment model (Vogel et al., 1996), with the NULL handling of
+Och & Ney (2003).
+
+This is an alternative to running mgiza or fast_align (see
+:py:mod:`intent.interfaces.giza` and :py:mod:`intent.interfaces.fast_align`),
+which needs no external binaries or temporary files.
+
+As with GIZA, alignment is from the "e" (source) to the "f" (target)
+sentences: each target word is aligned to at most one source word, and
+the resulting :py:class:`Alignment <intent.alignment.Alignment.Alignment>`
+contains ``(e index, f index)`` pairs, indexed from one.
+
+@author: rgeorgi
+"""
+
+# Built-in imports -------------------------------------------------------------
+import logging
+from collections import defaultdict
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment, AlignmentError
+
+HMM_LOG = logging.getLogger('HMM_ALIGN')
+
+# The id of the NULL source word.
+NULL_ID = 0
+
+
+class HMMAligner(object):
+
+    def __init__(self, model1_iterations=5, hmm_iterations=1, p0=0.1, max_jump=7, jump_smoothing=0.1):
+        """
+        :param model1_iterations: Number of EM iterations of IBM Model 1, used to initialize the translation table.
+        :param hmm_iterations: Number of EM iterations of the HMM model. The gloss and translation lines
+                               are often in quite different orders, and further iterations learn
+                               too strong a preference for monotone alignments from them.
+        :param p0: Probability of aligning a target word to NULL.
+        :param max_jump: Jumps further than this many words are pooled with jumps of this distance.
+        :param jump_smoothing: Count added to every jump distance when re-estimating the jump probabilities.
+        """
+        self.model1_iterations = model1_iterations
+        self.hmm_iterations = hmm_iterations
+        self.p0 = p0
+        self.max_jump = max_jump
+        self.jump_smoothing = jump_smoothing
+
+        self.e_ids = {}
+        self.f_ids = {}
+
+        # t[e_id][f_id] = t(f|e)
+        self.t = None
+
+        # jumps[d + max_jump] = p(i' - i = d), before normalizing
+        # over the positions in a given sentence.
+        self.jumps = [1.0] * (2*max_jump + 1)
+
+    # -------------------------------------------
+    # Vocabulary
+    # -------------------------------------------
+
+    def _to_ids(self, sents, ids, first_id):
+        id_sents = []
+        for sent in sents:
+            id_sent = []
+            for word in sent:
+                word_id = ids.get(word)
+                if word_id is None:
+                    word_id = ids[word] = len(ids) + first_id
+                id_sent.append(word_id)
+            id_sents.append(id_sent)
+        return id_sents
+
+    def _lookup_ids(self, sents, ids):
+        # Unknown words get an id that is in no table.
+        return [[ids.get(word, -1) for word in sent] for sent in sents]
+
+    # -------------------------------------------
+    # Training
+    # -------------------------------------------
+
+    def train(self, e_snts, f_snts):
+        """
+        Train the model on a parallel corpus.
+
+        :type e_snts: list[list[str]]
+        :type f_snts: list[list[str]]
+        """
+        if len(e_snts) != len(f_snts):
+            raise AlignmentError('Unequal numbers of sentences to align. {} vs. {}'.format(len(e_snts), len(f_snts)))
+
+        # Source ids start at one, as zero is NULL.
+        e_id_snts = self._to_ids(e_snts, self.e_ids, 1)
+        f_id_snts = self._to_ids(f_snts, self.f_ids, 0)
+        pairs = [(e, f) for e, f in zip(e_id_snts, f_id_snts) if e and f]
+
+        for i in range(self.model1_iterations):
+            HMM_LOG.debug('Model 1 iteration {}'.format(i+1))
+            self._model1_iteration(pairs)
+
+        for i in range(self.hmm_iterations):
+            HMM_LOG.debug('HMM iteration {}'.format(i+1))
+            self._hmm_iteration(pairs)
+
+    def _model1_iteration(self, pairs):
+        t = self.t
+        counts = defaultdict(lambda: defaultdict(float))
+
+        for e_snt, f_snt in pairs:
+            e_snt = [NULL_ID] + e_snt
+
+            for f in f_snt:
+                # Starting out, t(f|e) is uniform.
+                if t is None:
+                    probs = [1.0] * len(e_snt)
+                else:
+                    probs = [t[e][f] for e in e_snt]
+                total = sum(probs)
+
+                for e, p in zip(e_snt, probs):
+                    counts[e][f] += p / total
+
+        self.t = self._normalize(counts)
+
+    def _normalize(self, counts):
+        t = {}
+        for e, f_counts in counts.items():
+            total = sum(f_counts.values())
+            t[e] = {f: c / total for f, c in f_counts.items()}
+        return t
+
+    def _jump_table(self, l):
+        """
+        Return the table of transition probabilities between the positions
+        of a source sentence of length ``l``, such that ``table[i+1][i2]`` is
+        the probability of moving from position ``i`` to ``i2``, not counting
+        the probability of NULL. Row zero is for the start of the sentence.
+        """
+        jumps = self.jumps
+        max_jump = self.max_jump
+
+        table = []
+        for i in range(-1, l):
+            row = [jumps[min(max(i2 - i, -max_jump), max_jump) + max_jump] for i2 in range(l)]
+            total = sum(row)
+            table.append([p / total for p in row])
+        return table
+
+    def _emissions(self, e_snt, f):
+        """
+        Return the probabilities of each source word, then NULL, emitting ``f``.
+        """
+        t = self.t
+        probs = []
+        for e in e_snt:
+            e_probs = t.get(e)
+            probs.append(e_probs.get(f, 0.0) if e_probs else 0.0)
+
+        null_probs = t.get(NULL_ID)
+        probs.append(null_probs.get(f, 0.0) if null_probs else 0.0)
+        return probs
+
+    def _hmm_iteration(self, pairs):
+        p0 = self.p0
+        p1 = 1 - p0
+        max_jump = self.max_jump
+
+        t_counts = defaultdict(lambda: defaultdict(float))
+        jump_counts = [self.jump_smoothing] * (2*max_jump + 1)
+
+        for e_snt, f_snt in pairs:
+            l = len(e_snt)
+            positions = range(l)
+            table = self._jump_table(l)
+            ems = [self._emissions(e_snt, f) for f in f_snt]
+
+            # The states are the l source positions, then the l NULL states,
+            # where NULL state l+i means "NULL, after position i". Both
+            # move to other positions with the same probabilities, so the
+            # forward pass keeps their combined mass, by position.
+            # ---------------------------------------------------------
+            alphas = []
+            scales = []
+            prev = None
+            for em in ems:
+                null_em = em[l]
+                if prev is None:
+                    real = [p1 * table[0][i2] * em[i2] for i2 in positions]
+                    null = [p0 / l * null_em] * l
+                else:
+                    real = []
+                    for i2 in positions:
+                        s = 0.0
+                        for i in positions:
+                            s += prev[i] * table[i+1][i2]
+                        real.append(p1 * s * em[i2])
+                    null = [p0 * prev[i] * null_em for i in positions]
+
+                scale = sum(real) + sum(null)
+                if scale == 0:
+                    break
+                real = [a / scale for a in real]
+                null = [a / scale for a in null]
+
+                alphas.append((real, null))
+                scales.append(scale)
+                prev = [r + n for r, n in zip(real, null)]
+
+            # Skip pairs that the model gives no probability to.
+            if len(alphas) < len(ems):
+                continue
+
+            # Backward pass. Both the position and its NULL state
+            # have the same backward probability.
+            # ---------------------------------------------------------
+            J = len(f_snt)
+            betas = [None] * J
+            betas[J-1] = [1.0] * l
+            for j in range(J-1, 0, -1):
+                em = ems[j]
+                beta = betas[j]
+                scale = scales[j]
+                weighted = [p1 * em[i2] * beta[i2] for i2 in positions]
+                null_weighted = p0 * em[l]
+                betas[j-1] = [(sum(row[i2] * weighted[i2] for i2 in positions) + null_weighted * beta[i]) / scale
+                              for i, row in zip(positions, table[1:])]
+
+            # Collect the counts.
+            # ---------------------------------------------------------
+            for j, f in enumerate(f_snt):
+                real, null = alphas[j]
+                beta = betas[j]
+
+                for i in positions:
+                    t_counts[e_snt[i]][f] += real[i] * beta[i]
+                t_counts[NULL_ID][f] += sum(n * b for n, b in zip(null, beta))
+
+                em = ems[j]
+                if j == 0:
+                    for i2 in positions:
+                        d = min(i2 + 1, max_jump)
+                        jump_counts[d + max_jump] += real[i2] * beta[i2]
+                else:
+                    prev_real, prev_null = alphas[j-1]
+                    scale = scales[j]
+                    for i in positions:
+                        prev = prev_real[i] + prev_null[i]
+                        if not prev:
+                            continue
+                        row = table[i+1]
+                        for i2 in positions:
+                            d = min(max(i2 - i, -max_jump), max_jump)
+                            jump_counts[d + max_jump] += prev * p1 * row[i2] * em[i2] * beta[i2] / scale
+
+        self.t = self._normalize(t_counts)
+        self.jumps = jump_counts
+
+    # -------------------------------------------
+    # Alignment
+    # -------------------------------------------
+
+    def _viterbi(self, e_snt, f_snt):
+        l = len(e_snt)
+        if not l or not f_snt:
+            return Alignment()
+
+        p0 = self.p0
+        p1 = 1 - p0
+        positions = range(l)
+        table = self._jump_table(l)
+
+        # Back-pointers are to the state, where states
+        # l and above are the NULL states.
+        backs = []
+        prev = None
+        for f in f_snt:
+            em = self._emissions(e_snt, f)
+
+            # Words that none of the source words can emit (such as
+            # words unseen in training) are aligned to NULL.
+            if not any(em):
+                em = [0.0] * l + [1.0]
+            null_em = em[l]
+
+            if prev is None:
+                real = [p1 * table[0][i2] * em[i2] for i2 in positions]
+                null = [p0 / l * null_em] * l
+                back = None
+            else:
+                # The best of each position and its NULL state.
+                best_prev = [(prev[i], i) if prev[i] >= prev[i+l] else (prev[i+l], i+l) for i in positions]
+
+                real = []
+                back = []
+                for i2 in positions:
+                    best_p, best_s = -1, 0
+                    for i in positions:
+                        p = best_prev[i][0] * table[i+1][i2]
+                        if p > best_p:
+                            best_p, best_s = p, best_prev[i][1]
+                    real.append(p1 * best_p * em[i2])
+                    back.append(best_s)
+
+                null = [p0 * best_prev[i][0] * null_em for i in positions]
+                back.extend(best_prev[i][1] for i in positions)
+
+            states = real + null
+            top = max(states)
+            prev = [p / top for p in states]
+            backs.append(back)
+
+        # Follow the back-pointers from the best final state.
+        s = max(range(2*l), key=lambda s: prev[s])
+        a = Alignment()
+        for j in range(len(f_snt), 0, -1):
+            if s < l:
+                a.add((s+1, j))
+            back = backs[j-1]
+            if back is not None:
+                s = back[s]
+        return a
+
+    def align(self, e_snts, f_snts):
+        """
+        Return the Viterbi alignments of the given sentences under the trained model.
+
+        :type e_snts: list[list[str]]
+        :type f_snts: list[list[str]]
+        :rtype: list[Alignment]
+        """
+        if len(e_snts) != len(f_snts):
+            raise AlignmentError('Unequal numbers of sentences to align. {} vs. {}'.format(len(e_snts), len(f_snts)))
+
+        e_id_snts = self._lookup_ids(e_snts, self.e_ids)
+        f_id_snts = self._lookup_ids(f_snts, self.f_ids)
+        return [self._viterbi(e, f) for e, f in zip(e_id_snts, f_id_snts)]
+
+    def train_align(self, e_snts, f_snts):
+        """
+        Train on the given sentences, and return their alignments, as
+        :py:meth:`GizaAligner.temp_train <intent.interfaces.giza.GizaAligner.temp_train>`
+        does.
+
+        :rtype: list[Alignment]
+        """
+        self.train(e_snts, f_snts)
+        return self.align(e_snts, f_snts)
+
+
+def hmm_align_sents(e_list, f_list, **kwargs):
+    """
+    Train an :py:class:`HMMAligner` on the given sentences and return
+    their alignments, taking the place of
+    :py:func:`fast_align_sents <intent.interfaces.fast_align.fast_align_sents>`.
+
+    :type e_list: list[list[str]]
+    :type f_list: list[list[str]]
+    :rtype: list[Alignment]
+    """
+    return HMMAligner(**kwargs).train_align(e_list, f_list)
@@ -0,0 +1,176 @@
+"""
+In-process scoring for MaxEnt models trained with MALLET.
+
+A trained model is exported once (see :py:meth:`MaxEntModel.from_mallet`) to
+a compact table of weights, with a row for each feature and a column for
+each class. Classifying a feature line from :py:func:`write_gram <intent.igt.grams.write_gram>`
+is then just a sparse dot product followed by a softmax, with no JVM or pipe
+in the way. :py:class:`MaxEntModel` offers the same classify methods as
+:py:class:`MalletMaxent <intent.interfaces.mallet_maxent.MalletMaxent>`, so
+it can be passed in anywhere the latter is used.
+
+@author: rgeorgi
+"""
+import logging
+import math
+import pickle
+from array import array
+
+from intent.classify.Classification import Classification
+from intent.interfaces.mallet_maxent import MalletMaxent, EmptyStringException, feature_string, classifier_info
+
+MAXENT_LOG = logging.getLogger('CLASSIFIER')
+
+# Exported models are recognized by this extension.
+MODEL_EXT = '.weights'
+
+# The name MALLET gives to the bias feature for each class.
+DEFAULT_FEAT = '<default>'
+
+
+class MaxEntModel(object):
+
+    def __init__(self, classes, features, weights, defaults):
+        """
+        :param classes: The class labels, in column order.
+        :type classes: list[str]
+        :param features: Mapping of feature name to row index.
+        :type features: dict
+        :param weights: The weight table, flattened one row after another,
+                        with ``len(classes)`` weights per row.
+        :type weights: array
+        :param defaults: The bias weight for each class.
+        :type defaults: array
+        """
+        self.classes = classes
+        self.features = features
+        self.weights = weights
+        self.defaults = defaults
+
+    @classmethod
+    def from_weights(cls, weights):
+        """
+        Build a model from (class, feature, weight) tuples, such as those
+        returned by :py:func:`classifier_info <intent.interfaces.mallet_maxent.classifier_info>`.
+        """
+        classes = []
+        class_index = {}
+        features = {}
+        rows = []
+        defaults = []
+
+        for cur_class, feat, weight in weights:
+            if cur_class not in class_index:
+                class_index[cur_class] = len(classes)
+                classes.append(cur_class)
+                defaults.append(0.0)
+                for row in rows:
+                    row.append(0.0)
+
+            c_i = class_index[cur_class]
+
+            if feat == DEFAULT_FEAT:
+                defaults[c_i] = weight
+                continue
+
+            if feat not in features:
+                features[feat] = len(rows)
+                rows.append([0.0] * len(classes))
+
+            rows[features[feat]][c_i] = weight
+
+        flat = array('d')
+        for row in rows:
+            flat.extend(row)
+
+        return cls(classes, features, flat, array('d', defaults))
+
+    @classmethod
+    def from_mallet(cls, model):
+        """
+        Export the weights from a trained MALLET MaxEnt model.
+
+        :param model: Path to the trained classifier.
+        """
+        return cls.from_weights(classifier_info(model))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            classes, features, weights, defaults = pickle.load(f)
+        return cls(classes, features, weights, defaults)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump((self.classes, self.features, self.weights, self.defaults), f)
+
+    def classify_string(self, s, **kwargs):
+        """
+        Run the classifier on a string, breaking it apart as necessary.
+
+        :param s: String to classify
+        :type s: str
+        """
+        return self.classify(feature_string(s, **kwargs))
+
+    def classify(self, string):
+        """
+        Score a single feature line, in the format written by ``write_gram``:
+        the gold label, followed by ``feature:value`` pairs.
+
+        :rtype: Classification
+        """
+        if not string.strip():
+            raise EmptyStringException('Empty string passed into classify.')
+
+        content = string.split()
+        n = len(self.classes)
+        scores = list(self.defaults)
+
+        for feat_val in content[1:]:
+            feat, val = feat_val.rsplit(':', 1)
+
+            # Features not seen in training carry no weight.
+            row = self.features.get(feat)
+            if row is None:
+                continue
+
+            val = float(val)
+            start = row * n
+            for i, w in enumerate(self.weights[start:start+n]):
+                scores[i] += w * val
+
+        # Normalize the scores to probabilities.
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+
+        ret_c = Classification(gold=content[0])
+        for tag, e in zip(self.classes, exps):
+            ret_c[tag] = e / total
+        return ret_c
+
+    def classify_many(self, feature_lines):
+        """
+        :type feature_lines: list[str]
+        :rtype: list[Classification]
+        """
+        for string in feature_lines:
+            if not string.strip():
+                raise EmptyStringException('Empty string passed into classify_many.')
+        return [self.classify(string) for string in feature_lines]
+
+    def close(self):
+        pass
+
+
+def load_classifier(path):
+    """
+    Open the gloss-line classifier at ``path``: an exported model if it has
+    the :py:data:`MODEL_EXT` extension, and a MALLET subprocess otherwise.
+    """
+    if path.endswith(MODEL_EXT):
+        MAXENT_LOG.debug('Loading exported classifier weights from "{}"'.format(path))
+        return MaxEntModel.load(path)
+    else:
+        return MalletMaxent(path)
@@ -0,0 +1,134 @@
+"""
+XIGT-XML decoder that builds the INTENT subclasses directly.
+
+This follows :py:mod:`xigt.codecs.xigtxml`'s decoding, but instantiates
+:py:class:`RGCorpus`, :py:class:`RGIgt`, :py:class:`RGTier` and
+:py:class:`RGItem` as the document is parsed, rather than decoding to the
+plain xigt classes and then walking the whole corpus a second time to
+convert them. The items' indices are also only worked out the first time
+they are asked for.
+
+@author: rgeorgi
+"""
+import gc
+from contextlib import contextmanager
+from io import StringIO
+
+from xigt.codecs.xigtxml import _qname_split, ns_iterparse, iter_elements, get_attributes, decode_metadata
+from xigt.consts import FULL
+from xigt.model import Igt, Item
+
+from intent.igt.rgxigt import RGCorpus, RGIgt, RGTier, RGItem
+
+
+@contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def load(fh, mode=FULL):
+    """
+    :param fh: Path or open file handle to the XIGT-XML file.
+    :param mode: One of ``full``, ``incremental``, or ``transient``
+    :rtype: RGCorpus
+    """
+    if mode != FULL:
+        return decode(ns_iterparse(fh), mode=mode)
+
+    # Decoding a whole corpus creates a great many objects, all of which
+    # are kept, so the collector's passes over them would be wasted.
+    with _gc_paused():
+        return decode(ns_iterparse(fh), mode=mode)
+
+def loads(s):
+    """
+    :rtype: RGCorpus
+    """
+    if hasattr(s, 'decode'): s = s.decode('utf-8')
+    return load(StringIO(s))
+
+def decode(events, mode=FULL):
+    event, elem = next(events)
+    root = elem  # store root for later instantiation
+    while (event, elem.tag) not in [('start', 'igt'), ('end', 'xigt-corpus')]:
+        event, elem = next(events)
+    igts = None
+    if event == 'start' and elem.tag == 'igt':
+        igts = (
+            decode_igt(e)
+            for e in iter_elements(
+                'igt', events, root, break_on=[('end', 'xigt-corpus')]
+            )
+        )
+    return decode_xigtcorpus(root, igts=igts, mode=mode)
+
+def decode_xigtcorpus(elem, igts=None, mode=FULL):
+    ns, tag = _qname_split(elem.tag)
+    assert tag == 'xigt-corpus'
+    return RGCorpus(
+        id=elem.get('id'),
+        attributes=get_attributes(elem, ignore=('id',)),
+        metadata=[decode_metadata(md) for md in elem.findall('metadata')],
+        igts=igts or [decode_igt(igt) for igt in elem.findall('igt')],
+        mode=mode,
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+
+def decode_igt(elem):
+    ns, tag = _qname_split(elem.tag)
+    assert tag == 'igt'
+    # RGIgt's constructor fills in default metadata, which would only
+    # be thrown away here, so go straight to the xigt constructor.
+    igt = RGIgt.__new__(RGIgt)
+    Igt.__init__(
+        igt,
+        id=elem.get('id'),
+        type=elem.get('type'),
+        attributes=get_attributes(elem, ignore=('id', 'type')),
+        metadata=[decode_metadata(md) for md in elem.findall('metadata')],
+        tiers=[decode_tier(tier) for tier in elem.findall('tier')],
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    elem.clear()
+    return igt
+
+def decode_tier(elem):
+    ns, tag = _qname_split(elem.tag)
+    assert tag == 'tier'
+    tier = RGTier(
+        id=elem.get('id'),
+        type=elem.get('type'),
+        attributes=get_attributes(elem, ignore=('id','type')),
+        metadata=[decode_metadata(md) for md in elem.findall('metadata')],
+        items=[decode_item(item) for item in elem.findall('item')],
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    # Number the items when one of them is first asked for its index.
+    tier._lazy_index = True
+    elem.clear()
+    return tier
+
+def decode_item(elem):
+    ns, tag = _qname_split(elem.tag)
+    assert tag == 'item'
+    # Likewise, RGItem's constructor has nothing to add here.
+    item = RGItem.__new__(RGItem)
+    Item.__init__(
+        item,
+        id=elem.get('id'),
+        type=elem.get('type'),
+        attributes=get_attributes(elem, ignore=('id','type')),
+        text=elem.text,
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    elem.clear()
+    return item
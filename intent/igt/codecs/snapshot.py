@@ -0,0 +1,112 @@
+"""
+Binary snapshots of loaded corpora.
+
+A corpus is pickled as-is, so that reading it back is a matter of
+restoring objects, with none of the XML parsing or the constructors'
+bookkeeping. The xigt objects don't survive a plain pickle, though: a
+container's members would be restored through ``append()`` before the
+rest of its state, and the instances' referrer cache is built with a
+lambda. :py:func:`dump` therefore pickles each container along with its
+members, which are put back without going through ``append()``, and
+leaves out the back-references to parents (which are restored from the
+members' side) and the caches that are rebuilt on demand anyway.
+
+@author: rgeorgi
+"""
+import copyreg
+import pickle
+from collections import defaultdict
+from functools import partial
+from io import BytesIO
+
+from xigt.mixins import XigtContainerMixin
+from xigt.model import Item
+
+from intent.igt.codecs.rgxigtxml import _gc_paused
+
+
+# Attributes that are either restored by _new_container, or are caches
+# that are rebuilt when next needed.
+_SKIPPED_ATTRS = ('_parent', '_container', '_contained_type', '_find_index', '_span_table', '_tier_cache')
+
+
+def _state(obj):
+    state = obj.__dict__.copy()
+    for attr in _SKIPPED_ATTRS:
+        state.pop(attr, None)
+    return state
+
+def _new_container(cls, contained_type, container, members):
+    obj = cls.__new__(cls)
+    obj._contained_type = contained_type
+    obj._container = obj if container is None else container
+    list.extend(obj, members)
+    for member in members:
+        member._parent = obj._container
+    return obj
+
+def _reduce_container(obj):
+    state = _state(obj)
+
+    # Same as the cache Igt.refresh_indices() builds, but picklable.
+    referrers = state.get('_referrer_cache')
+    if referrers is not None:
+        state['_referrer_cache'] = defaultdict(partial(defaultdict, list), referrers)
+
+    # A container is usually its own, but metadata lists belong to their owner,
+    # which will already have been pickled.
+    container = obj._container if obj._container is not obj else None
+
+    return _new_container, (type(obj), obj._contained_type, container, list(obj)), state
+
+def _reduce_item(obj):
+    return copyreg.__newobj__, (type(obj),), _state(obj)
+
+def _subclasses(cls):
+    yield cls
+    for sub in cls.__subclasses__():
+        yield from _subclasses(sub)
+
+def _dispatch_table():
+    # The dispatch table is looked up by exact type, so list every
+    # class that has been defined so far.
+    table = {cls: _reduce_container for cls in _subclasses(XigtContainerMixin)}
+    table.update((cls, _reduce_item) for cls in _subclasses(Item))
+    return table
+
+
+def dump(xc, fh):
+    """
+    Write a snapshot of a corpus.
+
+    :param fh: File handle, opened for writing in binary mode.
+    :type xc: RGCorpus
+    """
+    pickler = pickle.Pickler(fh, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = _dispatch_table()
+    pickler.dump(xc)
+
+def dumps(xc):
+    """
+    :rtype: bytes
+    """
+    bio = BytesIO()
+    dump(xc, bio)
+    return bio.getvalue()
+
+def load(fh):
+    """
+    Read a corpus snapshot written by :py:func:`dump`.
+
+    :param fh: File handle, opened for reading in binary mode.
+    :rtype: RGCorpus
+    """
+    with _gc_paused():
+        return pickle.load(fh)
+
+def loads(s):
+    """
+    :rtype: RGCorpus
+    """
+    with _gc_paused():
+        return pickle.loads(s)
@@ -0,0 +1,119 @@
+"""
+Incremental XIGT-XML writer.
+
+:py:func:`xigt.codecs.xigtxml.dump` needs the whole corpus in memory in order to
+build a single element tree before anything is written. The :py:class:`XigtStreamWriter`
+here instead writes the ``<xigt-corpus>`` header up front, and then serializes
+each instance as it is handed over, so that a corpus can be written one
+instance at a time.
+
+@author: rgeorgi
+"""
+from xml.sax.saxutils import quoteattr
+
+from xigt.codecs import xigtxml
+
+
+def _encode_elem(elem, indent=2):
+    # Indenting out of the context of the root element means
+    # that the tail has to be fixed up by hand.
+    xigtxml._indent(elem, indent=indent, level=1)
+    elem.tail = '' if indent is None else '\n'
+    return ' ' * (indent or 0) + xigtxml._tostring(elem, encoding='unicode')
+
+
+def corpus_open_tag(xc):
+    """
+    Return the opening ``<xigt-corpus>`` tag for a corpus, with its
+    attributes and namespace declarations.
+
+    :type xc: XigtCorpus
+    :rtype: str
+    """
+    root = xigtxml._build_elem('xigt-corpus', xc, {})
+    attrs = ''.join(' {}={}'.format(k, quoteattr(v)) for k, v in sorted(root.items()))
+    return '<{}{}>'.format(root.tag, attrs)
+
+
+def encode_igt(igt, nsmap=None, indent=2):
+    """
+    Serialize a single instance the way that it will appear inside the
+    corpus element, so that the (relatively expensive) encoding can be done
+    elsewhere, such as in a worker process, and handed to
+    :py:meth:`XigtStreamWriter.write_encoded`.
+
+    :param nsmap: The namespace map of the enclosing corpus.
+    :rtype: str
+    """
+    return _encode_elem(xigtxml._build_igt(igt, nsmap or {}), indent=indent)
+
+
+class XigtStreamWriter(object):
+    """
+    Write the instances of a corpus to ``fh`` one at a time.
+
+    The corpus object given to the constructor is only used for its
+    id, attributes, namespaces and metadata; its instances are never
+    touched. Usable as a context manager, in which case the closing
+    tag is written on exit, unless the block raised an exception, so
+    that a failed run doesn't leave behind what looks like a whole corpus.
+    """
+
+    def __init__(self, fh, xc, indent=2):
+        """
+        :param fh: Open, writable text-mode file handle
+        :param xc: Corpus object providing the header information.
+        :type xc: XigtCorpus
+        :param indent: Number of spaces per indentation level.
+        :type indent: int
+        """
+        self.fh = fh
+        self.indent = indent
+        self.nsmap = xc.nsmap
+        self.written = 0
+        self._closed = False
+
+        self._write_header(xc)
+
+    def _nl(self):
+        return '' if self.indent is None else '\n'
+
+    def _write_header(self, xc):
+        self.fh.write(corpus_open_tag(xc) + self._nl())
+
+        for md in xc.metadata:
+            self.fh.write(_encode_elem(xigtxml._build_metadata(md, self.nsmap), indent=self.indent))
+
+    def write(self, igt):
+        """
+        Serialize a single instance to the output.
+
+        :type igt: Igt
+        """
+        self.write_encoded(encode_igt(igt, self.nsmap, indent=self.indent))
+
+    def write_encoded(self, s):
+        """
+        Write an instance that has already been serialized with :py:func:`encode_igt`.
+
+        :type s: str
+        """
+        self.fh.write(s)
+        self.written += 1
+
+    def close(self):
+        """
+        Write the closing corpus tag. The underlying file handle is
+        flushed, but it is left to the caller to close it.
+        """
+        if not self._closed:
+            self.fh.write('</xigt-corpus>{}'.format(self._nl()))
+            self.fh.flush()
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
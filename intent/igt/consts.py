@@ -99,6 +99,8 @@ DATA_SRC  = 'source'             # The attribute for marking that this was INTEN
 DATA_FROM = 'projected-from'     # The attribute for marking which tier was used to make this one (for projection)
 DATA_ALNF = 'aligned-with'       # The attribute for marking the alignment used for projection.
 DATA_DATE = 'date'               # The attribute for marking
+DATA_FINGERPRINT = 'fingerprint' # The attribute for marking the input that an alignment was computed from
+DATA_ALIGNER = 'aligner'         # The attribute for marking which aligner computed a statistical alignment
 
 
 # Now, define intent as the data-source provider...
@@ -120,6 +122,8 @@ INTENT_GLOSS_MORPH = 'sub-word'
 # =============================================================================
 ALIGNER_GIZA = 'giza'
 ALIGNER_FASTALIGN = 'fast_align'
+ALIGNER_HMM = 'hmm'
+ALIGNER_GIZA_SERVER = 'giza_server'
 
 SYMMETRIC_INTERSECT       = 'intersection'
 SYMMETRIC_UNION           = 'union'
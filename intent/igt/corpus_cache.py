@@ -0,0 +1,191 @@
+"""
+On-disk cache of loaded corpora.
+
+When enabled, :py:meth:`RGCorpus.load <intent.igt.rgxigt.RGCorpus.load>` keeps
+a binary snapshot (see :py:mod:`intent.igt.codecs.snapshot`) of each XIGT-XML
+file it reads, and loads the snapshot instead of reparsing the file as long as
+the file is unchanged. Snapshots are keyed by the file's path, modification time
+and a hash of its contents, and once the cache grows beyond its size limit the
+least recently used snapshots are removed.
+
+The cache is off unless ``corpus_cache`` is set in ``env.conf``, or it is
+turned on with :py:func:`enable` (which is what the ``--cache`` command line
+option does).
+
+@author: rgeorgi
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from intent.igt.codecs import snapshot
+from intent.utils.env import corpus_cache, corpus_cache_dir, corpus_cache_size
+
+CACHE_LOG = logging.getLogger('CORPUS_CACHE')
+
+SNAPSHOT_EXT = '.snapshot'
+
+
+def file_digest(path, blocksize=2**20):
+    """
+    Return the SHA-1 hex digest of the contents of ``path``.
+    """
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CorpusCache(object):
+
+    def __init__(self, cache_dir, max_size):
+        """
+        :param cache_dir: Directory to keep the snapshots in, created if necessary.
+        :param max_size: Maximum total size of the snapshots, in megabytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def key(self, path):
+        """
+        Return the key for the current state of the file at ``path``.
+
+        :rtype: str
+        """
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        s = '{}\0{}\0{}'.format(path, mtime, file_digest(path))
+        return hashlib.sha1(s.encode('utf-8')).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key + SNAPSHOT_EXT)
+
+    def get(self, key):
+        """
+        Return the corpus stored under ``key``, or ``None`` if there isn't one.
+
+        :rtype: RGCorpus
+        """
+        entry = self._entry(key)
+        try:
+            with open(entry, 'rb') as f:
+                xc = snapshot.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # A snapshot that can't be read back, such as one written
+            # by an older version of the code, is simply dropped.
+            CACHE_LOG.warning('Discarding unreadable snapshot "{}": {}'.format(entry, e))
+            self._remove(entry)
+            return None
+
+        # Mark the snapshot as recently used.
+        os.utime(entry)
+        return xc
+
+    def put(self, key, xc):
+        """
+        Store a snapshot of ``xc`` under ``key``, then evict
+        old snapshots if the cache has grown too large.
+
+        :type xc: RGCorpus
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file first, so that a snapshot that is
+        # only partly written is never picked up by another process.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                snapshot.dump(xc, f)
+            os.replace(tmp_path, self._entry(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def entries(self):
+        """
+        Return the (path, size, mtime) of every snapshot in the cache,
+        least recently used first.
+        """
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(SNAPSHOT_EXT):
+                    entry = os.path.join(self.cache_dir, name)
+                    st = os.stat(entry)
+                    entries.append((entry, st.st_size, st.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self):
+        """
+        Remove the least recently used snapshots until the
+        cache is within its size limit.
+        """
+        entries = self.entries()
+        total = sum(size for entry, size, mtime in entries)
+        max_bytes = self.max_size * 2**20
+
+        for entry, size, mtime in entries:
+            if total <= max_bytes:
+                break
+            CACHE_LOG.debug('Evicting snapshot "{}"'.format(entry))
+            self._remove(entry)
+            total -= size
+
+    def clear(self):
+        for entry, size, mtime in self.entries():
+            self._remove(entry)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def load(self, path, loader):
+        """
+        Return the corpus for the file at ``path``, from the cache if it
+        is there, or else by calling ``loader(path)`` and caching the result.
+        """
+        key = self.key(path)
+        xc = self.get(key)
+        if xc is not None:
+            CACHE_LOG.info('Loaded "{}" from the corpus cache.'.format(path))
+            return xc
+
+        xc = loader(path)
+        try:
+            self.put(key, xc)
+        except Exception as e:
+            CACHE_LOG.warning('Unable to cache "{}": {}'.format(path, e))
+        return xc
+
+
+# The cache that RGCorpus.load uses, if any.
+_active = None
+
+def enable(cache_dir=None, max_size=None):
+    """
+    Turn on the corpus cache, with the directory and size limit
+    from ``env.conf`` unless given here.
+    """
+    global _active
+    _active = CorpusCache(cache_dir or corpus_cache_dir, max_size or corpus_cache_size)
+
+def disable():
+    global _active
+    _active = None
+
+def active_cache():
+    """
+    :rtype: CorpusCache
+    """
+    return _active
+
+if corpus_cache:
+    enable()
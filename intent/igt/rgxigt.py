@@ -7,6 +7,7 @@ Subclassing of the xigt package to add a few convenience methods.
 # Logging
 #===============================================================================
 
+import hashlib
 import logging
 import re
 import copy
@@ -19,13 +20,16 @@ from intent.consts.grammatical import morpheme_boundary_chars
 from xigt.query import ancestors
 from .exceptions import *
 from intent.interfaces.fast_align import fast_align_sents
-from intent.interfaces.mallet_maxent import MalletMaxent
+from intent.alignment.HMMAligner import hmm_align_sents
+from intent.interfaces.mallet_maxent import MalletMaxent, feature_string
+from intent.classify.maxent import load_classifier
 from intent.pos.TagMap import TagMap
 from intent.utils.string_utils import replace_invalid_xml
 from xigt.errors import XigtError
 from xigt.model import XigtCorpus, Igt, Item, Tier
+from xigt.mixins import XigtAttributeMixin
 from xigt.metadata import Metadata, Meta
-from xigt.consts import ALIGNMENT, SEGMENTATION, CONTENT
+from xigt.consts import ALIGNMENT, SEGMENTATION, CONTENT, FULL, TRANSIENT
 from .metadata import set_meta_attr, find_meta_attr, del_meta_attr, set_intent_method, get_intent_method, \
     set_intent_proj_data
 from xigt import ref
@@ -51,11 +55,14 @@ from .consts import *
 
 import intent.utils.token
 from intent.utils.env import c, classifier
-from intent.alignment.Alignment import Alignment, heur_alignments, AlignmentError
+from intent.alignment.Alignment import Alignment, heur_alignments, AlignmentError, symmetricize
 from intent.utils.token import Token, POSToken, sentence_tokenizer, whitespace_tokenizer
 from intent.interfaces.giza import GizaAligner
+from intent.interfaces.giza_server import connect_giza_server, G_T_MODEL, G_T_REVERSE_MODEL
 
 # Other imports ----------------------------------------------------------------
+from bisect import bisect_right
+from multiprocessing.pool import Pool, ThreadPool
 from collections import defaultdict
 
 #===============================================================================
@@ -82,6 +89,128 @@ class RecursiveFindMixin(FindMixin):
     # but don't implement the class.
     def __iter__(self): pass
 
+def _owning_igt(obj):
+    while obj is not None and not isinstance(obj, RGIgt):
+        obj = getattr(obj, '_parent', None)
+    return obj
+
+def _invalidate_indexes(obj):
+    """
+    Discard the find index, span table and tier cache of the instance that
+    ``obj`` belongs to (if any), so that they will be rebuilt when next needed.
+    """
+    obj = _owning_igt(obj)
+    if obj is not None:
+        obj._find_index = None
+        obj._span_table = None
+        obj._tier_cache = None
+
+def _invalidate_tier_cache(obj):
+    """
+    Discard only the tier cache of the instance that ``obj`` belongs to, for
+    changes (such as to a tier's metadata) that the other indexes don't depend on.
+    """
+    obj = _owning_igt(obj)
+    if obj is not None:
+        obj._tier_cache = None
+
+class IndexedAttributeMixin(object):
+    """
+    Keep the instance's indexes up to date when the ``id`` or ``type``
+    of an object changes.
+    """
+
+    # Not yet set when the constructor sets the id and type.
+    _parent = None
+
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        XigtAttributeMixin.id.fset(self, value)
+        _invalidate_indexes(self)
+
+    # The type is kept in the instance dict, where xigt keeps it, so
+    # that objects whose class is switched after loading still have it.
+    @property
+    def type(self):
+        return self.__dict__.get('type')
+
+    @type.setter
+    def type(self, value):
+        self.__dict__['type'] = value
+        _invalidate_indexes(self)
+
+class IndexedReferenceMixin(IndexedAttributeMixin):
+    """
+    As above, for the reference attributes. Note that the index is only
+    kept up to date if these are set through the properties, rather
+    than in the ``attributes`` dict directly.
+    """
+
+    @property
+    def alignment(self):
+        return self.attributes.get(ALIGNMENT)
+
+    @alignment.setter
+    def alignment(self, value):
+        self.attributes[ALIGNMENT] = value
+        _invalidate_indexes(self)
+
+    @property
+    def content(self):
+        return self.attributes.get(CONTENT)
+
+    @content.setter
+    def content(self, value):
+        self.attributes[CONTENT] = value
+        _invalidate_indexes(self)
+
+    @property
+    def segmentation(self):
+        return self.attributes.get(SEGMENTATION)
+
+    @segmentation.setter
+    def segmentation(self, value):
+        self.attributes[SEGMENTATION] = value
+        _invalidate_indexes(self)
+
+class IndexedContainerMixin(object):
+    """
+    Discard the instance's indexes whenever its tiers, or the items
+    of one of its tiers, are added, removed or reordered.
+    """
+
+    def append(self, obj):
+        super().append(obj)
+        _invalidate_indexes(self)
+
+    def insert(self, i, obj):
+        super().insert(i, obj)
+        _invalidate_indexes(self)
+
+    def remove(self, obj):
+        super().remove(obj)
+        _invalidate_indexes(self)
+
+    def clear(self):
+        super().clear()
+        _invalidate_indexes(self)
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        _invalidate_indexes(self)
+
+    def __setitem__(self, idx, obj):
+        super().__setitem__(idx, obj)
+        _invalidate_indexes(self)
+
+    def __delitem__(self, obj_id):
+        super().__delitem__(obj_id)
+        _invalidate_indexes(self)
+
 
 
 #===============================================================================
@@ -205,16 +334,18 @@ def gen_tier_id(inst, id_base, tier_type=None, alignment=None, no_hyphenate=Fals
     if alignment is not None:
         filters.append(lambda x: aln_match(alignment)(x) or seg_match(alignment)(x) or ref_match(x, alignment, DS_HEAD_ATTRIBUTE))
 
-    # Next, does the type match ours?
+    # Next, does the type match ours? (Passed as a keyword, so
+    # that the instance can look it up in its index.)
+    type_kwargs = {}
     if tier_type is not None:
-        filters.append(type_match(tier_type))
+        type_kwargs['type'] = tier_type
 
     # Get the number of tiers that match this.
-    if not filters:
+    if not (filters or type_kwargs):
         prev_tiers = []
         num_tiers = 0
     else:
-        prev_tiers = inst.findall(others=filters)
+        prev_tiers = inst.findall(others=filters, **type_kwargs)
         num_tiers = len(prev_tiers)
 
 
@@ -244,6 +375,455 @@ def gen_tier_id(inst, id_base, tier_type=None, alignment=None, no_hyphenate=Fals
     return id_str
 
 
+def _basic_processing_igt(inst):
+    """
+    Run :py:meth:`RGIgt.basic_processing` on a single instance, logging
+    rather than raising the errors that are expected for malformed instances.
+    """
+    try:
+        inst.basic_processing()
+    except XigtFormatException as xfe:
+        PARSELOG.warn("Basic processing failed for instance {}".format(inst.id))
+    except GlossLangAlignException as gae:
+        PARSELOG.warn("Gloss and language did not align for instance {}.".format(inst.id))
+    return inst
+
+
+#===============================================================================
+# Corpus-level alignment, one instance at a time
+#===============================================================================
+
+def _heur_align_errors(igt, error, func):
+    """
+    Call ``func``, logging (or, if ``error`` is set, raising) the errors for
+    instances that are missing the lines required to heuristically align them.
+    """
+    try:
+        return func()
+    except NoTransLineException as ntle:
+        PARSELOG.warning(ntle)
+        if error:
+            raise ntle
+    except (NoGlossLineException, NoTransLineException, NoLangLineException, EmptyGlossException) as ngle:
+        PARSELOG.warning(ngle)
+        if error:
+            raise ngle
+    except MultipleNormLineException as mnle:
+        PARSELOG.warning(mnle)
+        if error:
+            raise mnle
+    except XigtError as xe:
+        PARSELOG.critical('XigtError in "{}"'.format(igt.id))
+        raise xe
+
+def heur_align_igt(igt, error=False, use_pos=False, **kwargs):
+    """
+    Heuristically align the gloss and translation lines of a single instance,
+    logging (or, if ``error`` is set, raising) the errors for instances
+    that are missing the lines required to do so.
+
+    :type igt: RGIgt
+    :rtype: RGIgt
+    """
+    PARSELOG.info('Attempting to heuristically align instance "{}"'.format(igt.id))
+    _heur_align_errors(igt, error, lambda: igt.heur_align(use_pos=use_pos, **kwargs))
+    return igt
+
+def _heur_worker_job(job):
+    """
+    Compute the heuristic alignment for an instance from the tokens gathered
+    by :py:meth:`RGIgt.heur_alignment_args`, returning either the alignment
+    or the exception raised, for the parent process to handle.
+    """
+    i, args, e = job
+    if e is None:
+        try:
+            gloss_tokens, trans_tokens, kwargs = args
+            return i, heur_alignments(gloss_tokens, trans_tokens, **kwargs).flip(), None
+        except Exception as err:
+            e = err
+    return i, None, e
+
+def _raise(e):
+    raise e
+
+def heur_align_parallel(corpus, jobs, error=False, use_pos=False, **kwargs):
+    """
+    Heuristically align the instances of ``corpus`` using ``jobs`` worker
+    processes, each of which computes the alignments for its share of the
+    instances. The alignments are added to the instances here, in the corpus
+    order, and errors are handled as :py:func:`heur_align_igt` handles them.
+
+    The gloss and translation tokens of each instance are gathered here and
+    sent to the workers, rather than relying on the workers being forked
+    with a copy of the corpus, so that this works with any multiprocessing
+    start method.
+
+    :type corpus: RGCorpus
+    """
+    kwargs['use_pos'] = use_pos
+
+    # Give each worker several shards, so that they finish at about the same time.
+    chunksize = max(1, len(corpus) // (jobs * 4))
+
+    # Gather the tokens before starting the pool, so that the corpus is
+    # only touched from this thread.
+    job_list = []
+    for i, igt in enumerate(corpus):
+        try:
+            job_list.append((i, igt.heur_alignment_args(**kwargs), None))
+        except Exception as e:
+            job_list.append((i, None, e))
+
+    with Pool(jobs) as p:
+        for i, aln, e in p.imap(_heur_worker_job, job_list, chunksize):
+            igt = corpus[i]
+            PARSELOG.info('Attempting to heuristically align instance "{}"'.format(igt.id))
+            if e is not None:
+                _heur_align_errors(igt, error, lambda: _raise(e))
+            else:
+                _heur_align_errors(igt, error, lambda: igt.set_heur_alignment(aln, **kwargs))
+
+def tag_trans_lines(instances, tagger, batch_size=500):
+    """
+    POS tag the translation lines for a sequence of instances using
+    :py:meth:`StanfordPOSTagger.tag_many`, ``batch_size`` sentences at a time.
+    Instances without a (non-empty) translation line are skipped.
+
+    :param tagger: The active POS tagger model.
+    :type tagger: StanfordPOSTagger
+    """
+    batch = []
+
+    def tag_batch():
+        results = tagger.tag_many([trans for inst, trans in batch])
+        for (inst, trans), tagged in zip(batch, results):
+            inst.add_trans_pos(tagged)
+        del batch[:]
+
+    for inst in instances:
+        try:
+            trans = inst.trans.text()
+        except XigtFormatException as xfe:
+            PARSELOG.warning('{} Not POS tagging the translation line.'.format(xfe))
+            continue
+
+        if trans.strip():
+            batch.append((inst, trans))
+
+        if len(batch) >= batch_size:
+            tag_batch()
+
+    if batch:
+        tag_batch()
+
+def parse_translation_lines(instances, parser, pt=False, dt=False, batch_size=500):
+    """
+    Parse the translation lines for a sequence of instances using
+    :py:meth:`StanfordParser.parse_batch`, ``batch_size`` sentences at a time.
+    Instances without a translation line are skipped.
+
+    :param parser: Initialized StanfordParser
+    :type parser: StanfordParser
+    """
+    assert pt or dt, "At least one of pt or dt should be true."
+
+    batch = []
+
+    def parse_batch():
+        results = parser.parse_batch([trans for inst, trans in batch])
+        for (inst, trans), result in zip(batch, results):
+            inst.add_translation_parse(result, pt=pt, dt=dt)
+        del batch[:]
+
+    for inst in instances:
+        try:
+            batch.append((inst, inst.translation_parse_string()))
+        except XigtFormatException as xfe:
+            PARSELOG.warning('No translation line found for instance "{}", not parsing.'.format(inst.id))
+            continue
+
+        if len(batch) >= batch_size:
+            parse_batch()
+
+    if batch:
+        parse_batch()
+
+def classify_gloss_lines(instances, classifier_obj, batch_size=None, **kwargs):
+    """
+    Run the gloss POS classifier over a sequence of instances. The gloss tokens
+    of all the instances (or ``batch_size`` instances at a time) are sent to
+    :py:meth:`MalletMaxent.classify_many` together, and the results mapped
+    back to the instances by position.
+
+    :param classifier_obj: The active classifier.
+    :type classifier_obj: MalletMaxent | MaxEntModel
+    """
+    batch = []
+
+    def classify_batch():
+        results = classifier_obj.classify_many([f for inst, features in batch for f in features if f is not None])
+        start = 0
+        for inst, features in batch:
+            stop = start + len([f for f in features if f is not None])
+            inst.add_gloss_pos_classifications(features, results[start:stop])
+            start = stop
+        del batch[:]
+
+    for inst in instances:
+        try:
+            batch.append((inst, inst.gloss_pos_features(**kwargs)))
+        except XigtFormatException as xfe:
+            PARSELOG.warning('{} Not classifying the gloss line.'.format(xfe))
+            continue
+
+        if batch_size is not None and len(batch) >= batch_size:
+            classify_batch()
+
+    if batch:
+        classify_batch()
+
+def align_both_ways(forward, reverse, pool_class=ThreadPool):
+    """
+    Run an alignment in each direction at the same time.
+
+    Each direction is given as a ``(function, args)`` pair. By default
+    they run in threads, which suits the aligners that wait on an external
+    process (mgiza, fast_align) or server.
+
+    :param reverse: The reverse direction, or ``None`` if it isn't needed.
+    :param pool_class: Pool to run the two directions in.
+    :returns: The forward and reverse results (``None`` if no reverse direction was given).
+    :rtype: tuple
+    """
+    if reverse is None:
+        func, args = forward
+        return func(*args), None
+
+    with pool_class(2) as p:
+        forward_result = p.apply_async(*forward)
+        reverse_result = p.apply_async(*reverse)
+        return forward_result.get(), reverse_result.get()
+
+def giza_t_g_sents(inst, use_heur=True):
+    """
+    Return the gloss and translation tokens of an instance, as they are
+    given to the statistical aligner.
+
+    :param use_heur: Whether to also return the heuristically aligned words,
+                     which are added to the aligner's training data.
+    :returns: The gloss tokens, the translation tokens, and a list of (trans word, gloss morph) pairs.
+    :rtype: tuple
+    """
+    # Make sure that there are no spaces within a token, this will get us
+    # all out of alignment...
+    g_sent = [re.sub('\s+','', gloss.value().lower()) for gloss in inst.glosses.tokens()]
+    t_sent = [re.sub('\s+', '', trans.value().lower()) for trans in inst.trans.tokens()]
+
+    heur_pairs = []
+
+    # -------------------------------------------
+    # If we ask for the augmented alignment...
+    if use_heur:
+        try:
+            # Try obtaining the tw/gm alignment.
+            pairs = inst.get_trans_gloss_wordpairs(aln_method=INTENT_ALN_HEUR, all_morphs=True)
+        except ProjectionTransGlossException as ptge:
+            ALIGN_LOG.warn("Augmented giza was requested but no heur alignment is present.")
+        else:
+            heur_pairs = [(t_w.lower(), g_m.lower()) for t_w, g_m in pairs]
+
+    return g_sent, t_sent, heur_pairs
+
+def giza_t_g_alignments(instances, aligner=ALIGNER_GIZA, resume = True, use_heur = True, symmetric = SYMMETRIC_INTERSECT, corpus_id=None):
+    """
+    Compute the statistical gloss-to-translation alignments for a sequence of
+    instances, without modifying them.
+
+    Only the gloss and translation tokens are kept from each instance, so
+    ``instances`` may be a one-shot iterator (such as a corpus loaded in
+    transient mode). Together with :py:func:`set_giza_t_g_alignment`, this
+    allows alignment to be done in two passes over a file, rather than
+    needing the entire corpus in memory at once.
+
+    :param instances: Iterable of instances to align.
+    :param aligner: Which aligner to use: mgiza (:py:const:`ALIGNER_GIZA`), fast_align
+                    (:py:const:`ALIGNER_FASTALIGN`), the in-process :py:mod:`HMM aligner <intent.alignment.HMMAligner>`
+                    (:py:const:`ALIGNER_HMM`), which is trained on the instances themselves, or the
+                    :py:mod:`GIZA server <intent.interfaces.giza_server>` (:py:const:`ALIGNER_GIZA_SERVER`),
+                    which gives the Model 2 Viterbi alignments from the stored models' final tables,
+                    rather than resuming mgiza on them.
+    :param resume: Whether to "resume" from the saved aligner, or start fresh.
+    :type resume: bool
+    :returns: One gloss-to-translation alignment per instance, in order.
+    :rtype: list[Alignment]
+    """
+
+    g_sents = []
+    t_sents = []
+
+    g_morphs = []
+    t_words = []
+
+    num_insts = 0
+    for inst in instances:
+        num_insts += 1
+        g_sent, t_sent, heur_pairs = giza_t_g_sents(inst, use_heur=use_heur)
+        g_sents.append(g_sent)
+        t_sents.append(t_sent)
+
+        # For each trans_word/gloss_word index...
+        for t_w, g_m in heur_pairs:
+            t_words.append([t_w])
+            g_morphs.append([g_m])
+
+
+    # Tack on the heuristically aligned g/t words
+    # to the end of the sents, so they won't mess
+    # up alignment.
+
+    g_sents.extend(g_morphs)
+    t_sents.extend(t_words)
+
+
+    # The reverse alignment is only needed for symmetricization.
+    t_g_alignments = None
+
+    if aligner == ALIGNER_FASTALIGN:
+        PARSELOG.info('Attempting to align corpus "{}" using fastalign'.format(corpus_id))
+        g_t_alignments, t_g_alignments = align_both_ways((fast_align_sents, (g_sents, t_sents)),
+                                                         (fast_align_sents, (t_sents, g_sents)) if symmetric else None)
+
+    elif aligner == ALIGNER_HMM:
+        PARSELOG.info('Attempting to align corpus "{}" using the HMM aligner'.format(corpus_id))
+        # The HMM aligner runs in python, so use processes rather than threads.
+        g_t_alignments, t_g_alignments = align_both_ways((hmm_align_sents, (g_sents, t_sents)),
+                                                         (hmm_align_sents, (t_sents, g_sents)) if symmetric else None,
+                                                         pool_class=Pool)
+
+    elif aligner == ALIGNER_GIZA_SERVER:
+        PARSELOG.info('Attempting to align corpus "{}" with the giza server'.format(corpus_id))
+
+        # The server only has the saved models, so there is nothing to "resume".
+        with connect_giza_server() as client:
+            g_t_alignments, t_g_alignments = align_both_ways(
+                (client.aligner(G_T_MODEL).force_align, (g_sents, t_sents)),
+                (client.aligner(G_T_REVERSE_MODEL).force_align, (t_sents, g_sents)) if symmetric else None)
+
+    elif aligner == ALIGNER_GIZA:
+        PARSELOG.info('Attempting to align corpus "{}" with giza'.format(corpus_id))
+
+        if resume:
+            ALIGN_LOG.info('Using pre-saved giza alignment.')
+            # Load up the saved gloss-trans giza alignment model...
+            ga = GizaAligner.load(c.getpath('g_t_dir'))
+
+            # ...and use it to align the gloss line to the translation line.
+            forward = (ga.force_align, (g_sents, t_sents))
+
+            # If we are applying a symmetricization heuristic AND we are
+            # forcing alignment, load the reverse model.
+            reverse = None
+            if symmetric:
+                ga_reverse = GizaAligner.load(c.getpath('g_t_reverse_dir'))
+                reverse = (ga_reverse.force_align, (t_sents, g_sents))
+
+        # Otherwise, start a fresh alignment model in each direction.
+        else:
+            forward = (GizaAligner().temp_train, (g_sents, t_sents))
+            reverse = (GizaAligner().temp_train, (t_sents, g_sents)) if symmetric else None
+
+        g_t_alignments, t_g_alignments = align_both_ways(forward, reverse)
+
+
+    # -------------------------------------------
+    # Apply the symmetricization heuristic to
+    # the alignments if one is specified.
+    # -------------------------------------------
+    if symmetric:
+        g_t_alignments = symmetricize(g_t_alignments, t_g_alignments, symmetric)
+
+    if len(g_t_alignments) < num_insts:
+        raise AlignmentError('Something went wrong with statistical alignment, {} alignments were returned, {} expected.'.format(len(g_t_alignments), num_insts))
+
+    # Drop the alignments for the heuristically-aligned word pairs that were
+    # tacked on to the end, so that one alignment is returned per instance.
+    return g_t_alignments[:num_insts]
+
+def giza_t_g_fingerprint(inst, aligner=ALIGNER_GIZA, resume=True, use_heur=True, symmetric=SYMMETRIC_INTERSECT):
+    """
+    Return a fingerprint of everything that goes into the statistical
+    gloss-to-translation alignment of an instance: its gloss and translation
+    tokens (and heuristically aligned words), and the alignment settings.
+
+    :rtype: str
+    """
+    g_sent, t_sent, heur_pairs = giza_t_g_sents(inst, use_heur=use_heur)
+    data = repr((g_sent, t_sent, heur_pairs, aligner, bool(resume), symmetric))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def giza_t_g_tier(igt):
+    """
+    Return the statistical gloss-to-translation alignment tier of an instance, or ``None``.
+
+    :rtype: RGBilingualAlignmentTier
+    """
+    return igt.get_bilingual_alignment_tier(igt.trans.id, igt.glosses.id, INTENT_ALN_GIZA)
+
+def incremental_giza_t_g_alignments(instances, aligner=ALIGNER_GIZA, resume=True, use_heur=True, symmetric=SYMMETRIC_INTERSECT, corpus_id=None):
+    """
+    As :py:func:`giza_t_g_alignments`, but only align the instances whose
+    gloss-to-translation alignment is missing, or was computed (by
+    :py:func:`set_giza_t_g_alignment`) from a different fingerprint.
+
+    Note that an aligner that is trained from scratch (rather than resumed)
+    only learns from the instances that are realigned.
+
+    :returns: One (alignment, fingerprint) pair per instance, in order. The
+              alignment is ``None`` if the instance's alignment is up to date.
+    :rtype: list[tuple]
+    """
+    fingerprints = []
+    changed = []
+    for inst in instances:
+        fingerprint = giza_t_g_fingerprint(inst, aligner=aligner, resume=resume, use_heur=use_heur, symmetric=symmetric)
+        fingerprints.append(fingerprint)
+
+        tier = giza_t_g_tier(inst)
+        if tier is None or find_meta_attr(tier, DATA_PROV, DATA_FINGERPRINT) != fingerprint:
+            changed.append((len(fingerprints)-1, inst))
+
+    ALIGN_LOG.info('Aligning {} of {} instances, the rest are up to date.'.format(len(changed), len(fingerprints)))
+
+    alignments = [None] * len(fingerprints)
+    if changed:
+        changed_alns = giza_t_g_alignments([inst for i, inst in changed], aligner=aligner, resume=resume,
+                                           use_heur=use_heur, symmetric=symmetric, corpus_id=corpus_id)
+        for (i, inst), aln in zip(changed, changed_alns):
+            alignments[i] = aln
+
+    return list(zip(alignments, fingerprints))
+
+def set_giza_t_g_alignment(igt, g_t_aln, fingerprint=None, aligner=None):
+    """
+    Assign a gloss-to-translation alignment, as returned by
+    :py:func:`giza_t_g_alignments`, to an instance.
+
+    :type igt: RGIgt
+    :type g_t_aln: Alignment
+    :param fingerprint: The instance's :py:func:`giza_t_g_fingerprint`, to store
+                        with the alignment for :py:func:`incremental_giza_t_g_alignments`.
+    :param aligner: The aligner the alignment was computed with, to store
+                    with the alignment's provenance.
+    """
+    t_g_aln = g_t_aln.flip()
+    ba_tier = igt.set_bilingual_alignment(igt.trans, igt.glosses, t_g_aln, aln_method = INTENT_ALN_GIZA)
+
+    if fingerprint is not None:
+        set_meta_attr(ba_tier, DATA_PROV, DATA_FINGERPRINT, fingerprint)
+    if aligner is not None:
+        set_meta_attr(ba_tier, DATA_PROV, DATA_ALIGNER, aligner)
+
 # ===============================================================================
 
 
@@ -379,13 +959,6 @@ class RGCorpus(XigtCorpus, RecursiveFindMixin):
         # Return the corpus
         return xc
 
-    @classmethod
-    def loads(cls, s):
-        xc = xigtxml.loads(s)
-        xc.__class__ = RGCorpus
-        xc._finish_load()
-        return xc
-
     def __getitem__(self, item):
         """
 
@@ -405,48 +978,47 @@ class RGCorpus(XigtCorpus, RecursiveFindMixin):
         """
         :rtype: RGCorpus
         """
-        xc = xigtxml.loads(s)
-        xc.__class__ = RGCorpus
+        xc = rgxigtxml.loads(s)
         xc._finish_load(basic_processing)
 
         return xc
 
     @classmethod
-    def load(cls, path, basic_processing = False):
-        """
-        :rtype : RGCorpus
+    def load(cls, path, basic_processing = False, mode=FULL):
         """
-        xc = xigtxml.load(path)
-        xc.__class__ = RGCorpus
-        xc._finish_load(basic_processing)
+        Load a corpus from a XIGT-XML file.
+
+        With the default ``mode`` of ``full``, every instance is read into memory
+        up front. With ``mode=TRANSIENT``, only the corpus header is read;
+        the instances are parsed (and basic-processed) one at a time as the
+        corpus is iterated over, and are not retained afterward, so that
+        very large files can be processed in constant memory.
 
+        In ``full`` mode, the corpus cache (see :py:mod:`intent.igt.corpus_cache`)
+        is used when it is enabled and ``path`` is a filename.
 
+        :param mode: One of ``full``, ``incremental``, or ``transient``
+        :rtype : RGCorpus
+        """
+        cache = corpus_cache.active_cache()
+        if mode == FULL and cache is not None and isinstance(path, str):
+            xc = cache.load(path, rgxigtxml.load)
+        else:
+            xc = rgxigtxml.load(path, mode=mode)
 
+        if mode == FULL:
+            xc._finish_load(basic_processing)
+        elif basic_processing and xc._generator is not None:
+            xc._generator = (_basic_processing_igt(igt) for igt in xc._generator)
 
         return xc
 
     def _finish_load(self, basic_processing=False):
-        # Now, convert all the IGT instances to RGIgt instances.
-        for igt in self.igts:
-            igt.__class__ = RGIgt
-
-            for tier in igt.tiers:
-                tier.__class__ = RGTier
-
-                for i, item in enumerate(tier):
-                    item.__class__ = RGItem
-                    item.index = i+1
-
-       # If asked, we will also do some
-        # basic-level enrichment...
+        # The instances are decoded as RGIgt already, so all that is left is
+        # (if asked) some basic-level enrichment...
         if basic_processing:
             for inst in self:
-                try:
-                    inst.basic_processing()
-                except XigtFormatException as xfe:
-                    PARSELOG.warn("Basic processing failed for instance {}".format(inst.id))
-                except GlossLangAlignException as gae:
-                    PARSELOG.warn("Gloss and language did not align for instance {}.".format(inst.id))
+                _basic_processing_igt(inst)
 
 
     def filter(self, func):
@@ -511,176 +1083,113 @@ class RGCorpus(XigtCorpus, RecursiveFindMixin):
 
 
 
-    def giza_align_t_g(self, aligner=ALIGNER_GIZA, resume = True, use_heur = True, symmetric = SYMMETRIC_INTERSECT):
+    def giza_align_t_g(self, aligner=ALIGNER_GIZA, resume = True, use_heur = True, symmetric = SYMMETRIC_INTERSECT, incremental = False):
         """
         Perform giza alignments on the gloss and translation
         lines.
 
         :param resume: Whether to "resume" from the saved aligner, or start fresh.
         :type resume: bool
+        :param incremental: Only realign the instances whose alignment is out of
+                            date (see :py:func:`incremental_giza_t_g_alignments`).
+        :type incremental: bool
         """
+        if incremental:
+            for (g_t_asent, fingerprint), igt in zip(incremental_giza_t_g_alignments(self, aligner=aligner, resume=resume,
+                                                                                     use_heur=use_heur, symmetric=symmetric,
+                                                                                     corpus_id=self.id), self):
+                if g_t_asent is not None:
+                    set_giza_t_g_alignment(igt, g_t_asent, fingerprint, aligner=aligner)
+            return
 
-        # Make sure that there are no spaces within a token, this will get us
-        # all out of alignment...
-
-        g_sents = []
-        t_sents = []
-
-        g_morphs = []
-        t_words = []
-
-        for inst in self:
-            g_sent = []
-            t_sent = []
-
-            for gloss in inst.glosses.tokens():
-                g_sent.append(re.sub('\s+','', gloss.value().lower()))
-            g_sents.append(g_sent)
-
-            for trans in inst.trans.tokens():
-                t_sent.append(re.sub('\s+', '', trans.value().lower()))
-            t_sents.append(t_sent)
-
-            # -------------------------------------------
-            # If we ask for the augmented alignment...
-            if use_heur:
-                try:
-                    # Try obtaining the tw/gm alignment.
-                    pairs = inst.get_trans_gloss_wordpairs(aln_method=INTENT_ALN_HEUR, all_morphs=True)
-                except ProjectionTransGlossException as ptge:
-                    ALIGN_LOG.warn("Augmented giza was requested but no heur alignment is present.")
-                else:
-                    # For each trans_word/gloss_word index...
-                    for t_w, g_m in pairs:
-                        t_words.append([t_w.lower()])
-                        g_morphs.append([g_m.lower()])
-
-
-        # Tack on the heuristically aligned g/t words
-        # to the end of the sents, so they won't mess
-        # up alignment.
-
-        g_sents.extend(g_morphs)
-        t_sents.extend(t_words)
-
-
-        if aligner == ALIGNER_FASTALIGN:
-            PARSELOG.info('Attempting to align corpus "{}" using fastalign'.format(self.id))
-            g_t_alignments = fast_align_sents(g_sents, t_sents)
-            t_g_alignments = fast_align_sents(t_sents, g_sents)
-
-        elif aligner == ALIGNER_GIZA:
-            PARSELOG.info('Attempting to align corpus "{}" with giza'.format(self.id))
-
-            if resume:
-                ALIGN_LOG.info('Using pre-saved giza alignment.')
-                # Next, load up the saved gloss-trans giza alignment model
-                ga = GizaAligner.load(c.getpath('g_t_dir'))
-
-                # ...and use it to align the gloss line to the translation line.
-                g_t_alignments = ga.force_align(g_sents, t_sents)
-
-                # If we are applying a symmetricization heuristic AND we are
-                # forcing alignment, load the reverse model.
-                if symmetric is not None:
-                    ga_reverse = GizaAligner.load(c.getpath('g_t_reverse_dir'))
-                    t_g_alignments = ga_reverse.force_align(t_sents, g_sents)
-
-
-            # Otherwise, start a fresh alignment model.
-            else:
-                ga = GizaAligner()
-                g_t_alignments = ga.temp_train(g_sents, t_sents)
-
-                if symmetric:
-                    t_g_alignments = ga.temp_train(t_sents, g_sents)
-
-
-        # -------------------------------------------
-        # Apply the symmetricization heuristic to
-        # the alignments if one is specified.
-        # -------------------------------------------
-        if symmetric:
-            for i, pairs in enumerate(zip(g_t_alignments, t_g_alignments)):
-                g_t, t_g = pairs
-                if not hasattr(g_t, symmetric):
-                    raise AlignmentError('Unimplemented symmetricization heuristic "{}"'.format(symmetric))
-
-                g_t_alignments[i] = getattr(g_t, symmetric)(t_g.flip())
-
-        if len(g_t_alignments) < len(self):
-            raise AlignmentError('Something went wrong with statistical alignment, {} alignments were returned, {} expected.'.format(len(g_t_alignments), len(self)))
+        g_t_alignments = giza_t_g_alignments(self, aligner=aligner, resume=resume, use_heur=use_heur,
+                                             symmetric=symmetric, corpus_id=self.id)
 
         # Next, iterate through the aligned sentences and assign their alignments
         # to the instance.
         for g_t_asent, igt in zip(g_t_alignments, self):
-            t_g_aln = g_t_asent.flip()
-            igt.set_bilingual_alignment(igt.trans, igt.glosses, t_g_aln, aln_method = INTENT_ALN_GIZA)
+            set_giza_t_g_alignment(igt, g_t_asent, aligner=aligner)
 
-    def giza_align_l_t(self, symmetric = None):
+    def giza_align_l_t(self, symmetric = None, aligner=ALIGNER_GIZA):
         """
         Perform giza alignments directly from language to translation lines, for comparison
 
+        :param aligner: Either :py:const:`ALIGNER_GIZA` or :py:const:`ALIGNER_HMM`.
         :rtype: Alignment
         """
 
         l_sents = [i.lang.text(return_list=True) for i in self]
         t_sents = [i.trans.text(return_list=True) for i in self]
 
-        ga = GizaAligner()
-
-        t_l_sents = ga.temp_train(t_sents, l_sents)
+        # Train the aligner in each direction at the same time.
+        if aligner == ALIGNER_HMM:
+            t_l_sents, l_t_sents = align_both_ways((hmm_align_sents, (t_sents, l_sents)),
+                                                   (hmm_align_sents, (l_sents, t_sents)) if symmetric is not None else None,
+                                                   pool_class=Pool)
+        else:
+            t_l_sents, l_t_sents = align_both_ways((GizaAligner().temp_train, (t_sents, l_sents)),
+                                                   (GizaAligner().temp_train, (l_sents, t_sents)) if symmetric is not None else None)
 
         assert len(t_l_sents) == len(self)
 
+        # If we want these symmetricized, apply the heuristic
+        # (flipping the reverse alignments).
         if symmetric is not None:
-            l_t_sents = ga.temp_train(l_sents, t_sents)
-
+            t_l_sents = symmetricize(t_l_sents, l_t_sents, symmetric)
 
         for i, igt in enumerate(self):
             t_l = t_l_sents[i]
 
-            # If we want these symmetricized...
-            if symmetric is not None:
-
-                # Get the l_t (the "reverse" alignment)
-                l_t = l_t_sents[i]
-
-                # Ensure that the requested symmetricization heuristic is implemented...
-                if not hasattr(t_l, symmetric):
-                    raise AlignmentError('Unimplemented symmetricization heuristic "{}"'.format(symmetric))
-
-                # Now, apply it (and make sure to flip the reversed alignment)
-                t_l = getattr(t_l, symmetric)(l_t.flip())
-
             # Finally, set the resulting trans-to-lang alignment in the instance
             igt.set_bilingual_alignment(igt.trans, igt.lang, t_l, aln_method = INTENT_ALN_GIZA)
 
 
 
-    def heur_align(self, error=False, use_pos=False, **kwargs):
+    def heur_align(self, error=False, use_pos=False, jobs=1, **kwargs):
         """
         Perform heuristic alignment between the gloss and translation.
+
+        :param jobs: Number of worker processes to compute the alignments in.
         """
+        if jobs > 1:
+            heur_align_parallel(self, jobs, error=error, use_pos=use_pos, **kwargs)
+            return
+
         for igt in self:
-            try:
-                PARSELOG.info('Attempting to heuristically align instance "{}"'.format(igt.id))
-                g_heur_aln = igt.heur_align(use_pos=use_pos, **kwargs)
-            except NoTransLineException as ntle:
-                PARSELOG.warning(ntle)
-                if error:
-                    raise ntle
-            except (NoGlossLineException, NoTransLineException, NoLangLineException, EmptyGlossException) as ngle:
-                PARSELOG.warning(ngle)
-                if error:
-                    raise ngle
-            except MultipleNormLineException as mnle:
-                PARSELOG.warning(mnle)
-                if error:
-                    raise mnle
-            except XigtError as xe:
-                PARSELOG.critical('XigtError in "{}"'.format(igt.id))
-                raise xe
+            heur_align_igt(igt, error=error, use_pos=use_pos, **kwargs)
+
+    def tag_trans_pos(self, tagger):
+        """
+        POS tag the translation lines of all the instances in the corpus,
+        sending them to the tagger in batches rather than one at a time.
+
+        :param tagger: The active POS tagger model.
+        :type tagger: StanfordPOSTagger
+        """
+        tag_trans_lines(self, tagger)
+
+    def parse_translation_line(self, parser, pt=False, dt=False):
+        """
+        Parse the translation lines of all the instances in the corpus, sending
+        them to the parser in batches rather than one at a time.
+
+        :param parser: Initialized StanfordParser
+        :type parser: StanfordParser
+        """
+        parse_translation_lines(self, parser, pt=pt, dt=dt)
+
+    def classify_gloss_pos(self, classifier_obj=None, **kwargs):
+        """
+        Classify the gloss tokens of all the instances in the corpus, sending
+        every token through the classifier in a single pass.
+
+        :param classifier_obj: the active mallet classifier.
+        :type classifier_obj: MalletMaxent | MaxEntModel
+        """
+        if classifier_obj is None:
+            classifier_obj = load_classifier(classifier)
+
+        classify_gloss_lines(self, classifier_obj, **kwargs)
 
 
 
@@ -691,7 +1200,58 @@ class RGCorpus(XigtCorpus, RecursiveFindMixin):
 
 
 
-class RGIgt(Igt, RecursiveFindMixin):
+class RGIgt(IndexedContainerMixin, IndexedAttributeMixin, Igt, RecursiveFindMixin):
+
+    # The index used to speed up find() and findall(); built on demand,
+    # and discarded whenever the instance is modified.
+    _find_index = None
+
+    @property
+    def find_index(self):
+        """
+        :rtype: FindIndex
+        """
+        if self._find_index is None:
+            self._find_index = FindIndex(self)
+        return self._find_index
+
+    # Likewise for the spans of items over the ODIN lines.
+    _span_table = None
+
+    @property
+    def span_table(self):
+        """
+        :rtype: SpanTable
+        """
+        if self._span_table is None:
+            self._span_table = SpanTable(self)
+        return self._span_table
+
+    # And for the tiers returned by the lang, gloss, trans, glosses
+    # and morphemes properties, keyed by property name. Besides the changes
+    # that discard the other indexes, the cache is discarded when a tier's
+    # word-level info is changed (see add_word_level_info), as the glosses
+    # lookup depends on it. As with the find index, attributes written to an
+    # item's ``attributes`` dict directly (such as the ODIN tag of a
+    # normalized line) are not noticed, and leave the cache stale until the
+    # instance is next changed.
+    _tier_cache = None
+
+    def _cached_tier(self, name, retrieve):
+        """
+        Return the tier cached under ``name``, or else call ``retrieve``
+        to find (or create) it, and cache the result.
+        """
+        if self._tier_cache is not None and name in self._tier_cache:
+            return self._tier_cache[name]
+
+        # Creating the tier modifies the instance, which clears
+        # the cache, so only get the cache afterward.
+        tier = retrieve()
+        if self._tier_cache is None:
+            self._tier_cache = {}
+        self._tier_cache[name] = tier
+        return tier
 
     # • Constructors -----------------------------------------------------------
 
@@ -876,6 +1436,9 @@ class RGIgt(Igt, RecursiveFindMixin):
 
     @property
     def lang(self):
+        return self._cached_tier('lang', self._retrieve_lang)
+
+    def _retrieve_lang(self):
         try:
             lt = retrieve_lang_words(self)
         except NoNormLineException:
@@ -885,6 +1448,9 @@ class RGIgt(Igt, RecursiveFindMixin):
 
     @property
     def gloss(self):
+        return self._cached_tier('gloss', self._retrieve_gloss)
+
+    def _retrieve_gloss(self):
         try:
             gt = retrieve_gloss_words(self)
         except NoNormLineException:
@@ -894,6 +1460,9 @@ class RGIgt(Igt, RecursiveFindMixin):
 
     @property
     def trans(self):
+        return self._cached_tier('trans', self._retrieve_trans)
+
+    def _retrieve_trans(self):
         try:
             tt = retrieve_trans_words(self)
         except NoNormLineException:
@@ -905,6 +1474,9 @@ class RGIgt(Igt, RecursiveFindMixin):
 
     @property
     def glosses(self):
+        return self._cached_tier('glosses', self._retrieve_glosses)
+
+    def _retrieve_glosses(self):
         # Make sure that we don't pick up the gloss-word tier by accident.
         f = [lambda x: not is_word_level_gloss(x)]
 
@@ -929,6 +1501,9 @@ class RGIgt(Igt, RecursiveFindMixin):
         return gt
     @property
     def morphemes(self):
+        return self._cached_tier('morphemes', self._retrieve_morphemes)
+
+    def _retrieve_morphemes(self):
         morphemes = self.find(type=LANG_MORPH_TYPE)
         if morphemes is not None:
             morphemes.__class__ = RGMorphTier
@@ -1081,7 +1656,7 @@ class RGIgt(Igt, RecursiveFindMixin):
         if aln_method:
             filters = [lambda x: get_intent_method(x) == aln_method]
 
-        ba_tier = self.find(attributes=attributes, others=filters)
+        ba_tier = self.find(type=ALN_TIER_TYPE, attributes=attributes, others=filters)
         return ba_tier
 
 
@@ -1131,6 +1706,8 @@ class RGIgt(Igt, RecursiveFindMixin):
         :type tgt_tier: RGTier
         :param aln: The alignment to be added
         :type aln: Alignment
+        :returns: The new alignment tier.
+        :rtype: RGBilingualAlignmentTier
         """
 
         # Look for any alignments previously generated by this method, and delete them
@@ -1157,50 +1734,104 @@ class RGIgt(Igt, RecursiveFindMixin):
             ba_tier.add_pair(src_token.id, tgt_token.id)
 
         self.append(ba_tier)
+        return ba_tier
 
     def heur_align(self, **kwargs):
         """
         Heuristically align the gloss and translation lines of this instance.
         :rtype Alignment:
         """
+        return self.set_heur_alignment(self.heur_alignment(**kwargs), **kwargs)
+
+    def heur_alignment(self, **kwargs):
+        """
+        Compute, without adding it to the instance, the heuristic alignment
+        between the translation words and the gloss morphemes (or, without
+        the "tokenize" option, the gloss words).
+
+        :rtype: Alignment
+        """
+        gloss_tokens, trans_tokens, kwargs = self.heur_alignment_args(**kwargs)
+        return heur_alignments(gloss_tokens, trans_tokens, **kwargs).flip()
+
+    def heur_alignment_args(self, **kwargs):
+        """
+        Gather the gloss and translation tokens (and, with the "use_pos"
+        option, their POS tags) that :py:meth:`heur_alignment` aligns.
+
+        :returns: The gloss tokens, translation tokens and the keyword
+                  arguments for :py:func:`heur_alignments`.
+        :rtype: tuple
+        """
 
         # If given the "tokenize" option, use the tokens
         # split at the morpheme level
+        tokenize = kwargs.get('tokenize', True)
 
-        if kwargs.get('tokenize', True):
-            gloss_tokens = self.glosses.tokens()
+        if tokenize:
+            gloss_tier = self.glosses
         else:
-            gloss_tokens = self.gloss.tokens()
+            gloss_tier = self.gloss
+
+        gloss_tokens = gloss_tier.tokens()
 
-        trans_tokens = self.trans.tokens()
+        trans_tier = self.trans
+        trans_tokens = trans_tier.tokens()
 
         # Use POS tags from the classifier if available.
         if kwargs.get('use_pos', False):
             gloss_pos = self.get_pos_tags(self.gloss.id, tag_method=INTENT_POS_CLASS)
-            trans_pos = self.get_pos_tags(self.trans.id, tag_method=INTENT_POS_TAGGER)
+            trans_pos = self.get_pos_tags(trans_tier.id, tag_method=INTENT_POS_TAGGER)
 
             if gloss_pos is None or trans_pos is None:
                 ALIGN_LOG.warn('POS-heur alignment requested, but gloss-classifier tags or trans-tagger tags were not available. Skipping for instance "{}"'.format(self.id))
 
             # TODO: In order to do the alignment with POS tags, they need to be at the morpheme level. Find a better way to do this?
             # Make sure to expand the POS tags to function at the morpheme-level...
-            if kwargs.get('tokenize', True):
-                glosses_tags = [gloss_pos.get_index(find_gloss_word(self, gloss).index) for gloss in self.glosses]
+            if tokenize:
+                glosses_tags = [gloss_pos.get_index(find_gloss_word(self, gloss).index) for gloss in gloss_tier]
                 kwargs['gloss_pos'] = glosses_tags
             else:
                 kwargs['gloss_pos'] = gloss_pos
 
             kwargs['trans_pos'] = trans_pos
 
-        aln = heur_alignments(gloss_tokens, trans_tokens, **kwargs).flip()
+        return gloss_tokens, trans_tokens, kwargs
 
-        # Now, add these alignments as bilingual alignments...
-        if kwargs.get('tokenize', True):
-            self.set_bilingual_alignment(self.trans, self.glosses, aln, aln_method=INTENT_ALN_HEUR)
+    def set_heur_alignment(self, aln, **kwargs):
+        """
+        Add the alignment computed by :py:meth:`heur_alignment` to the instance.
+
+        :returns: The alignment between the translation words and gloss words.
+        :rtype: Alignment
+        """
+        tokenize = kwargs.get('tokenize', True)
+
+        if tokenize:
+            gloss_tier = self.glosses
         else:
-            self.set_bilingual_alignment(self.trans, self.gloss, aln, aln_method=INTENT_ALN_HEUR)
+            gloss_tier = self.gloss
+
+        trans_tier = self.trans
+
+        # Work out the trans-to-gloss-word alignment to return (as
+        # get_trans_gloss_alignment would) before adding the new tier,
+        # so that the instance doesn't have to be searched again after
+        # it's been modified.
+        if tokenize:
+            trans_gloss = self.get_bilingual_alignment(trans_tier.id, self.gloss.id, INTENT_ALN_HEUR)
+            if trans_gloss is None:
+                gloss = self.gloss
+                gloss_words = {gloss_i: find_gloss_word(self, gloss_tier[gloss_i-1], gloss).index
+                               for gloss_i in aln.all_tgt()}
+                trans_gloss = Alignment([(trans_i, gloss_words[gloss_i]) for trans_i, gloss_i in aln])
+        else:
+            trans_gloss = Alignment(aln)
+
+        # Now, add these alignments as bilingual alignments...
+        self.set_bilingual_alignment(trans_tier, gloss_tier, aln, aln_method=INTENT_ALN_HEUR)
 
-        return self.get_trans_gloss_alignment(INTENT_ALN_HEUR)
+        return trans_gloss
 
 
     # • POS Tag Manipulation ---------------------------------------------------------------
@@ -1318,7 +1949,16 @@ class RGIgt(Igt, RecursiveFindMixin):
         :type tagger: StanfordPOSTagger
         """
 
-        trans_tags = [i.label for i in tagger.tag(self.trans.text())]
+        return self.add_trans_pos(tagger.tag(self.trans.text()))
+
+    def add_trans_pos(self, tagged):
+        """
+        Add the output of the tagger for the translation line to the instance.
+
+        :param tagged: The tagged tokens returned by the tagger.
+        :type tagged: list[POSToken]
+        """
+        trans_tags = [i.label for i in tagged]
 
         # Add the generated pos tags to the tier.
         self.add_pos_tags(self.trans.id, trans_tags, tag_method=INTENT_POS_TAGGER)
@@ -1329,30 +1969,35 @@ class RGIgt(Igt, RecursiveFindMixin):
         Run the classifier on the gloss words and return the POS tags.
 
         :param classifier_obj: the active mallet classifier to classify this language line.
-        :type classifier_obj: MalletMaxent
+        :type classifier_obj: MalletMaxent | MaxEntModel
         """
         if classifier_obj is None:
-            classifier_obj = MalletMaxent(classifier)
+            classifier_obj = load_classifier(classifier)
 
-        attributes = {ALIGNMENT:self.gloss.id}
+        features = self.gloss_pos_features(**kwargs)
+        results = classifier_obj.classify_many([f for f in features if f is not None])
+        return self.add_gloss_pos_classifications(features, results)
 
-        # Search for a previous run and remove if found...
-        prev_tier = self.get_pos_tags(self.gloss.id, tag_method = INTENT_POS_CLASS)
+    def gloss_pos_features(self, **kwargs):
+        """
+        Build the classifier features for each of the gloss tokens.
 
-        if prev_tier:
-            prev_tier.delete()
+        Punctuation is not sent to the classifier, and is represented
+        by ``None`` in the returned list.
 
+        :rtype: list[str]
+        """
         kwargs['prev_gram'] = None
         kwargs['next_gram'] = None
 
-        tags = []
+        features = []
 
         # Iterate over the gloss tokens...
         for i, gloss_token in enumerate(self.gloss.tokens()):
 
             # Manually ensure punctuation.
             if re.match('[\.\?"\';/,]+', gloss_token.seq):
-                tags.append('PUNC')
+                features.append(None)
             else:
 
                 # TODO: Yet another whitespace issue..
@@ -1371,17 +2016,44 @@ class RGIgt(Igt, RecursiveFindMixin):
                 if i-1 >= 0:
                     kwargs['prev_gram'] = self.gloss.tokens()[i-1]
 
-                # The classifier returns a Classification object which has all the weights...
-                # obtain the highest weight.
-                result = classifier_obj.classify_string(gloss_token, **kwargs)
+                features.append(feature_string(gloss_token, **kwargs))
 
-                if len(result) == 0:
-                    best = ['UNK']
-                else:
-                    best = result.largest()
+        return features
+
+    def add_gloss_pos_classifications(self, features, results):
+        """
+        Add the classifier output for the gloss tokens as a POS tier,
+        replacing any previous classifier tier.
+
+        :param features: The features for each gloss token, as returned by :py:meth:`gloss_pos_features`
+        :param results: The classifications of the non-``None`` features, in order.
+        :type results: list[Classification]
+        """
+        # Search for a previous run and remove if found...
+        prev_tier = self.get_pos_tags(self.gloss.id, tag_method = INTENT_POS_CLASS)
+
+        if prev_tier:
+            prev_tier.delete()
+
+        results = iter(results)
+        tags = []
+
+        for feature in features:
+            if feature is None:
+                tags.append('PUNC')
+                continue
 
-                # Return the POS tags
-                tags.append(best[0])
+            # The classifier returns a Classification object which has all the weights...
+            # obtain the highest weight.
+            result = next(results)
+
+            if len(result) == 0:
+                best = ['UNK']
+            else:
+                best = result.largest()
+
+            # Return the POS tags
+            tags.append(best[0])
 
         self.add_pos_tags(self.gloss.id, tags, tag_method=INTENT_POS_CLASS)
         return tags
@@ -1644,14 +2316,28 @@ class RGIgt(Igt, RecursiveFindMixin):
 
         PARSELOG.debug('Attempting to parse translation line of instance "{}"'.format(self.id))
 
+        result = parser.parse(self.translation_parse_string())
+        self.add_translation_parse(result, pt=pt, dt=dt)
+
+    def translation_parse_string(self):
+        """
+        Return the translation line as it should be sent to the parser.
+
+        :rtype: str
+        """
         # Replace any parens in the translation line with square brackets, since they
         # will cause problems in the parsing otherwise.
 
         trans = self.trans.text().replace('(', '[')
         trans = trans.replace(')',']')
+        return trans
 
-        result = parser.parse(trans)
+    def add_translation_parse(self, result, pt=False, dt=False):
+        """
+        Add the trees from a parse of the translation line to the instance.
 
+        :type result: ParseResult
+        """
         PARSELOG.debug('Result of translation parse: {}'.format(result.pt))
 
         if pt and result.pt:
@@ -1832,7 +2518,7 @@ class RGIgt(Igt, RecursiveFindMixin):
 # Items
 #===============================================================================
 
-class RGItem(Item, FindMixin):
+class RGItem(IndexedReferenceMixin, Item, FindMixin):
     """
     Subclass of the xigt core "Item."
     """
@@ -1847,6 +2533,30 @@ class RGItem(Item, FindMixin):
         self.stop = kwargs.get('stop')
         self.index = kwargs.get('index')
 
+    # Items decoded from XIGT-XML skip the constructor, so need defaults
+    # here, and are numbered on demand (see RGTier._lazy_index).
+    start = None
+    stop = None
+    _index = None
+
+    @property
+    def index(self):
+        """
+        The position (from 1) of this item in its tier.
+        """
+        if self._index is None:
+            tier = getattr(self, '_parent', None)
+            if getattr(tier, '_lazy_index', False):
+                tier._lazy_index = False
+                for i, item in enumerate(tier):
+                    if getattr(item, '_index', None) is None:
+                        item._index = i+1
+        return self._index
+
+    @index.setter
+    def index(self, value):
+        self._index = value
+
     def copy(self, parent=None):
         """
         Part of a recursive deep-copy function. Faster to implement here specifically than calling
@@ -1956,7 +2666,10 @@ class RGBilingualAlignment(RGItem):
 #===============================================================================
 
 
-class RGTier(Tier, RecursiveFindMixin):
+class RGTier(IndexedContainerMixin, IndexedReferenceMixin, Tier, RecursiveFindMixin):
+
+    # Set when the tier's items have yet to be numbered.
+    _lazy_index = False
 
     def copy(self, parent=None):
         """
@@ -1982,7 +2695,7 @@ class RGTier(Tier, RecursiveFindMixin):
         elements.
         """
         obj.index = len(self)+1
-        Tier.append(self, obj)
+        self.append(obj)
 
     def get_index(self, index):
         """
@@ -2278,8 +2991,8 @@ def retrieve_trans_phrase(inst):
     if ALIGNMENT not in tpt.attributes:
         try:
             lpt = retrieve_lang_phrase_tier(inst)
-            tpt.attributes[ALIGNMENT] = lpt.id
-            tpt[0].attributes[ALIGNMENT] = lpt[0].id
+            tpt.alignment = lpt.id
+            tpt[0].alignment = lpt[0].id
         except MultipleNormLineException as mnle:
             pass
         except NoNormLineException as nlle:
@@ -2318,6 +3031,8 @@ def retrieve_phrase_tier(inst, tag, id, type):
         n = get_normal_tier(inst)
         # Get the normalized line
         l = retrieve_normal_line(inst, tag)
+        if l is None:
+            raise NoNormLineException('No normalized line found for tag "{}" in instance {}'.format(tag, inst.id))
 
         # -------------------------------------------
         # Create the phrase tier, and add a single phrase item.
@@ -2719,29 +3434,102 @@ def odin_span(item):
         return [(0, len(item.value()))]
 
     else:
-        # Otherwise, we have two options. We are at an item which:
-        # (1) has content/segmentation of a bare ID ("w2")
-        # (2) has content/segmentation with a span ("w2[2:5]")
-
         # Select the expression which indicates how we will search..
         aln_expr = item.attributes.get(CONTENT)
         if not aln_expr:
             aln_expr = item.attributes.get(SEGMENTATION)
 
-        spans = []
+        # Use the instance's table of resolved expressions if it has one.
+        table = getattr(item.igt, 'span_table', None)
+        if table is None:
+            return _resolve_span(item.igt, aln_expr)
+        else:
+            return table.spans(aln_expr)
 
-        for aligned_object, span in resolve_objects(item.igt, aln_expr):
-            if span is None:
-                spans.extend(odin_span(aligned_object))
-            else:
-                aln_start, aln_stop = span
-                for start, stop in odin_span(aligned_object):
-                    spans.extend([(start+aln_start, start+aln_stop)])
+def _resolve_span(inst, aln_expr):
+    # We are at an item which either:
+    # (1) has content/segmentation of a bare ID ("w2")
+    # (2) has content/segmentation with a span ("w2[2:5]")
+    spans = []
 
-        return spans
+    for aligned_object, span in resolve_objects(inst, aln_expr):
+        if span is None:
+            spans.extend(odin_span(aligned_object))
+        else:
+            aln_start, aln_stop = span
+            for start, stop in odin_span(aligned_object):
+                spans.extend([(start+aln_start, start+aln_stop)])
+
+    return spans
 
+class SpanTable(object):
+    """
+    Memoized :py:func:`odin_span` results for an instance, keyed by the
+    content/segmentation expression being resolved, along with
+    :py:class:`SpanIndex` lookups for its tiers.
 
+    Like the find index, the table is discarded whenever the instance
+    is modified.
+    """
+    def __init__(self, inst):
+        self.inst = inst
+        self._spans = {}
+        self._indexes = {}
 
+    def spans(self, aln_expr):
+        """
+        :rtype: list[tuple]
+        """
+        if aln_expr not in self._spans:
+            self._spans[aln_expr] = _resolve_span(self.inst, aln_expr)
+        return list(self._spans[aln_expr])
+
+    def tier_index(self, tier):
+        """
+        :rtype: SpanIndex
+        """
+        tier_index = self._indexes.get(tier.id)
+        if tier_index is None or tier_index.tier is not tier:
+            tier_index = self._indexes[tier.id] = SpanIndex(tier)
+        return tier_index
+
+class SpanIndex(object):
+    """
+    Interval index over the odin spans of the items in a tier, for finding
+    the item that contains a given set of spans.
+    """
+    def __init__(self, tier):
+        self.tier = tier
+        self.items = list(tier)
+        self.item_spans = [odin_span(item) for item in self.items]
+
+        # The bisection only works if every item covers a single span, and no
+        # two items' spans touch, so that any point is inside at most one item.
+        self.disjoint = all([len(spans) == 1 for spans in self.item_spans])
+        if self.disjoint:
+            intervals = sorted([(spans[0], i) for i, spans in enumerate(self.item_spans)])
+            self.starts = [start for (start, stop), i in intervals]
+            self.order = [i for span, i in intervals]
+            self.disjoint = all([a[0][1] < b[0][0] for a, b in zip(intervals, intervals[1:])])
+
+    def container(self, y_spans):
+        """
+        Return the first item whose spans contain all of ``y_spans``, as
+        with :py:func:`x_span_contains_y`, or ``None``.
+        """
+        if not self.disjoint or not y_spans or any([i > j for i, j in y_spans]):
+            for item, spans in zip(self.items, self.item_spans):
+                if x_span_contains_y(spans, y_spans):
+                    return item
+            return None
+
+        # Only the item starting closest before the first span can contain it.
+        pos = bisect_right(self.starts, y_spans[0][0]) - 1
+        if pos >= 0:
+            i = self.order[pos]
+            if x_span_contains_y(self.item_spans[i], y_spans):
+                return self.items[i]
+        return None
 
 
 def x_contains_y(inst, x_item, y_item):
@@ -2782,18 +3570,26 @@ def x_span_contains_y(x_spans, y_spans):
     return True
 
 
-def find_gloss_word(inst, morph):
+def find_gloss_word(inst, morph, gloss=None):
     """
     Find the gloss word to which this gloss morph is aligned. This will search the word-level "glosses" tier to
     find overlaps.
 
     :param morph: Gloss line morph to find alignment for.
     :type morph: RGMorph
+    :param gloss: The gloss word tier, if already retrieved.
+    :type gloss: RGWordTier
 
     :rtype: RGWord
     """
+    if gloss is None:
+        gloss = inst.gloss
 
-    for g in inst.gloss:
+    table = getattr(inst, 'span_table', None)
+    if table is not None:
+        return table.tier_index(gloss).container(odin_span(morph))
+
+    for g in gloss:
 
         if x_contains_y(inst, g, morph):
             return g
@@ -2840,11 +3636,20 @@ def follow_alignment(inst, id):
     else:
         return found
 
+# The glosses tier is told apart by its word-level info, so
+# the instance's tier cache is discarded when that changes.
+
 def add_word_level_info(obj, val):
+    old_val = get_word_level_info(obj)
     set_meta_attr(obj, INTENT_EXTENDED_INFO, INTENT_TOKEN_TYPE, val, metadata_type=INTENT_META_TYPE)
+    if old_val != val:
+        _invalidate_tier_cache(obj)
 
 def remove_word_level_info(obj):
+    old_val = get_word_level_info(obj)
     del_meta_attr(obj, INTENT_EXTENDED_INFO, INTENT_TOKEN_TYPE)
+    if old_val is not None:
+        _invalidate_tier_cache(obj)
 
 def get_word_level_info(obj):
     return find_meta_attr(obj, INTENT_EXTENDED_INFO, INTENT_TOKEN_TYPE)
@@ -2900,4 +3705,6 @@ def strip_pos(inst):
 
 from intent.trees import IdTree, project_ps, Terminal, DepTree, project_ds, DepEdge, build_dep_edges
 from .creation import *
-from .search import aln_match, type_match, seg_match, ref_match, findall_in_obj, find_in_obj
\ No newline at end of file
+from .codecs import rgxigtxml
+from . import corpus_cache
+from .search import aln_match, type_match, seg_match, ref_match, findall_in_obj, find_in_obj, FindIndex
\ No newline at end of file
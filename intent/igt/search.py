@@ -2,6 +2,7 @@
 # FILTERS
 # -------------------------------------------
 import re
+from collections import defaultdict
 
 from intent.igt.consts import ODIN_TYPE, STATE_ATTRIBUTE, RAW_STATE, CLEAN_STATE, NORM_STATE, ODIN_LANG_TAG, \
     ODIN_GLOSS_TAG, ODIN_TRANS_TAG
@@ -39,6 +40,57 @@ def id_match(id): return lambda o: o.id == id
 def id_base_match(id_base): return lambda o: get_id_base(o.id) == id_base
 def attr_match(attr): return lambda o: set(attr.items()).issubset(set(o.attributes.items()))
 
+# -------------------------------------------
+# INDEX
+# -------------------------------------------
+
+class FindIndex(object):
+    """
+    Lookup tables for an instance, so that searches on one of the indexed
+    keywords only need to check the objects that could possibly match,
+    rather than walking every tier and item.
+
+    The tables hold the instance, its tiers and its items in the same
+    (depth-first) order that a search visits them. The index is a snapshot,
+    so the instance must build a new one whenever it is modified.
+    """
+
+    # The keywords that can be looked up directly.
+    keys = ('id', 'type', ALIGNMENT, SEGMENTATION, CONTENT)
+
+    def __init__(self, igt):
+        self.tables = {key: defaultdict(list) for key in self.keys}
+
+        objs = [igt]
+        for tier in igt:
+            objs.append(tier)
+            objs.extend(tier)
+
+        for obj in objs:
+            self.tables['id'][obj.id].append(obj)
+            self.tables['type'][obj.type].append(obj)
+
+            for ref_type in (ALIGNMENT, SEGMENTATION, CONTENT):
+                my_ref = getattr(obj, ref_type, None)
+                if my_ref:
+                    for target_ref in set(ref.ids(my_ref)):
+                        self.tables[ref_type][target_ref].append(obj)
+
+    def candidates(self, **kwargs):
+        """
+        Return the objects that may match the search, in search order, or
+        ``None`` if none of the keywords can be looked up.
+
+        :rtype: list
+        """
+        best = None
+        for key in self.keys:
+            if key in kwargs:
+                found = self.tables[key].get(kwargs[key], [])
+                if best is None or len(found) < len(best):
+                    best = found
+        return best
+
 # -------------------------------------------
 # FIND
 # -------------------------------------------
@@ -87,36 +139,55 @@ def _build_filterlist(**kwargs):
 
     return filters
 
-def find_in_obj(obj, **kwargs):
-    found = _find_in_self(obj, _build_filterlist(**kwargs))
+def _candidates(obj, kwargs):
+    index = getattr(obj, 'find_index', None)
+    if index is not None:
+        return index.candidates(**kwargs)
+
+def _find(obj, filters, kwargs):
+    candidates = _candidates(obj, kwargs)
+    if candidates is not None:
+        for candidate in candidates:
+            if _find_in_self(candidate, filters) is not None:
+                return candidate
+        return None
+
+    found = _find_in_self(obj, filters)
     if found is not None:
         return obj
 
     # If we are working on a container object, iterate
     # over its children.
     elif isinstance(obj, XigtContainerMixin):
-        found = None
         for child in obj:
-            found = find_in_obj(child, **kwargs)
+            found = _find(child, filters, kwargs)
             if found is not None:
-                break
+                return found
+    return None
+
+def _findall(obj, filters, kwargs, found):
+    candidates = _candidates(obj, kwargs)
+    if candidates is not None:
+        found.extend([c for c in candidates if _find_in_self(c, filters) is not None])
         return found
 
-def findall_in_obj(obj, **kwargs):
-    found = []
-    found_item = _find_in_self(obj, _build_filterlist(**kwargs))
-    if found_item is not None:
-        found = [found_item]
+    if _find_in_self(obj, filters) is not None:
+        found.append(obj)
 
     # If we are working on a container object, iterate over
     # the children.
     if isinstance(obj, XigtContainerMixin):
         for child in obj:
-            found += findall_in_obj(child, **kwargs)
-
+            _findall(child, filters, kwargs, found)
 
     return found
 
+def find_in_obj(obj, **kwargs):
+    return _find(obj, _build_filterlist(**kwargs), kwargs)
+
+def findall_in_obj(obj, **kwargs):
+    return _findall(obj, _build_filterlist(**kwargs), kwargs, [])
+
 # -------------------------------------------
 # Some convenience methods for common searches
 # -------------------------------------------
@@ -6,6 +6,7 @@ Created on Feb 14, 2014
 
 # Built-in imports -------------------------------------------------------------
 import os, sys, re, glob, logging
+import heapq
 
 # Internal imports -------------------------------------------------------------
 import shutil
@@ -40,6 +41,18 @@ class CooccurrenceFile(defaultdict):
     def __init__(self):
         defaultdict.__init__(self, set)
 
+    def add_sentence(self, key_ids, entry_ids):
+        """
+        Record that every id in ``entry_ids`` co-occurs with every id in ``key_ids``,
+        and list the former under the special ``0`` key.
+        """
+        entries = set(entry_ids)
+
+        # Add the entries for each key all at once, rather than pair by pair.
+        self[0].update(entries)
+        for key in set(key_ids):
+            self[key].update(entries)
+
     def dump(self, path = None):
 
         if not path:
@@ -48,40 +61,97 @@ class CooccurrenceFile(defaultdict):
             f = open(path, 'w', encoding='utf-8')
 
         for key in sorted(self.keys()):
-            for entry in sorted(self[key]):
-                f.write('%d %d\n' % (key, entry))
+            entries = sorted(self[key])
+            if entries:
+                prefix = '%d ' % key
+                f.write(prefix + ('\n' + prefix).join(map(str, entries)) + '\n')
 
         f.flush()
+        if path:
+            f.close()
 
-class A3files(object):
-    def __init__(self, prefix, name='aln'):
-        self.files = glob.glob(os.path.join(prefix, name+'.A3.final.part*'))
-        self.prefix = prefix
+A3_PAIR_RE = re.compile(r'pair \(([0-9]+)\)')
 
-    def merge(self, merged_path):
+def read_a3(fh):
+    """
+    Read an A3 file one sentence pair at a time.
 
-        sentdict = {}
+    :param fh: Open, text-mode file handle to the A3 file.
+    :returns: Generator of (pair number, (header line, target line, alignment line)) tuples.
+    """
+    lines = iter(fh)
+    for header in lines:
+        # Each pair takes up three lines: the header, the target
+        # sentence, and the source words with their alignments.
+        tgt_line = next(lines, None)
+        aln_line = next(lines, None)
+        if aln_line is None:
+            raise GizaAlignmentException('Incomplete sentence pair in A3 file: "{}"'.format(header.strip()))
+
+        yield int(A3_PAIR_RE.search(header).group(1)), (header, tgt_line, aln_line)
+
+def a3_alignments(path):
+    """
+    Lazily read the alignments from an A3 file, in file order.
 
-        for filename in self.files:
-            f = open(filename, 'r', encoding='utf-8')
-            lines = f.readlines()
-            f.close()
+    :rtype: Iterator[Alignment]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for num, (header, tgt_line, aln_line) in read_a3(f):
+            yield Alignment.from_giza(aln_line)
 
-            while lines:
-                line1 = lines.pop(0)
-                line2 = lines.pop(0)
-                line3 = lines.pop(0)
+class _UnsortedA3Exception(Exception):
+    pass
+
+def _sorted_pairs(path, part):
+    """
+    Read the pairs from an A3 part file, checking as we go that
+    they are in order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        last = None
+        for num, lines in read_a3(f):
+            if last is not None and num < last:
+                raise _UnsortedA3Exception(path)
+            last = num
+
+            # The part number breaks any ties, so that
+            # the lines are never compared.
+            yield num, part, lines
+
+def _write_pairs(f, pairs):
+    for num, part, lines in pairs:
+        f.writelines(lines)
+
+def merge_a3(paths, merged_path):
+    """
+    Merge A3 part files into a single file, ordered by pair number.
 
-                num = int(re.search('pair \(([0-9]+)\)', line1).group(1))
-                sentdict[num] = (line1,line2,line3)
+    The part files that GIZA writes are each in order already, so they are
+    merged by streaming through all of them at once, rather than reading
+    them into memory.
+    """
+    try:
+        with open(merged_path, 'w', encoding='utf-8') as merged_f:
+            _write_pairs(merged_f, heapq.merge(*[_sorted_pairs(path, i) for i, path in enumerate(paths)]))
+    except _UnsortedA3Exception as uae:
+        GIZA_LOG.warning('A3 part file "{}" is out of order; sorting in memory instead.'.format(uae))
+        pairs = []
+        for i, path in enumerate(paths):
+            with open(path, 'r', encoding='utf-8') as f:
+                pairs.extend((num, i, lines) for num, lines in read_a3(f))
+        pairs.sort()
+
+        with open(merged_path, 'w', encoding='utf-8') as merged_f:
+            _write_pairs(merged_f, pairs)
 
-        # Create and write out the merged file
-        merged_f = open(merged_path, 'w', encoding='utf-8')
-        for key in sorted(sentdict.keys()):
-            for line in sentdict[key]:
-                merged_f.write(line)
+class A3files(object):
+    def __init__(self, prefix, name='aln'):
+        self.files = glob.glob(os.path.join(prefix, name+'.A3.final.part*'))
+        self.prefix = prefix
 
-        merged_f.close()
+    def merge(self, merged_path):
+        merge_a3(self.files, merged_path)
         self.clean()
 
     def clean(self):
@@ -260,86 +330,69 @@ class GizaFiles(object):
         if len(ef_lines) != len(ff_lines):
             raise GizaAlignmentException('Files are of unequal length. %d vs. %d' % (len(ef_lines), len(ff_lines)))
 
-        # --- 4) Attempt to open up the snt file locations for writing...
-        ef_file = open(self.ef_snt, 'w', encoding='utf-8')
-        fe_file = open(self.fe_snt, 'w', encoding='utf-8')
-
-        # --- 5) While we are at it, let's make the cooc files.
+        # --- 4) While we are at it, let's make the cooc files.
         ef_cooc = CooccurrenceFile()
         fe_cooc = CooccurrenceFile()
 
-        # --- 4) Otherwise, proceed converting text files with the vocab...
-        for e_line, f_line in zip(ef_lines, ff_lines):
-
-            # Skip if one of the lines is empty...
-            if (not e_line.strip()) or (not f_line.strip()):
-                continue
-
-            e_snt_ids = ev.string_to_ids(e_line, add=True)
-            f_snt_ids = fv.string_to_ids(f_line, add=True)
+        # --- 5) Attempt to open up the snt file locations for writing...
+        with open(self.ef_snt, 'w', encoding='utf-8') as ef_file, open(self.fe_snt, 'w', encoding='utf-8') as fe_file:
 
-            e_snt = ev.string_to_snt(e_line)
-            f_snt = fv.string_to_snt(f_line)
+            ef_buf, fe_buf = [], []
 
-            # The cooc file contains every id
-            # for '0', and then, for every e_id,
-            # the f_ids that it is seen co-ocurring with.
-            #
-            # So, let's build that database.
-            for e_id in e_snt_ids:
-                fe_cooc[0].add(e_id)
+            # --- 6) Otherwise, proceed converting text files with the vocab...
+            for e_line, f_line in zip(ef_lines, ff_lines):
 
-                for f_id in f_snt_ids:
-                    ef_cooc[e_id].add(f_id)
+                # Skip if one of the lines is empty...
+                if (not e_line.strip()) or (not f_line.strip()):
+                    continue
 
+                e_snt_ids = ev.string_to_ids(e_line, add=True)
+                f_snt_ids = fv.string_to_ids(f_line, add=True)
 
-            for f_id in f_snt_ids:
-                ef_cooc[0].add(f_id)
+                e_snt = ' '.join([str(i) for i in e_snt_ids])
+                f_snt = ' '.join([str(i) for i in f_snt_ids])
 
-                for e_id in e_snt_ids:
-                    fe_cooc[f_id].add(e_id)
+                # The cooc file contains every id
+                # for '0', and then, for every e_id,
+                # the f_ids that it is seen co-ocurring with.
+                ef_cooc.add_sentence(e_snt_ids, f_snt_ids)
+                fe_cooc.add_sentence(f_snt_ids, e_snt_ids)
 
+                # Write the special "1" token to each file
+                ef_buf.append('1\n%s\n%s\n' % (e_snt, f_snt))
+                fe_buf.append('1\n%s\n%s\n' % (f_snt, e_snt))
 
-            # Write the special "1" token to each file
-            ef_file.write('1\n')
-            ef_file.write('%s\n%s\n' % (e_snt, f_snt))
+                if len(ef_buf) >= 10000:
+                    ef_file.write(''.join(ef_buf)), fe_file.write(''.join(fe_buf))
+                    ef_buf, fe_buf = [], []
 
-            fe_file.write('1\n')
-            fe_file.write('%s\n%s\n' % (f_snt, e_snt))
+            ef_file.write(''.join(ef_buf)), fe_file.write(''.join(fe_buf))
 
-            ef_file.flush(), fe_file.flush()
-
-        # --- 5) Dump our (posisbly) updated vocab files
+        # --- 7) Dump our (posisbly) updated vocab files
         ev.dump(self.e_vcb)
         fv.dump(self.f_vcb)
 
-        # --- 6) Also dump our coocurrence files...
+        # --- 8) Also dump our coocurrence files...
         ef_cooc.dump(self.ef_cooc)
         fe_cooc.dump(self.fe_cooc)
 
 
     # Read the aligned file here...
+    def iter_aligned_sents(self):
+        """
+        Lazily read the alignments from the (merged) A3 file.
+
+        :rtype: Iterator[Alignment]
+        """
+        return a3_alignments(self.a3merged)
+
     def aligned_sents(self):
         """
         Read in the (merged) A3 file and return the AlignedSents of (src, tgt) alignments.
 
         :rtype: list[AlignedSent]
         """
-        a_f = open(self.a3merged, 'r', encoding='utf-8')
-        lines = a_f.readlines()
-        a_f.close()
-
-        alignments = []
-
-        while lines:
-            top_str = lines.pop(0)
-            tgt_str = lines.pop(0)
-            aln_str = lines.pop(0)
-
-            a = Alignment.from_giza(aln_str)
-            alignments.append(a)
-
-        return alignments
+        return list(self.iter_aligned_sents())
 
 
 class VocabWord(object):
@@ -379,6 +432,8 @@ class Vocab(object):
     """
 
     def __init__(self):
+        # Both are keyed by the plain string, rather than the VocabWord, so
+        # that looking up a token doesn't call VocabWord.__eq__ or __hash__.
         self._counts = {}
         self._words = {}
         self._i = 1
@@ -390,14 +445,15 @@ class Vocab(object):
         """
         Add a word to the vocab and assign it a new id.
         """
-        if word in self._counts:
+        vw = self._words.get(word)
+        if vw is not None:
             self._counts[word] += count
-            return self._words[word].id
+            return vw.id
         else:
             self._i += 1
             vw = VocabWord(word, self._i)
-            self._counts[vw] = count
-            self._words[vw] = vw
+            self._counts[word] = count
+            self._words[word] = vw
             return self._i
 
     def add_from_txt(self, path):
@@ -413,11 +469,12 @@ class Vocab(object):
         Get the ID for a word. If "add" is False, raise an exception if the word
         is not found in the vocab. Otherwise, add it and return the new ID.
         """
-        if self._words.get(w):
+        vw = self._words.get(w)
+        if vw is not None:
             if add:
                 return self.add(w)
             else:
-                return self._words.get(w).id
+                return vw.id
         elif not add:
             raise VocabNotFoundException
         else:
@@ -469,7 +526,7 @@ class Vocab(object):
 
 
     def items(self):
-        return sorted(self._counts.items(), key=lambda i: i[0].id)
+        return sorted([(self._words[w], count) for w, count in self._counts.items()], key=lambda i: i[0].id)
 
     def dump(self, path=None):
         if not path:
@@ -0,0 +1,312 @@
+"""
+A long-lived force-alignment service for the stored GIZA models.
+
+Force-aligning with :py:meth:`GizaAligner.force_align <intent.interfaces.giza.GizaAligner.force_align>`
+means extending the stored vocabularies, rewriting every snt/cooc file, and
+starting mgiza on the full set of previously trained tables, every time it is
+called. This is the bulk of the time for small enrich jobs.
+
+Here, instead, :py:class:`GizaModel` reads the stored vocabularies and the
+lexical (``t3.final``) and alignment (``a3.final``) tables once, and aligns
+each sentence pair with the Model 2 Viterbi alignment: each target word is
+aligned to the source word (or NULL) that maximizes ``t(f|e) * a(i|j,l)``.
+A :py:class:`GizaServer` keeps the models loaded and answers batches of
+sentence pairs sent over a :py:mod:`multiprocessing.connection`, so that
+the load is only paid once, by the server.
+
+Start a server with ``intent/scripts/alignment/giza_server.py``, set
+``giza_server`` in ``env.conf``, and run ``enrich --giza-server`` to use it.
+As these alignments aren't the same as resuming mgiza, the server is only
+used when asked for, as the :py:const:`ALIGNER_GIZA_SERVER <intent.igt.consts.ALIGNER_GIZA_SERVER>`
+aligner, never as a stand-in for mgiza. Requests are
+unpickled, so the server only accepts clients that present the shared
+``giza_server_authkey``, and by default only listens on the loopback interface.
+
+@author: rgeorgi
+"""
+
+# Built-in imports -------------------------------------------------------------
+import logging
+from collections import defaultdict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from threading import Thread, Lock
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment
+from intent.interfaces.giza import GizaFiles, GizaAlignmentException
+from intent.utils.env import c, giza_server, giza_server_authkey
+
+GIZA_SERVER_LOG = logging.getLogger('GIZA_SERVER')
+
+# The names the stored models are served under.
+G_T_MODEL = 'g_t'
+G_T_REVERSE_MODEL = 'g_t_reverse'
+
+# Where the server listens unless told otherwise.
+DEFAULT_ADDRESS = ('127.0.0.1', 5099)
+
+# Probability given to word pairs (and alignment positions)
+# that the stored tables have nothing for.
+PROB_SMOOTH = 1e-7
+
+
+class GizaServerException(Exception): pass
+
+
+def read_vcb(path):
+    """
+    Read a GIZA .vcb file into a dict of word to id.
+    """
+    ids = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word_id, word, count = line.split()
+            ids[word] = int(word_id)
+    return ids
+
+
+class GizaModel(object):
+
+    def __init__(self, e_ids, f_ids, t_table, a_table):
+        """
+        :param e_ids: Source vocab, mapping each word to its id.
+        :type e_ids: dict
+        :param f_ids: Target vocab, mapping each word to its id.
+        :type f_ids: dict
+        :param t_table: Mapping of target id to a dict of source id to ``t(f|e)``.
+        :type t_table: dict
+        :param a_table: Mapping of ``(i, j, l)`` to ``a(i|j,l)``.
+        :type a_table: dict
+        """
+        self.e_ids = e_ids
+        self.f_ids = f_ids
+        self.t_table = t_table
+        self.a_table = a_table
+
+    @classmethod
+    def load(cls, prefix, name='aln'):
+        """
+        Load the model that :py:meth:`GizaAligner.train <intent.interfaces.giza.GizaAligner.train>`
+        saved under ``prefix``.
+        """
+        gf = GizaFiles(prefix, None, None, name=name)
+
+        t_table = defaultdict(dict)
+        with open(gf.t, 'r', encoding='utf-8') as f:
+            for line in f:
+                e_id, f_id, prob = line.split()
+                t_table[int(f_id)][int(e_id)] = float(prob)
+
+        # The alignment table is stored "compact", with the target
+        # sentence length always given as 100, so it is ignored here.
+        a_table = {}
+        with open(gf.a, 'r', encoding='utf-8') as f:
+            for line in f:
+                i, j, l, m, prob = line.split()
+                a_table[(int(i), int(j), int(l))] = float(prob)
+
+        return cls(read_vcb(gf.e_vcb), read_vcb(gf.f_vcb), dict(t_table), a_table)
+
+    def align(self, e_snt, f_snt):
+        """
+        Return the Viterbi alignment of a single sentence pair.
+
+        :type e_snt: list[str]
+        :type f_snt: list[str]
+        :returns: (source index, target index) alignment, indexed from one.
+        :rtype: Alignment
+        """
+        # The NULL word has id 0.
+        e_ids = [0] + [self.e_ids.get(e) for e in e_snt]
+        l = len(e_snt)
+        uniform = 1 / (l + 1)
+
+        a = Alignment()
+        for j, f in enumerate(f_snt, start=1):
+            # Leave words the model knows nothing about unaligned,
+            # rather than aligning them by position alone.
+            t_probs = self.t_table.get(self.f_ids.get(f))
+            if not t_probs:
+                continue
+
+            best_i, best_p = 0, -1
+            for i, e_id in enumerate(e_ids):
+                p = t_probs.get(e_id, PROB_SMOOTH) * self.a_table.get((i, j, l), uniform)
+                if p > best_p:
+                    best_i, best_p = i, p
+
+            if best_i > 0:
+                a.add((best_i, j))
+        return a
+
+    def force_align(self, e_snts, f_snts):
+        """
+        Align each pair of sentences, as :py:meth:`GizaAligner.force_align <intent.interfaces.giza.GizaAligner.force_align>`
+        does.
+
+        :type e_snts: list[list[str]]
+        :type f_snts: list[list[str]]
+        :rtype: list[Alignment]
+        """
+        if len(e_snts) != len(f_snts):
+            raise GizaAlignmentException('Unequal numbers of sentences to align. %d vs. %d' % (len(e_snts), len(f_snts)))
+        return [self.align(e_snt, f_snt) for e_snt, f_snt in zip(e_snts, f_snts)]
+
+
+def load_models():
+    """
+    Load the stored gloss-to-translation models from the paths in ``env.conf``,
+    skipping any that haven't been trained.
+
+    :rtype: dict
+    """
+    models = {}
+    for name, key in [(G_T_MODEL, 'g_t_dir'), (G_T_REVERSE_MODEL, 'g_t_reverse_dir')]:
+        try:
+            models[name] = GizaModel.load(c.getpath(key))
+        except FileNotFoundError as fnfe:
+            GIZA_SERVER_LOG.warning('Not serving "{}": {}'.format(name, fnfe))
+    return models
+
+
+def encode_authkey(authkey):
+    return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+
+
+def parse_address(address):
+    """
+    Turn a ``host:port`` string into a ``(host, port)`` tuple.
+    """
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+class GizaServer(object):
+    """
+    Serve alignments from a set of loaded models. Each request is a
+    (model name, e sentences, f sentences) tuple, and is answered with
+    a (success, result) tuple, where the result is either a list of the
+    alignments' pairs, or the error message.
+    """
+
+    def __init__(self, models, address=DEFAULT_ADDRESS, authkey=None):
+        """
+        :param models: Mapping of model name to :py:class:`GizaModel`.
+        :param address: ``(host, port)`` to listen on. Use port 0 to pick a free port.
+        :param authkey: Shared key that clients must present. Required, as
+                        anyone who can connect can have the server unpickle
+                        whatever they send.
+        :type authkey: str
+        """
+        if not authkey:
+            raise GizaServerException('The GIZA server needs an authkey (giza_server_authkey in env.conf).')
+
+        self.models = models
+        self.listener = Listener(address, authkey=encode_authkey(authkey))
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def serve_forever(self):
+        GIZA_SERVER_LOG.info('Serving alignments on {}:{}'.format(*self.address))
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                # The listener has been closed.
+                break
+            except Exception as e:
+                # Such as a client with the wrong key.
+                GIZA_SERVER_LOG.warning('Refused connection: {}'.format(e))
+                continue
+
+            Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    name, e_snts, f_snts = conn.recv()
+                except EOFError:
+                    break
+
+                try:
+                    alns = self.models[name].force_align(e_snts, f_snts)
+                except KeyError:
+                    conn.send((False, 'No model named "{}"'.format(name)))
+                except Exception as e:
+                    conn.send((False, str(e)))
+                else:
+                    conn.send((True, [sorted(a) for a in alns]))
+
+    def close(self):
+        self.listener.close()
+
+
+class GizaClient(object):
+    """
+    Connection to a :py:class:`GizaServer`.
+    """
+
+    def __init__(self, address, authkey=None):
+        self.conn = Client(address, authkey=encode_authkey(authkey))
+
+        # The aligners for each direction may be used from different threads.
+        self.lock = Lock()
+
+    def force_align(self, name, e_snts, f_snts):
+        """
+        :param name: Name of the model to align with.
+        :rtype: list[Alignment]
+        """
+        with self.lock:
+            self.conn.send((name, e_snts, f_snts))
+            ok, result = self.conn.recv()
+        if not ok:
+            raise GizaAlignmentException(result)
+        return [Alignment(pairs) for pairs in result]
+
+    def aligner(self, name):
+        """
+        Return an object with the same ``force_align(e_snts, f_snts)``
+        method as a :py:class:`GizaAligner <intent.interfaces.giza.GizaAligner>`,
+        that uses the named model on the server.
+        """
+        return RemoteAligner(self, name)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RemoteAligner(object):
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def force_align(self, e_snts, f_snts):
+        return self.client.force_align(self.name, e_snts, f_snts)
+
+
+def connect_giza_server():
+    """
+    Connect to the server set as ``giza_server`` in ``env.conf``.
+
+    :raises GizaAlignmentException: If no server (or key) is set, or it can't be reached.
+    :rtype: GizaClient
+    """
+    if not giza_server or not giza_server_authkey:
+        raise GizaAlignmentException('Aligning with the GIZA server needs giza_server and giza_server_authkey set in env.conf.')
+
+    try:
+        return GizaClient(parse_address(giza_server), authkey=giza_server_authkey)
+    except (OSError, AuthenticationError) as e:
+        raise GizaAlignmentException('Unable to reach the GIZA server at "{}": {}'.format(giza_server, e))
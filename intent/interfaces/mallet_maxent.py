@@ -6,7 +6,9 @@ Created on Apr 4, 2014
 # Built-in imports -------------------------------------------------------------
 import os, sys, re
 import subprocess as sub
+import unittest
 from io import StringIO
+from threading import Thread
 
 # Set up logging
 import logging
@@ -19,7 +21,7 @@ from intent.utils.dicts import TwoLevelCountDict
 import intent.igt.grams
 from intent.utils.systematizing import piperunner, ProcessCommunicator
 from intent.utils.token import GoldTagPOSToken
-from intent.utils.env import c, mallet, mallet_bin
+from intent.utils.env import c, mallet, mallet_bin, classifier
 
 
 class ClassifierException(Exception): pass
@@ -27,6 +29,75 @@ class ClassifierException(Exception): pass
 class EmptyStringException(ClassifierException): pass
 
 
+def feature_string(s, **kwargs):
+    """
+    Render the classifier features for a (gloss) string, in the same
+    format that the classifier was trained on.
+
+    :param s: String to classify
+    :type s: str
+    :rtype: str
+    """
+    token = GoldTagPOSToken(s, goldlabel="NONE")
+
+    sio = StringIO()
+
+    # TODO: Fix the behavior of write_gram such that we can just do it from a string.
+    intent.igt.grams.write_gram(token, type='classifier', output=sio, **kwargs)
+
+    c_token = sio.getvalue().strip()
+    sio.close()
+    return c_token
+
+
+def read_classifier_info(lines):
+    """
+    Read the feature weights from the output of MALLET's
+    ``classifier2info`` for a MaxEnt model.
+
+    The bias for each class is given as the feature ``<default>``.
+
+    :param lines: The lines of output, as strings.
+    :returns: Generator of (class, feature, weight) tuples.
+    """
+    cur_class = None
+
+    # Go through and pick out what the features are for
+    for content in lines:
+
+        class_change = re.search('FEATURES FOR CLASS (.*)', content)
+        # Set the current class if the section changes
+        if class_change:
+            cur_class = class_change.group(1).strip()
+            continue
+
+        if not content.strip():
+            continue
+
+        # Otherwise, let's catalog the features.
+        word, prob = content.split()
+        yield cur_class, word, float(prob)
+
+def classifier_info(model):
+    """
+    Run ``classifier2info`` on a trained MaxEnt model and return its
+    feature weights.
+
+    :param model: Path to the trained classifier.
+    :returns: Generator of (class, feature, weight) tuples.
+    """
+    info_bin = os.path.join(os.path.join(mallet, 'bin'), 'classifier2info')
+    info_p = sub.Popen([info_bin, '--classifier', model],
+                        stdout=sub.PIPE, stdin=sub.PIPE, stderr=sub.PIPE)
+
+    lines = (line.decode(encoding='utf-8') for line in info_p.stdout)
+    for weight in read_classifier_info(lines):
+        yield weight
+
+    if info_p.wait() != 0:
+        raise ClassifierException('Could not read the weights for classifier "{}".'.format(model))
+
+
 class MalletMaxent(object):
 
     def __init__(self, model):
@@ -46,27 +117,10 @@ class MalletMaxent(object):
         """
         Print the feature statistics for the given model. (Assumes MaxEnt)
         """
-        mallet = c['mallet']
-        info_bin = os.path.join(os.path.join(mallet, 'bin'), 'classifier2info')
-        info_p = sub.Popen([info_bin, '--classifier', self._model],
-                            stdout=sub.PIPE, stdin=sub.PIPE, stderr=sub.PIPE)
-
-        cur_class = None
         feats = TwoLevelCountDict()
 
-        # Go through and pick out what the features are for
-        for line in info_p.stdout:
-            content = line.decode(encoding='utf-8')
-
-            class_change = re.search('FEATURES FOR CLASS (.*)', content)
-            # Set the current class if the section changes
-            if class_change:
-                cur_class = class_change.group(1).strip()
-                continue
-
-            # Otherwise, let's catalog the features.
-            word, prob = content.split()
-            feats.add(cur_class, word, float(prob))
+        for cur_class, word, prob in classifier_info(self._model):
+            feats.add(cur_class, word, prob)
 
         # Now, print some info
         for cur_class in feats.keys():
@@ -82,18 +136,7 @@ class MalletMaxent(object):
         :param s: String to classify
         :type s: str
         """
-
-        token = GoldTagPOSToken(s, goldlabel="NONE")
-
-        sio = StringIO()
-
-        # TODO: Fix the behavior of write_gram such that we can just do it from a string.
-        intent.igt.grams.write_gram(token, type='classifier', output=sio, **kwargs)
-
-        c_token = sio.getvalue().strip()
-        sio.close()
-
-        result = self.classify(c_token)
+        result = self.classify(feature_string(s, **kwargs))
         return result
 
     def classify_token(self, token, **kwargs):
@@ -116,33 +159,78 @@ class MalletMaxent(object):
         if not string.strip():
             raise EmptyStringException('Empty string passed into classify.')
         else:
-            self.c.stdin.write(bytes(string+'\r\n\r\n', encoding='utf-8'))
+            self._write(string)
+            self.c.stdin.flush()
+
+            return self._read_result()
+
+    def classify_many(self, feature_lines):
+        """
+        Classify a number of feature lines (as produced by :py:func:`feature_string`)
+        at once.
+
+        All of the lines are written to the classifier from a separate thread
+        while the results are read back here, so that the classifier is never left
+        waiting on a round trip through the pipe. The results come back in the order
+        the lines were written, and so are matched back to them by position.
+
+        :type feature_lines: list[str]
+        :rtype: list[Classification]
+        """
+        for string in feature_lines:
+            if not string.strip():
+                raise EmptyStringException('Empty string passed into classify_many.')
+
+        def feed():
+            for string in feature_lines:
+                self._write(string)
             self.c.stdin.flush()
 
+        feeder = Thread(target=feed)
+        feeder.daemon = True
+        feeder.start()
+
+        results = [self._read_result() for string in feature_lines]
+        feeder.join()
+
+        return results
+
+    def _write(self, string):
+        # Each instance is followed by a blank line, which pushes the classifier
+        # into writing out the result for the instance before it. That blank
+        # line gets a (meaningless) line of output of its own, which is skipped
+        # when reading the next result.
+        self.c.stdin.write(bytes(string+'\r\n\r\n', encoding='utf-8'))
+
+    def _read_result(self):
+        """
+        Read the classifier output for the next instance written.
 
-            if self._first:
-                content = self.c.stdout.readline()
-                self._first = False
-            else:
-                self.c.stdout.readline()
-                content = self.c.stdout.readline()
+        :rtype: Classification
+        """
+        if self._first:
+            content = self.c.stdout.readline()
+            self._first = False
+        else:
+            self.c.stdout.readline()
+            content = self.c.stdout.readline()
 
-            content = content.decode(encoding='utf-8')
+        content = content.decode(encoding='utf-8')
 
-            content = content.split()
-            ret_c = Classification(gold=content[0])
+        content = content.split()
+        ret_c = Classification(gold=content[0])
 
 
-            #print(string, content)
+        #print(string, content)
 
-            for i in range(1, len(content), 2):
+        for i in range(1, len(content), 2):
 
-                tag = content[i]
+            tag = content[i]
 
-                prob = float(content[i+1])
-                ret_c[tag] = float(prob)
+            prob = float(content[i+1])
+            ret_c[tag] = float(prob)
 
-            return ret_c
+        return ret_c
 
 
     def close(self):
@@ -196,6 +284,21 @@ def svmlight_to_vectors(txt):
 
 
 
+class TestClassifyMany(unittest.TestCase):
+
+    def runTest(self, result=None):
+        m = MalletMaxent(classifier)
+
+        grams = ['dog', 'run-PST', 'the', 'house-ACC']
+        features = [feature_string(g) for g in grams]
+
+        results = m.classify_many(features)
+        self.assertEqual(len(results), len(grams))
+
+        for g, r in zip(grams, results):
+            self.assertEqual(r.largest(), m.classify_string(g).largest())
+
+        self.assertRaises(EmptyStringException, m.classify_many, features + [''])
 
 if __name__ == '__main__':
     mc = MalletMaxent('/Users/rgeorgi/Dropbox/code/eclipse/dissertation/data/all/xigt_grams.maxent')
@@ -10,6 +10,7 @@ import logging
 # Internal Imports -------------------------------------------------------------
 import os
 from glob import glob
+from threading import Thread
 
 from intent.utils.env import parser_dir, parser_model, java_bin
 from intent.utils.systematizing import ProcessCommunicator
@@ -75,6 +76,52 @@ class StanfordParser(object):
         self.p.stdin.write(bytes(string+'\n', encoding='utf-8'))
         self.p.stdin.flush()
 
+        return self._read_result()
+
+    def parse_batch(self, sentences):
+        """
+        Parse a number of (tokenized) sentences at once.
+
+        Rather than waiting on the parse of each sentence before sending the
+        next, all the sentences are written to the parser from a separate
+        thread while the results are read back here, so that the parser is
+        never left waiting on a round trip through the pipe. The parser produces
+        exactly one result per input line, in order, so the results are matched
+        back to their sentences by position.
+
+        Empty sentences are not sent to the parser (it would not produce
+        any output for them), and get an empty :py:class:`ParseResult`.
+
+        :param sentences: List of sentences to parse
+        :type sentences: list[str]
+        :rtype: list[ParseResult]
+        """
+        # Newlines delimit the sentences, so make sure there are none within them.
+        sentences = [' '.join(s.split()) for s in sentences]
+        to_parse = [s for s in sentences if s]
+
+        def feed():
+            for s in to_parse:
+                self.p.stdin.write(bytes(s+'\n', encoding='utf-8'))
+            self.p.stdin.flush()
+
+        feeder = Thread(target=feed)
+        feeder.daemon = True
+        feeder.start()
+
+        parsed = iter([self._read_result() for s in to_parse])
+        feeder.join()
+
+        return [next(parsed) if s else ParseResult() for s in sentences]
+
+    def _read_result(self):
+        """
+        Read the output for a single sentence from the parser: the phrase
+        structure tree, followed by a blank line, followed by the typed
+        dependencies, followed by another blank line.
+
+        :rtype: ParseResult
+        """
         result = ParseResult()
         string = ''
 
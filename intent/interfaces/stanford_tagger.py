@@ -6,7 +6,9 @@ Created on Oct 22, 2013
 
 import os, sys, re, unittest, time, logging
 import subprocess as sub
+from collections import deque
 from optparse import OptionParser
+from threading import Event, Lock
 
 # Internal Imports -------------------------------------------------------------
 from intent.utils.argutils import require_opt, existsfile
@@ -30,8 +32,16 @@ class CriticalTaggerError(TaggerError): pass
 # Set up the stanford tagger to run via stdin.
 #===============================================================================
 
-def stanford_stdout_handler(output, queue):
-    queue.append(tokenize_string(output, tokenizer=tag_tokenizer))
+class TagRequest(object):
+    """
+    A single sentence that has been sent to the tagger, and
+    the slot in which its result will be placed.
+    """
+    def __init__(self, result=None):
+        self.result = result
+        self.done = Event()
+        if result is not None:
+            self.done.set()
 
 def stanford_stderr_handler(line):
 
@@ -68,7 +78,10 @@ class StanfordPOSTagger(object):
             TAG_LOG.critical('Path to the stanford tagger .jar file is not defined.')
             raise TaggerError('Path to the stanford tagger .jar file is not defined.')
 
-        self.results_queue = []
+        # Sentences that have been sent to the tagger, but not yet
+        # tagged, in the order they were sent.
+        self.pending = deque()
+        self.write_lock = Lock()
 
         self.st = ProcessCommunicator([java_bin,
                                        '-cp', tagger_jar,
@@ -77,31 +90,84 @@ class StanfordPOSTagger(object):
                                        '-sentenceDelimiter', 'newline',
                                        '-tokenize', 'false'],
                                       stderr_func=stanford_stderr_handler,
-                                      stdout_func=lambda x: stanford_stdout_handler(x, self.results_queue),
+                                      stdout_func=self._stdout_handler,
                                       blocking=False)
 
+    def _stdout_handler(self, output):
+        """
+        The tagger writes exactly one line for each (non-empty) line it is
+        given, in order, so each line of output belongs to the oldest request
+        still waiting on a result.
+        """
+        if not output:
+            return
+        elif not self.pending:
+            STANFORD_LOG.warn('Unexpected output from the tagger: "{}"'.format(output))
+            return
+
+        req = self.pending.popleft()
+        req.result = tokenize_string(output, tokenizer=tag_tokenizer)
+        req.done.set()
 
     def tag_tokenization(self, tokenization, **kwargs):
         return self.tag(tokenization.text(), **kwargs)
 
     def tag(self, s, **kwargs):
+        return self.tag_many([s], **kwargs)[0]
 
-        # Lowercase if asked for
-        if kwargs.get('lowercase', True):
-            s = s.lower()
-
-        self.st.stdin.write(bytes(s+'\r\n', encoding='utf-8'))
-
-        # Try to flush out to stdin
-        try:
-            self.st.stdin.flush()
-        except BrokenPipeError:
-            raise CriticalTaggerError('The Stanford parser unexpectedly quit.')
-
-        while len(self.results_queue) == 0:
-            time.sleep(0.25)
+    def tag_many(self, strings, **kwargs):
+        """
+        Tag a list of sentences, sending them all to the tagger before waiting
+        on any of the results.
 
-        return self.results_queue.pop()
+        :param strings: The sentences to tag, with their tokens separated by whitespace.
+        :type strings: list[str]
+        :returns: The tagged tokens for each sentence, in the same order as ``strings``.
+        """
+        requests = []
+
+        # Appending the requests and writing them out must happen together,
+        # so that the order of the pending requests matches the order of the
+        # tagger's output even if multiple threads are tagging at once.
+        with self.write_lock:
+            for s in strings:
+
+                # Each sentence must be exactly one (non-empty) line, otherwise
+                # the results will not line up with their requests.
+                s = ' '.join(s.split())
+
+                # Lowercase if asked for
+                if kwargs.get('lowercase', True):
+                    s = s.lower()
+
+                if not s:
+                    requests.append(TagRequest(result=[]))
+                    continue
+
+                req = TagRequest()
+                self.pending.append(req)
+                requests.append(req)
+
+                try:
+                    self.st.stdin.write(bytes(s+'\r\n', encoding='utf-8'))
+                except BrokenPipeError:
+                    raise CriticalTaggerError('The Stanford tagger unexpectedly quit.')
+
+            # Try to flush out to stdin
+            try:
+                self.st.stdin.flush()
+            except BrokenPipeError:
+                raise CriticalTaggerError('The Stanford tagger unexpectedly quit.')
+
+        return [self._wait(req) for req in requests]
+
+    def _wait(self, req):
+        # Rather than blocking forever, check every so often that
+        # the tagger hasn't gone away in the meantime.
+        while not req.done.wait(timeout=5):
+            if self.st.poll() is not None:
+                raise CriticalTaggerError('The Stanford tagger unexpectedly quit.')
+        return req.result
 
     def close(self):
         self.st.kill()
@@ -221,3 +287,14 @@ class TestPeriodTagging(unittest.TestCase):
         self.assertEqual(len(second_tagged), 10)
 
 
+
+class TestTagMany(unittest.TestCase):
+
+    def runTest(self, result=None):
+        p = StanfordPOSTagger(tagger_model)
+
+        sents = ['this is a test', '', 'and a second\nsentence', 'with a period . in the middle']
+        tagged = p.tag_many(sents)
+
+        self.assertEqual([len(t) for t in tagged], [4, 0, 4, 6])
+        self.assertEqual(tagged[3], p.tag(sents[3]))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3.4
+'''
+Keep the saved gloss-translation GIZA models loaded, and force-align
+batches of sentences sent by "enrich --align giza --giza-server" (see giza_server in env.conf).
+'''
+
+import logging
+logging.basicConfig(level=logging.INFO)
+
+import argparse
+from intent.interfaces.giza_server import GizaServer, load_models, parse_address, GIZA_SERVER_LOG, DEFAULT_ADDRESS
+from intent.utils.env import giza_server, giza_server_authkey
+
+
+def serve(address, authkey):
+    GIZA_SERVER_LOG.info('Loading models...')
+    server = GizaServer(load_models(), address, authkey)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    # Listen on the loopback interface unless another address is given,
+    # keeping the port clients have been set up to use.
+    port = parse_address(giza_server)[1] if giza_server else DEFAULT_ADDRESS[1]
+
+    p.add_argument('-a', '--address', help='host:port to listen on (default: loopback only)', type=parse_address,
+                   default=(DEFAULT_ADDRESS[0], port))
+    p.add_argument('-k', '--authkey', help='Key that clients must present (required)', default=giza_server_authkey)
+
+    args = p.parse_args()
+
+    if not args.authkey:
+        p.error('An authkey is required, either with --authkey or as giza_server_authkey in env.conf.')
+
+    serve(args.address, args.authkey)
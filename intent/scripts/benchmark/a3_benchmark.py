@@ -0,0 +1,135 @@
+"""
+Compare merging GIZA's A3 part files, and reading the alignments back
+from the merged file, by streaming through them (as :py:mod:`intent.interfaces.giza`
+now does) against reading whole files into memory and popping lines off
+the front of the list (as it used to).
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import os
+import re
+import shutil
+import tempfile
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment
+from intent.interfaces.giza import read_a3, merge_a3, a3_alignments
+from intent.scripts.benchmark.utils import measure, report
+from intent.utils.env import proj_root
+
+# The A3 file that synthetic ones are built from.
+SOURCE_FILE = os.path.join(proj_root, 'data/glosses/gloss_trans.A3.final')
+
+
+def synthetic_parts(prefix, num_pairs, num_parts=4, chunk_size=500):
+    """
+    Write ``num_pairs`` sentence pairs, repeated from :py:data:`SOURCE_FILE` and
+    renumbered, across ``num_parts`` part files. The pairs are dealt out to
+    the parts in chunks, as GIZA's threads do.
+
+    :returns: The paths of the part files.
+    """
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        pairs = [lines for num, lines in read_a3(f)]
+
+    paths = ['{}.A3.final.part{:03d}'.format(prefix, i) for i in range(num_parts)]
+    parts = [open(path, 'w', encoding='utf-8') for path in paths]
+
+    for i in range(num_pairs):
+        header, tgt_line, aln_line = pairs[i % len(pairs)]
+        header = re.sub(r'pair \([0-9]+\)', 'pair ({})'.format(i+1), header)
+        parts[(i // chunk_size) % num_parts].writelines([header, tgt_line, aln_line])
+
+    for part in parts:
+        part.close()
+    return paths
+
+
+def readlines_merge(paths, merged_path):
+    """
+    The previous merge: read each part in whole, and collect the
+    pairs in a dict to sort.
+    """
+    sentdict = {}
+
+    for filename in paths:
+        f = open(filename, 'r', encoding='utf-8')
+        lines = f.readlines()
+        f.close()
+
+        while lines:
+            line1 = lines.pop(0)
+            line2 = lines.pop(0)
+            line3 = lines.pop(0)
+
+            num = int(re.search('pair \(([0-9]+)\)', line1).group(1))
+            sentdict[num] = (line1,line2,line3)
+
+    merged_f = open(merged_path, 'w', encoding='utf-8')
+    for key in sorted(sentdict.keys()):
+        for line in sentdict[key]:
+            merged_f.write(line)
+
+    merged_f.close()
+
+
+def readlines_alignments(path):
+    """
+    The previous reader of the merged file.
+    """
+    a_f = open(path, 'r', encoding='utf-8')
+    lines = a_f.readlines()
+    a_f.close()
+
+    alignments = []
+
+    while lines:
+        top_str = lines.pop(0)
+        tgt_str = lines.pop(0)
+        aln_str = lines.pop(0)
+
+        a = Alignment.from_giza(aln_str)
+        alignments.append(a)
+
+    return alignments
+
+
+def count_alignments(path):
+    # Consume the alignments one at a time, as a streaming caller would.
+    return sum(1 for a in a3_alignments(path))
+
+
+def a3_benchmark(num_pairs=100000, num_parts=4, repeat=1):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        paths = synthetic_parts(os.path.join(tmpdir, 'aln'), num_pairs, num_parts)
+        old_merged = os.path.join(tmpdir, 'old.A3.final.merged')
+        new_merged = os.path.join(tmpdir, 'new.A3.final.merged')
+
+        print('{} pairs in {} parts'.format(num_pairs, num_parts))
+
+        result, seconds, peak = measure(readlines_merge, paths, old_merged, repeat=repeat)
+        report('readlines merge', seconds, peak)
+        result, seconds, peak = measure(merge_a3, paths, new_merged, repeat=repeat)
+        report('streaming merge', seconds, peak)
+
+        with open(old_merged, 'rb') as old_f, open(new_merged, 'rb') as new_f:
+            assert old_f.read() == new_f.read(), 'Merged files differ'
+
+        result, seconds, peak = measure(readlines_alignments, new_merged, repeat=repeat)
+        report('readlines alignments', seconds, peak)
+        result, seconds, peak = measure(count_alignments, new_merged, repeat=repeat)
+        report('streaming alignments', seconds, peak)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-n', '--num-pairs', type=int, default=100000, help='Number of sentence pairs in the synthetic A3 file.')
+    p.add_argument('-p', '--num-parts', type=int, default=4, help='Number of part files to split them across.')
+    p.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    a3_benchmark(args.num_pairs, args.num_parts, args.repeat)
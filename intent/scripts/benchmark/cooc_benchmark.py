@@ -0,0 +1,167 @@
+"""
+Compare building GIZA's .snt, .vcb and .cooc files with :py:meth:`GizaFiles.txt_to_snt <intent.interfaces.giza.GizaFiles.txt_to_snt>`
+against the previous version, which added the co-occurrences one pair at a
+time, looked words up through ``VocabWord.__eq__``, and wrote and flushed
+the .snt files a line at a time.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import filecmp
+import os
+import re
+import shutil
+import tempfile
+from collections import defaultdict
+
+# Internal imports -------------------------------------------------------------
+from intent.interfaces.giza import GizaFiles, Vocab, VocabWord, read_a3
+from intent.scripts.benchmark.utils import measure, report
+from intent.utils.env import proj_root
+
+# The A3 file that the sentence pairs are taken from.
+SOURCE_FILE = os.path.join(proj_root, 'data/glosses/gloss_trans.A3.final')
+
+
+def synthetic_text(e_path, f_path, num_sents):
+    """
+    Write ``num_sents`` parallel sentences to ``e_path`` and ``f_path``, repeated
+    from the source and target sides of :py:data:`SOURCE_FILE`. Each repetition
+    marks its words, so that the vocabulary keeps growing.
+    """
+    with open(SOURCE_FILE, 'r', encoding='utf-8') as f:
+        pairs = []
+        for num, (header, tgt_line, aln_line) in read_a3(f):
+            src_words = re.findall(r'(\S+) \(\{.*?\}\)', aln_line)[1:]
+            pairs.append((src_words, tgt_line.split()))
+
+    with open(e_path, 'w', encoding='utf-8') as e_f, open(f_path, 'w', encoding='utf-8') as f_f:
+        for i in range(num_sents):
+            src_words, tgt_words = pairs[i % len(pairs)]
+            rep = i // len(pairs)
+            e_f.write(' '.join('{}_{}'.format(w, rep) for w in src_words) + '\n')
+            f_f.write(' '.join('{}_{}'.format(w, rep) for w in tgt_words) + '\n')
+
+
+class DictVocab(Vocab):
+    """
+    The vocab lookups as they were, through VocabWord.__eq__.
+    """
+    def add(self, word, count=1):
+        if word in self._counts:
+            self._counts[word] += count
+            return self._words[word].id
+        else:
+            self._i += 1
+            vw = VocabWord(word, self._i)
+            self._counts[vw] = count
+            self._words[vw] = vw
+            return self._i
+
+    def get_id(self, w, add=False):
+        if self._words.get(w):
+            if add:
+                return self.add(w)
+            else:
+                return self._words.get(w).id
+        elif not add:
+            raise Exception
+        else:
+            return self.add(w)
+
+    def items(self):
+        return sorted(self._counts.items(), key=lambda i: i[0].id)
+
+
+def dump_dict_cooc(cooc, path):
+    f = open(path, 'w', encoding='utf-8')
+    for key in sorted(cooc.keys()):
+        for entry in sorted(cooc[key]):
+            f.write('%d %d\n' % (key, entry))
+    f.close()
+
+
+def pairwise_txt_to_snt(gf):
+    """
+    The previous body of txt_to_snt.
+    """
+    ev, fv = DictVocab(), DictVocab()
+
+    ef_lines = open(gf.e, encoding='utf-8').readlines()
+    ff_lines = open(gf.f, encoding='utf-8').readlines()
+
+    ef_file = open(gf.ef_snt, 'w', encoding='utf-8')
+    fe_file = open(gf.fe_snt, 'w', encoding='utf-8')
+
+    ef_cooc = defaultdict(set)
+    fe_cooc = defaultdict(set)
+
+    for e_line, f_line in zip(ef_lines, ff_lines):
+        if (not e_line.strip()) or (not f_line.strip()):
+            continue
+
+        e_snt_ids = ev.string_to_ids(e_line, add=True)
+        f_snt_ids = fv.string_to_ids(f_line, add=True)
+
+        e_snt = ev.string_to_snt(e_line)
+        f_snt = fv.string_to_snt(f_line)
+
+        for e_id in e_snt_ids:
+            fe_cooc[0].add(e_id)
+            for f_id in f_snt_ids:
+                ef_cooc[e_id].add(f_id)
+
+        for f_id in f_snt_ids:
+            ef_cooc[0].add(f_id)
+            for e_id in e_snt_ids:
+                fe_cooc[f_id].add(e_id)
+
+        ef_file.write('1\n')
+        ef_file.write('%s\n%s\n' % (e_snt, f_snt))
+        fe_file.write('1\n')
+        fe_file.write('%s\n%s\n' % (f_snt, e_snt))
+        ef_file.flush(), fe_file.flush()
+
+    ef_file.close(), fe_file.close()
+
+    ev.dump(gf.e_vcb)
+    fv.dump(gf.f_vcb)
+
+    dump_dict_cooc(ef_cooc, gf.ef_cooc)
+    dump_dict_cooc(fe_cooc, gf.fe_cooc)
+
+
+def bulk_txt_to_snt(gf):
+    gf.txt_to_snt(ev=Vocab(), fv=Vocab())
+
+
+def cooc_benchmark(num_sents=100000, repeat=1):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        e_path = os.path.join(tmpdir, 'e.txt')
+        f_path = os.path.join(tmpdir, 'f.txt')
+        synthetic_text(e_path, f_path, num_sents)
+
+        old_gf = GizaFiles(os.path.join(tmpdir, 'old'), e_path, f_path)
+        new_gf = GizaFiles(os.path.join(tmpdir, 'new'), e_path, f_path)
+
+        print('{} sentence pairs'.format(num_sents))
+
+        result, seconds, peak = measure(pairwise_txt_to_snt, old_gf, repeat=repeat)
+        report('pair-at-a-time', seconds, peak)
+        result, seconds, peak = measure(bulk_txt_to_snt, new_gf, repeat=repeat)
+        report('bulk updates', seconds, peak)
+
+        for attr in ['ef_snt', 'fe_snt', 'e_vcb', 'f_vcb', 'ef_cooc', 'fe_cooc']:
+            assert filecmp.cmp(getattr(old_gf, attr), getattr(new_gf, attr), shallow=False), '{} files differ'.format(attr)
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-n', '--num-sents', type=int, default=100000, help='Number of sentence pairs to convert.')
+    p.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    cooc_benchmark(args.num_sents, args.repeat)
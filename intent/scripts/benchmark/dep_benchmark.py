@@ -0,0 +1,115 @@
+"""
+Compare building dependency trees with :py:func:`build_dep_edges <intent.trees.build_dep_edges>`,
+which indexes the edges by head and attaches each one once, against the
+previous version, which rescanned the remaining edges and searched the tree
+for each one's head on every attachment.
+
+The trees are random dependency parses of long sentences, written out in the
+Stanford format and read back with :py:meth:`DepTree.fromstring <intent.trees.DepTree.fromstring>`.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import random
+import re
+
+# Internal imports -------------------------------------------------------------
+from intent.trees import DepTree, DepEdge, Terminal, TreeError, build_dep_edges
+from intent.scripts.benchmark.utils import measure, report
+
+
+def scanning_dep_edges(string):
+    """
+    Reading the Stanford-format edges as it was, checking
+    for duplicates by searching the list of edges.
+    """
+    edges = []
+    for name, pair in re.findall('(\S+)\((.*?\d+)\'*\)', string):
+        head, child = re.split(',\s', pair)
+
+        w_i_re = re.compile('(\S+)-(\d+)')
+
+        head  = Terminal(*re.search(w_i_re, head).groups())
+        child = Terminal(*re.search(w_i_re, child).groups())
+
+        edge = DepEdge(head, child, type=name)
+        if edge in edges:
+            continue
+
+        edges.append(edge)
+    return edges
+
+
+def scanning_build_dep_edges(edges):
+    """
+    The dependency tree construction as it was.
+    """
+    dt = DepTree.root()
+    while edges:
+
+        edge_found = False
+
+        for i, edge in enumerate(edges):
+            node = dt.find_terminal(edge.head)
+
+            if node is not None:
+                node.append(DepTree(edge.dep.label, [], word_index=edge.dep.index, type=edge.type, pos=edge.pos))
+                del edges[i]
+                edge_found = True
+                break
+
+        if not edge_found:
+            edge_children = [(e.dep.label,e.dep.index) for e in edges]
+            raise TreeError("Dependency Tree could not be built, edges remain: {}.".format(edge_children))
+
+    return dt
+
+
+def random_parse(length, rand):
+    """
+    Return a random dependency parse of a sentence of ``length`` words
+    in the Stanford format, with the edges in the order of the dependents.
+    """
+    order = list(range(1, length+1))
+    rand.shuffle(order)
+
+    heads = {order[0]: 0}
+    for i, dep in enumerate(order[1:], start=1):
+        heads[dep] = order[rand.randrange(i)]
+
+    label = lambda i: 'ROOT' if i == 0 else 'w{}'.format(i)
+    return ' '.join('{}({}-{}, {}-{})'.format('root' if heads[dep] == 0 else 'dep',
+                                              label(heads[dep]), heads[dep], label(dep), dep)
+                    for dep in range(1, length+1))
+
+
+def read_all(strings):
+    return [DepTree.fromstring(s) for s in strings]
+
+
+def scanning_read_all(strings):
+    return [scanning_build_dep_edges(scanning_dep_edges(s)) for s in strings]
+
+
+def dep_benchmark(lengths, num_sents=20, repeat=3, seed=1):
+    rand = random.Random(seed)
+    for length in lengths:
+        strings = [random_parse(length, rand) for i in range(num_sents)]
+
+        old_trees, seconds, peak = measure(scanning_read_all, strings, repeat=repeat)
+        report('scanning ({} sentences of {} words)'.format(num_sents, length), seconds, peak)
+
+        new_trees, seconds, peak = measure(read_all, strings, repeat=repeat)
+        report('indexed ({} sentences of {} words)'.format(num_sents, length), seconds, peak)
+
+        assert [str(t) for t in old_trees] == [str(t) for t in new_trees], 'The trees differ.'
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-l', '--lengths', type=int, nargs='+', default=[25, 50, 100, 200], help='Sentence lengths to build trees for.')
+    p.add_argument('-n', '--num-sents', type=int, default=20, help='Number of sentences of each length.')
+    p.add_argument('-r', '--repeat', type=int, default=3, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    dep_benchmark(args.lengths, args.num_sents, args.repeat)
@@ -0,0 +1,122 @@
+"""
+Compare the heuristic gloss/translation aligner, which builds a match table
+for each method once per sentence pair (see :py:func:`match_table <intent.alignment.Alignment.match_table>`),
+against the previous version, which called the comparison function (and so
+the stemmer) on every pair of tokens on each pass.
+
+The aligners are run on the gloss and translation lines in ``data/glosses``,
+and :py:meth:`RGCorpus.heur_align` is timed on a synthetic corpus, serially
+and (with ``--jobs``) in worker processes.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment, heur_alignments, exact_match, stem_match, gram_match
+from intent.igt.rgxigt import RGCorpus
+from intent.scripts.benchmark.hmm_benchmark import read_sents, GLOSS_DIR
+from intent.scripts.benchmark.utils import synthetic_corpus, measure, report
+
+
+def pairwise_iteration(gloss_tokens, trans_tokens, aln, comparison_function, multiple_matches=True, iteration=1):
+    """
+    The heuristic iteration as it was, comparing every pair of tokens.
+    """
+    gloss_indices = range(0, len(gloss_tokens))
+    trans_indices = range(0, len(trans_tokens))
+
+    if iteration > 1:
+        gloss_indices = gloss_indices[::-1]
+        trans_indices = trans_indices[::-1]
+
+    aligned_gloss_w = set(aln.all_src())
+    aligned_trans_w = set(aln.all_tgt())
+
+    for gloss_i in gloss_indices:
+        if gloss_i+1 in aligned_gloss_w:
+            continue
+
+        gloss_w = gloss_tokens[gloss_i]
+        for trans_i in trans_indices:
+            trans_w = trans_tokens[trans_i]
+
+            if iteration == 1 and trans_i+1 in aligned_trans_w:
+                continue
+
+            if comparison_function(gloss_w, trans_w):
+                aln.add((gloss_i+1, trans_i+1))
+                aligned_gloss_w.add(gloss_i+1)
+                aligned_trans_w.add(trans_i+1)
+                if iteration == 1: break
+
+    if iteration == 2 or not multiple_matches:
+        return aln
+    else:
+        return pairwise_iteration(gloss_tokens, trans_tokens, aln, comparison_function, multiple_matches, iteration+1)
+
+
+def pairwise_heur_alignments(gloss_tokens, trans_tokens, multiple_matches=None):
+    gloss_tokens = [str(g).lower() for g in gloss_tokens]
+    trans_tokens = [str(t).lower() for t in trans_tokens]
+
+    aln = Alignment()
+    for method in [exact_match, stem_match, gram_match]:
+        aln = pairwise_iteration(gloss_tokens, trans_tokens, aln, method, multiple_matches=multiple_matches)
+    return aln
+
+
+def align_all(func, g_sents, t_sents, **kwargs):
+    return [func(g_sent, t_sent, **kwargs) for g_sent, t_sent in zip(g_sents, t_sents)]
+
+
+def heur_benchmark(num_sents=2000, num_instances=2000, repeat=1, jobs=1):
+    g_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_gloss.txt'))[:num_sents]
+    t_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_trans.txt'))[:num_sents]
+
+    print('{} sentence pairs'.format(len(g_sents)))
+
+    for multiple_matches in [None, True]:
+        old_alns, seconds, peak = measure(align_all, pairwise_heur_alignments, g_sents, t_sents,
+                                          multiple_matches=multiple_matches, repeat=repeat)
+        report('pairwise (multiple matches={})'.format(multiple_matches), seconds, peak)
+
+        new_alns, seconds, peak = measure(align_all, heur_alignments, g_sents, t_sents,
+                                          no_multiples=multiple_matches, repeat=repeat)
+        report('match tables (multiple matches={})'.format(multiple_matches), seconds, peak)
+
+        assert old_alns == new_alns, 'The alignments differ.'
+
+    # Time the whole corpus-level alignment, which
+    # includes reading the tokens and adding the tiers.
+    logging.disable(logging.CRITICAL)
+    tmpdir = tempfile.mkdtemp()
+    path = synthetic_corpus(os.path.join(tmpdir, 'corpus.xml'), num_instances)
+    try:
+        xc = RGCorpus.load(path, basic_processing=True)
+        result, seconds, peak = measure(xc.heur_align, repeat=repeat)
+        report('RGCorpus.heur_align ({} instances)'.format(len(xc)), seconds, peak)
+
+        # CPU time would only count the parent process, so take the wall time.
+        if jobs > 1:
+            start = time.perf_counter()
+            xc.heur_align(jobs=jobs)
+            report('RGCorpus.heur_align ({} processes)'.format(jobs), time.perf_counter() - start, 0)
+    finally:
+        os.unlink(path)
+        os.rmdir(tmpdir)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-n', '--num-sents', type=int, default=2000, help='Number of sentence pairs to align.')
+    p.add_argument('-i', '--num-instances', type=int, default=2000, help='Number of instances in the synthetic corpus.')
+    p.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs to take the best of.')
+    p.add_argument('-j', '--jobs', type=int, default=1, help='Also time RGCorpus.heur_align with this many processes.')
+
+    args = p.parse_args()
+
+    heur_benchmark(args.num_sents, args.num_instances, args.repeat, args.jobs)
@@ -0,0 +1,85 @@
+"""
+Compare the in-process :py:class:`HMMAligner <intent.alignment.HMMAligner.HMMAligner>`
+with mgiza, for speed and alignment error rate (AER), on the gloss and
+translation lines in ``data/glosses``.
+
+Both aligners are trained on all of ``lower_gloss.txt`` and ``lower_trans.txt``,
+and scored on their first sentences, which are the lowercased sentences of
+``naacl_gloss.txt`` and ``naacl_trans.txt``, hand-aligned in ``naacl_aln.txt``.
+
+If mgiza isn't installed, the scores are taken from the stored mgiza
+output for the same data, ``lower.A3.final``, and it isn't timed.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import ast
+import os
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment
+from intent.alignment.HMMAligner import HMMAligner
+from intent.eval.AlignEval import AlignEval
+from intent.interfaces.giza import GizaAligner, read_a3
+from intent.scripts.benchmark.utils import measure, report
+from intent.utils.env import proj_root, mgiza
+
+GLOSS_DIR = os.path.join(proj_root, 'data/glosses')
+
+# The training files aren't utf-8.
+TRAIN_ENCODING = 'latin-1'
+
+
+def read_sents(path):
+    with open(path, 'r', encoding=TRAIN_ENCODING) as f:
+        return [line.split() for line in f]
+
+
+def read_gold(path):
+    """
+    Read the gold (gloss, trans) alignments, leaving out the
+    words aligned to NULL (index zero).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Alignment(ast.literal_eval('[{}]'.format(line))).nonzeros() for line in f]
+
+
+def stored_giza(path):
+    with open(path, 'r', encoding=TRAIN_ENCODING) as f:
+        return [Alignment.from_giza(aln_line) for num, (header, tgt_line, aln_line) in read_a3(f)]
+
+
+def report_aer(label, alignments, gold):
+    ae = AlignEval(alignments[:len(gold)], gold)
+    print('{:<40s} AER {:.3f}  P {:.3f}  R {:.3f}'.format(label, ae.aer(), ae.precision(), ae.recall()))
+
+
+def hmm_benchmark(num_sents=None, repeat=1):
+    g_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_gloss.txt'))[:num_sents]
+    t_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_trans.txt'))[:num_sents]
+    gold = read_gold(os.path.join(GLOSS_DIR, 'naacl_aln.txt'))
+
+    print('{} sentence pairs, {} gold-aligned'.format(len(g_sents), len(gold)))
+
+    hmm_alns, seconds, peak = measure(lambda: HMMAligner().train_align(g_sents, t_sents), repeat=repeat)
+    report('hmm', seconds, peak)
+
+    if mgiza and os.path.exists(mgiza):
+        giza_alns, seconds, peak = measure(GizaAligner().temp_train, g_sents, t_sents, repeat=repeat)
+        report('mgiza', seconds, peak)
+        giza_label = 'mgiza'
+    else:
+        giza_alns = stored_giza(os.path.join(GLOSS_DIR, 'lower.A3.final'))
+        giza_label = 'mgiza (stored, all sentences)'
+
+    report_aer('hmm', hmm_alns, gold)
+    report_aer(giza_label, giza_alns, gold)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-n', '--num-sents', type=int, default=None, help='Number of sentence pairs to train on (default: all).')
+    p.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    hmm_benchmark(args.num_sents, args.repeat)
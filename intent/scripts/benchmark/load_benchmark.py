@@ -0,0 +1,64 @@
+"""
+Compare the time and memory taken to load a large XIGT-XML file by decoding
+it straight to the RG* classes (as :py:meth:`RGCorpus.load` does), against
+decoding to the plain xigt classes and converting them afterward (as it
+used to).
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import os
+import tempfile
+
+# Internal imports -------------------------------------------------------------
+from intent.igt.rgxigt import RGCorpus, RGIgt, RGTier, RGItem
+from intent.scripts.benchmark.utils import synthetic_corpus, measure, report
+
+from xigt.codecs import xigtxml
+
+
+def convert_load(path):
+    """
+    The previous load path: decode to xigt objects, then make a
+    second pass to switch their classes and number the items.
+    """
+    xc = xigtxml.load(path)
+    xc.__class__ = RGCorpus
+
+    for igt in xc.igts:
+        igt.__class__ = RGIgt
+
+        for tier in igt.tiers:
+            tier.__class__ = RGTier
+
+            for i, item in enumerate(tier):
+                item.__class__ = RGItem
+                item.index = i+1
+    return xc
+
+
+def load_benchmark(path=None, num_instances=2000):
+    tmpdir = None
+    if path is None:
+        tmpdir = tempfile.mkdtemp()
+        path = synthetic_corpus(os.path.join(tmpdir, 'corpus.xml'), num_instances)
+
+    try:
+        for label, func in [('xigt load + convert', convert_load),
+                            ('RGCorpus.load', RGCorpus.load)]:
+            xc, seconds, peak = measure(func, path)
+            report('{} ({} instances)'.format(label, len(xc)), seconds, peak)
+            del xc
+    finally:
+        if tmpdir is not None:
+            os.unlink(path)
+            os.rmdir(tmpdir)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-f', '--file', help='XIGT-XML file to load. A synthetic corpus is generated if not given.')
+    p.add_argument('-n', '--num-instances', type=int, default=2000, help='Number of instances in the synthetic corpus.')
+
+    args = p.parse_args()
+
+    load_benchmark(args.file, args.num_instances)
@@ -0,0 +1,295 @@
+"""
+Compare phrase structure projection with :py:func:`project_ps <intent.trees.project_ps>`,
+where the nodes cache their spans and :py:func:`reorder_tree <intent.trees.reorder_tree>`
+fixes each node in a single walk over the tree, against the previous version,
+which recomputed every span from the leaves, copied the whole tree on each
+step of the reordering and started again from the root after every change.
+
+The trees are random parses of long sentences, projected through random
+alignments (with unaligned and multiply-aligned words) to a target sentence
+of similar length. Copying the trees that projection starts from, with
+:py:func:`copy_tree <intent.trees.copy_tree>`, is also compared against the
+previous, recursive copies.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import itertools
+import logging
+import random
+from collections import defaultdict
+from copy import copy
+
+from nltk.tree import Tree
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment
+from intent.igt.rgxigt import RGWordTier
+from intent.trees import IdTree, DepTree, Terminal, PS_LOG, DEPSTR_PTB, aln_indices, get_ancestors, fix_tree_parents, project_ps
+from intent.scripts.benchmark.tree_benchmark import random_ps, random_ds
+from intent.scripts.benchmark.utils import measure, report
+
+
+class ScanIdTree(IdTree):
+    """
+    The span and preterminal checks as they were, working
+    them out from the leaves every time they are asked for.
+    """
+    def span(self, caller=None):
+        if len(self) == 1:
+            return self[0].span(caller=caller)
+        else:
+            subspans = sorted(s.span(caller=caller) for s in self)
+            return (subspans[0][0], subspans[-1][1])
+
+    def is_preterminal(self):
+        return self.height() == 2
+
+    def copy(self):
+        return ScanIdTree(self.label(), [t.copy() for t in self], id=self.id)
+
+
+def recursive_copy(t):
+    """
+    Copying a phrase structure or dependency tree as it was.
+    """
+    if isinstance(t, DepTree):
+        return DepTree(copy(t.label()), [recursive_copy(c) for c in t], id=copy(t.id), type=copy(t.type), word_index=copy(t.word_index))
+    else:
+        return IdTree(t.label(), [recursive_copy(c) if isinstance(c, Tree) else c.copy() for c in t], id=copy(t.id))
+
+
+def copy_all(func, trees):
+    return [func(t) for t in trees]
+
+
+def copy_benchmark(trees, label, repeat):
+    old_copies, seconds, peak = measure(copy_all, recursive_copy, trees, repeat=repeat)
+    report('recursive copy ({})'.format(label), seconds, peak)
+
+    new_copies, seconds, peak = measure(copy_all, lambda t: t.copy(), trees, repeat=repeat)
+    report('copy_tree ({})'.format(label), seconds, peak)
+
+    assert [str(t) for t in old_copies] == [str(t) for t in new_copies], 'The copies differ.'
+
+
+def scanning_contains(t, s_sup, s_sub):
+    PS_LOG.debug('{} {} is contained in {} {}'.format(s_sub.label(), s_sub.span(), s_sup.label(), s_sup.span()))
+    PS_LOG.debug('PROMOTE: {} [{}] into {}'.format(s_sub, s_sub.span(), s_sup))
+    s_sup.promote()
+    PS_LOG.debug('TREE is now: {}'.format(t.root()))
+
+
+def scanning_reorder_tree(t, prev_t_list):
+    """
+    The reordering as it was.
+    """
+    was_changed = False
+
+    prev_t = t.root().copy()
+
+    if not t.is_preterminal():
+        if len(t) == 1:
+            PS_LOG.debug('Unary node {}[{}], skipping.'.format(t.label(), t.span(caller=t)))
+
+        elif len(t) >= 2:
+            for s_i, s_j in itertools.combinations(t, 2):
+                a_i, b_i = s_i.span()
+                a_j, b_j = s_j.span()
+
+                s_i._parent = t
+                s_j._parent = t
+
+                s_i_idx = s_i.parent_index()
+                s_j_idx = s_j.parent_index()
+
+                if b_i < a_j:
+                    pass
+
+                elif a_i > a_j and b_i > b_j:
+                    PS_LOG.debug('SWAPPING: {:>30} [{},{}] for [{},{}] {:<12}'.format(str(s_i), a_i, b_i, a_j, b_j, str(s_j)))
+                    t.swap(s_i_idx, s_j_idx)
+                    was_changed = 'SWAPPED'
+                    break
+
+                elif a_i < a_j and b_i > b_j:
+                    scanning_contains(t, s_i, s_j)
+                    was_changed = 'PROMOTED {} into {}'.format(s_j, s_i)
+                    break
+
+                elif a_i > a_j and b_i < b_j:
+                    was_changed = 'T WAS: {} \n\n PROMOTED {} into {}'.format(t.root(), s_i.lprint(), s_j.lprint())
+                    scanning_contains(t, s_j, s_i)
+                    was_changed += ' to become\n\n {}'.format(t.root())
+                    break
+
+                elif a_i == a_j and b_i == b_j:
+                    PS_LOG.debug('Merging: {:>30} [{},{}] with [{},{}] {:<}'.format(str(s_i), a_i, b_i, a_j, b_j, str(s_j)))
+                    t.merge(s_i_idx, s_j_idx)
+                    PS_LOG.debug('New tree:\n{}'.format(t.root()))
+                    was_changed = 'MERGED {} and {}'.format(s_i, s_j)
+                    break
+
+                else:
+                    for s in [s_i, s_j]:
+                        if not s.is_preterminal():
+                            PS_LOG.debug('Promoting {}[{}]'.format(s_i.label(), s_i.span()))
+                            s.promote()
+
+                    PS_LOG.debug('New tree:\n{}'.format(t.root()))
+                    was_changed = 'Promoted {} and {}'.format(s_i, s_j)
+                    break
+
+        if was_changed:
+            prev_t_list.append(prev_t)
+            scanning_reorder_tree(t.root(), prev_t_list)
+            return t.root()
+
+        else:
+            for child in t:
+                changed_tree = scanning_reorder_tree(child, prev_t_list)
+                if changed_tree:
+                    ct = scanning_reorder_tree(changed_tree, prev_t_list)
+                    return ct
+
+
+def scanning_project_ps(src_t, tgt_w, aln):
+    """
+    The phrase structure projection as it was (on :py:class:`ScanIdTree` trees).
+    """
+    PS_LOG.debug('             ' + aln_indices(src_t.leaves()))
+    PS_LOG.debug('SRC        : %s' % ' '.join([str(l) for l in src_t.leaves()]))
+
+    src_is = [x[0] for x in aln]
+
+    tgt_t = src_t.copy()
+
+    nodes_to_delete = []
+    for pt in tgt_t.preterminals():
+        if pt.span()[0] not in src_is:
+            nodes_to_delete.append(pt)
+
+    for n in nodes_to_delete:
+        n.delete()
+
+    aln = sorted(aln, key=lambda x: x[1])
+
+    nodes_to_replace = defaultdict(list)
+    for src_i, tgt_i in aln:
+        tgt_n = tgt_t.find_index(src_i)
+        w = tgt_w.get_index(tgt_i)
+        tgt_n_copy = tgt_n.copy()
+        tgt_n_copy[0] = Terminal(w.value(), index=w.index)
+        nodes_to_replace[tgt_n].append(tgt_n_copy)
+
+    for n, preterms in nodes_to_replace.items():
+        p = n.parent()
+        i = n.parent_index()
+        n.delete(propagate=False)
+        for preterm in preterms:
+            PS_LOG.debug('Inserting {2:>14s} {3:<4s} in place of {0:<4s} {1:<14s}'.format('"%s"'%n, '[%s]'%str(n.span()), '[%d]'%preterm[0].index, '"%s"' % preterm[0].label))
+            p.insert(i, preterm)
+
+    PS_LOG.debug('Current Tree: {}'.format(tgt_t.pformat(margin=100)))
+
+    scanning_reorder_tree(tgt_t, [])
+    fix_tree_parents(tgt_t)
+
+    aligned_indices = [t for s, t in aln]
+    unaligned_tgt_words = [w for w in tgt_w if w.index not in aligned_indices]
+
+    for unaligned_tgt_word in unaligned_tgt_words:
+        left_words = [w for w in tgt_w if w.index < unaligned_tgt_word.index and w.index in aligned_indices]
+        right_words= [w for w in tgt_w if w.index > unaligned_tgt_word.index and w.index in aligned_indices]
+
+        left_word = None if not left_words else left_words[-1]
+        right_word= None if not right_words else right_words[0]
+
+        t = ScanIdTree('UNK', [Terminal(unaligned_tgt_word.value(), index=unaligned_tgt_word.index)], id=unaligned_tgt_word.id)
+
+        if not left_word:
+            left_n = tgt_t.find_start_index(right_word.index)
+            left_n.parent().insert_by_span(t)
+        elif not right_word:
+            right_n = tgt_t.find_stop_index(left_word.index)
+            right_n.parent().insert_by_span(t)
+        else:
+            left_n = tgt_t.find_stop_index(left_word.index)
+            right_n= tgt_t.find_start_index(right_word.index)
+
+            lowest_ancestor = None
+            for left_ancestor in get_ancestors(left_n):
+                for right_ancestor in get_ancestors(right_n):
+                    if left_ancestor == right_ancestor:
+                        lowest_ancestor = left_ancestor
+                        break
+                if lowest_ancestor is not None:
+                    break
+
+            lowest_ancestor.insert_by_span(t)
+
+    return tgt_t
+
+
+def random_projection(length, rand):
+    """
+    Return a random parse of a sentence of ``length`` words, along with a
+    target sentence and an alignment to it, in which words may be
+    unaligned, aligned to more than one word, or cross one another.
+    """
+    def build(start, stop):
+        if stop - start == 1:
+            return '({} e{})'.format(rand.choice(['NN', 'VB', 'DT', 'JJ', 'IN']), start)
+        num_children = rand.randint(2, min(3, stop-start))
+        bounds = [start] + sorted(rand.sample(range(start+1, stop), num_children-1)) + [stop]
+        children = ' '.join(build(a, b) for a, b in zip(bounds, bounds[1:]))
+        return '({} {})'.format(rand.choice(['NP', 'VP', 'PP', 'S']), children)
+
+    tgt_len = max(1, length + rand.randint(-length//5, length//5))
+
+    # Mostly monotone, with some local reordering.
+    aln = set()
+    for src_i in range(1, length+1):
+        for i in range(rand.choice([0, 1, 1, 1, 1, 2])):
+            tgt_i = round(src_i * tgt_len / length) + rand.randint(-2, 2)
+            aln.add((src_i, min(max(tgt_i, 1), tgt_len)))
+
+    tgt_w = ' '.join('f{}'.format(i+1) for i in range(tgt_len))
+    return '(ROOT {})'.format(build(1, length+1)), tgt_w, aln
+
+
+def project_all(func, tree_class, inputs):
+    return [func(tree_class.fromstring(t), RGWordTier.from_string(w), Alignment(aln)) for t, w, aln in inputs]
+
+
+def project_benchmark(lengths, num_sents=10, repeat=1, seed=1):
+    # Project as it would normally be run, with the debug messages off.
+    PS_LOG.setLevel(logging.INFO)
+
+    rand = random.Random(seed)
+    for length in lengths:
+        inputs = [random_projection(length, rand) for i in range(num_sents)]
+
+        old_trees, seconds, peak = measure(project_all, scanning_project_ps, ScanIdTree, inputs, repeat=repeat)
+        report('previous ({} sentences of {} words)'.format(num_sents, length), seconds, peak)
+
+        new_trees, seconds, peak = measure(project_all, project_ps, IdTree, inputs, repeat=repeat)
+        report('cached spans ({} sentences of {} words)'.format(num_sents, length), seconds, peak)
+
+        assert [str(t) for t in old_trees] == [str(t) for t in new_trees], 'The projected trees differ.'
+
+        copies = 100 * num_sents
+        copy_benchmark([IdTree.fromstring(random_ps(length, rand)) for i in range(copies)],
+                       '{} phrase structures of {} words'.format(copies, length), repeat)
+        copy_benchmark([DepTree.fromstring(random_ds(length, rand), stype=DEPSTR_PTB) for i in range(copies)],
+                       '{} dependency trees of {} words'.format(copies, length), repeat)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-l', '--lengths', type=int, nargs='+', default=[10, 25, 50], help='Sentence lengths to project trees for.')
+    p.add_argument('-n', '--num-sents', type=int, default=10, help='Number of sentences of each length.')
+    p.add_argument('-r', '--repeat', type=int, default=1, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    project_benchmark(args.lengths, args.num_sents, args.repeat)
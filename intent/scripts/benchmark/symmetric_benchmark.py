@@ -0,0 +1,92 @@
+"""
+Compare symmetrizing alignments with :py:class:`Alignment <intent.alignment.Alignment.Alignment>`,
+which looks up sources and targets through a table and grows the diagonal on
+bit matrices, against the previous version, which scanned the whole alignment
+for each lookup.
+
+The alignments combined are the stored mgiza alignments for the gloss and
+translation lines in ``data/glosses`` (``lower.A3.final``) and the heuristic
+alignments of the same lines.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import os
+
+# Internal imports -------------------------------------------------------------
+from intent.alignment.Alignment import Alignment, heur_alignments
+from intent.scripts.benchmark.hmm_benchmark import read_sents, stored_giza, GLOSS_DIR
+from intent.scripts.benchmark.utils import measure, report
+
+
+class ScanAlignment(set):
+    """
+    The alignment lookups and symmetrization as they were.
+    """
+    def contains_src(self, key):
+        return bool([src for src,tgt in self if src==key])
+
+    def contains_tgt(self, key):
+        return bool([tgt for src,tgt in self if tgt==key])
+
+    def grow_diag(self, a2):
+        intersection = ScanAlignment(self.intersection(a2))
+        union        = ScanAlignment(self.union(a2))
+
+        new_alignment = ScanAlignment(intersection)
+
+        neighboring = ((-1,0),(0,-1),(1,0),(0,1),(-1,-1),(-1,1),(1,-1),(1,1))
+
+        for e, f in intersection:
+            for e_offset, f_offset in neighboring:
+                e_new = e + e_offset
+                f_new = f + f_offset
+
+                if ((not intersection.contains_src(e_new) or
+                     not intersection.contains_tgt(f_new)) and
+                    (e_new, f_new) in union):
+
+                    new_alignment.add((e_new, f_new))
+
+        return new_alignment
+
+    def final(self, a):
+        new_alignment = ScanAlignment(self)
+        for e, f in a:
+            if (not self.contains_src(e) or not self.contains_tgt(f)):
+                new_alignment.add((e,f))
+        return new_alignment
+
+    def grow_diag_final(self, a2):
+        return self.grow_diag(a2).final(self).final(a2)
+
+
+def symmetrize_all(cls, forward, reverse):
+    return [cls(f).grow_diag_final(cls(r)) for f, r in zip(forward, reverse)]
+
+
+def symmetric_benchmark(num_sents=None, repeat=3):
+    g_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_gloss.txt'))[:num_sents]
+    t_sents = read_sents(os.path.join(GLOSS_DIR, 'lower_trans.txt'))[:num_sents]
+
+    giza_alns = stored_giza(os.path.join(GLOSS_DIR, 'lower.A3.final'))[:len(g_sents)]
+    heur_alns = [heur_alignments(g, t) for g, t in zip(g_sents, t_sents)]
+
+    print('{} alignment pairs, {} links'.format(len(giza_alns), sum(len(a) for a in giza_alns + heur_alns)))
+
+    old_alns, seconds, peak = measure(symmetrize_all, ScanAlignment, giza_alns, heur_alns, repeat=repeat)
+    report('scanning grow_diag_final', seconds, peak)
+
+    new_alns, seconds, peak = measure(symmetrize_all, Alignment, giza_alns, heur_alns, repeat=repeat)
+    report('bit matrix grow_diag_final', seconds, peak)
+
+    assert old_alns == new_alns, 'The alignments differ.'
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-n', '--num-sents', type=int, default=None, help='Number of sentence pairs to use (default: all).')
+    p.add_argument('-r', '--repeat', type=int, default=3, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    symmetric_benchmark(args.num_sents, args.repeat)
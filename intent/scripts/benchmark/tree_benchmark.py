@@ -0,0 +1,170 @@
+"""
+Compare reading bracketed trees with :py:func:`read_bracketed <intent.trees.read_bracketed>`,
+which reads them in one pass with a stack and assigns the IDs as it goes,
+against the previous readers: NLTK's parser followed by another walk over the
+tree to assign the IDs and leaf indices for phrase structures, and the recursive
+``paren_level_contents`` for PTB-like dependency trees.
+
+The trees are random parses of long sentences, written out the way the
+Stanford parser and :py:meth:`DepTree.__str__ <intent.trees.DepTree.__str__>` write them, and one
+deeply nested (right-branching) parse of each kind.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import random
+import re
+
+# Internal imports -------------------------------------------------------------
+from nltk.tree import ParentedTree
+
+from intent.trees import IdTree, DepTree, Terminal, DEPSTR_PTB
+from intent.scripts.benchmark.utils import measure, report
+
+
+def nltk_fromstring(tree_string):
+    """
+    Reading a phrase structure as it was.
+    """
+    t = ParentedTree.fromstring.__func__(IdTree, tree_string, read_leaf=lambda x: Terminal(x))
+    t.assign_ids()
+    for i, leaf in enumerate(t.leaves()):
+        leaf.index = i+1
+    return t
+
+
+class Count():
+    def __init__(self):
+        self._i = 0
+
+    def inc(self, n=1):
+        self._i += n
+
+    def val(self):
+        return self._i
+
+
+def paren_level_contents(string, f=lambda x, y: [x,y], i=None):
+    """
+    The recursive bracket reader, as it was.
+    """
+    if i is None:
+        i = Count()
+
+    content = ''
+    children = []
+    escaped = False
+
+    while i.val() < len(string):
+        char = string[i.val()]
+        i.inc()
+
+        if escaped == True:
+            content += char
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == ')':
+            return f(content.strip(), children)
+        elif char == '(':
+            children.append(paren_level_contents(string, f=f, i=i))
+        else:
+            content += char
+
+    return children
+
+
+def paren_dep_fromstring(tree_string):
+    """
+    Reading a PTB-like dependency tree as it was.
+    """
+    def parse_label(s, children):
+        label, index, type = re.search('(.*?)(?:\[([0-9]+)\])(-.*?)?', s).groups()
+        return DepTree(label, children, type=type, word_index=int(index))
+
+    return paren_level_contents(tree_string, f=parse_label)[0]
+
+
+def random_ps(length, rand):
+    """
+    Return a random binary-branching parse of a sentence of ``length`` words.
+    """
+    def build(start, stop):
+        if stop - start == 1:
+            return '({} w{})'.format(rand.choice(['NN', 'VB', 'DT', 'JJ', 'IN']), start)
+        split = rand.randrange(start+1, stop)
+        return '({} {} {})'.format(rand.choice(['NP', 'VP', 'PP', 'S']), build(start, split), build(split, stop))
+
+    return '(ROOT {})'.format(build(1, length+1))
+
+
+def random_ds(length, rand):
+    """
+    Return a random dependency parse of a sentence of ``length`` words, in the PTB-like format.
+    """
+    order = list(range(1, length+1))
+    rand.shuffle(order)
+
+    children = {0: [order[0]]}
+    for i, dep in enumerate(order[1:], start=1):
+        children.setdefault(order[rand.randrange(i)], []).append(dep)
+
+    def build(i):
+        label = 'ROOT' if i == 0 else 'w{}'.format(i)
+        return '({}[{}]{})'.format(label, i, ''.join(' ' + build(c) for c in sorted(children.get(i, []))))
+
+    return build(0)
+
+
+def deep_ps(depth):
+    return '(ROOT {}{})'.format(''.join('(S (NN w{}) '.format(i+1) for i in range(depth)), ')' * depth)
+
+
+def deep_ds(depth):
+    return '(ROOT[0] {}{})'.format(''.join('(w{0}[{0}] '.format(i+1) for i in range(depth)), ')' * depth)
+
+
+def read_all(func, strings):
+    return [func(s) for s in strings]
+
+
+def compare(label, old_func, new_func, strings, repeat):
+    try:
+        old_trees, seconds, peak = measure(read_all, old_func, strings, repeat=repeat)
+        report('{} (previous)'.format(label), seconds, peak)
+    except (RecursionError, ValueError) as e:
+        # (Newer versions of NLTK refuse to read deeply nested trees at all.)
+        old_trees = None
+        print('{} (previous): {}'.format(label, e))
+
+    new_trees, seconds, peak = measure(read_all, new_func, strings, repeat=repeat)
+    report('{} (read_bracketed)'.format(label), seconds, peak)
+
+    if old_trees is not None:
+        assert old_trees == new_trees, 'The trees differ.'
+
+
+def tree_benchmark(lengths, num_sents=100, depth=5000, repeat=3, seed=1):
+    rand = random.Random(seed)
+    dep_fromstring = lambda s: DepTree.fromstring(s, stype=DEPSTR_PTB)
+
+    for length in lengths:
+        ps = [random_ps(length, rand) for i in range(num_sents)]
+        compare('{} phrase structures of {} words'.format(num_sents, length), nltk_fromstring, IdTree.fromstring, ps, repeat)
+
+        ds = [random_ds(length, rand) for i in range(num_sents)]
+        compare('{} dependency trees of {} words'.format(num_sents, length), paren_dep_fromstring, dep_fromstring, ds, repeat)
+
+    compare('phrase structure {} deep'.format(depth), nltk_fromstring, IdTree.fromstring, [deep_ps(depth)], 1)
+    compare('dependency tree {} deep'.format(depth), paren_dep_fromstring, dep_fromstring, [deep_ds(depth)], 1)
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('-l', '--lengths', type=int, nargs='+', default=[25, 100, 400], help='Sentence lengths to read trees for.')
+    p.add_argument('-n', '--num-sents', type=int, default=100, help='Number of sentences of each length.')
+    p.add_argument('-d', '--depth', type=int, default=5000, help='Depth of the deeply nested tree.')
+    p.add_argument('-r', '--repeat', type=int, default=3, help='Number of timed runs to take the best of.')
+
+    args = p.parse_args()
+
+    tree_benchmark(args.lengths, args.num_sents, args.depth, args.repeat)
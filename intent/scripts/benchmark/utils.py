@@ -0,0 +1,74 @@
+"""
+Shared helpers for the benchmarking scripts.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import gc
+import os
+import time
+import tracemalloc
+
+# Internal imports -------------------------------------------------------------
+from intent.igt.codecs.xigtstream import XigtStreamWriter
+from intent.utils.env import testfile_dir
+
+from xigt.codecs import xigtxml
+
+# The test files that synthetic corpora are built from.
+SOURCE_FILES = ['ctn-train-tests.xml', 'kor-ex.xml', 'xigt-projection-tests.xml']
+
+
+def synthetic_corpus(path, num_instances, sources=None):
+    """
+    Write a corpus of ``num_instances`` instances to ``path``, by repeating
+    the instances of the source files (renumbered, so that the ids stay unique).
+
+    :param sources: Paths to XIGT-XML files to draw the instances from.
+    """
+    if sources is None:
+        sources = [os.path.join(testfile_dir, 'xigt', f) for f in SOURCE_FILES]
+
+    insts = []
+    for source in sources:
+        insts.extend(xigtxml.load(source))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        with XigtStreamWriter(f, insts[0].corpus) as writer:
+            for i in range(num_instances):
+                inst = insts[i % len(insts)]
+                inst.id = 'i{}'.format(i+1)
+                writer.write(inst)
+
+    return path
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """
+    Run ``func`` ``repeat`` times, and return its result along with the
+    best CPU time taken, and the peak memory allocated (per :py:mod:`tracemalloc`)
+    during one further run. Tracing slows everything down a great deal, so the
+    timed runs are made without it.
+
+    :returns: (result, seconds, peak_bytes)
+    """
+    times = []
+    for i in range(repeat):
+        result = None
+        gc.collect()
+        start = time.process_time()
+        result = func(*args, **kwargs)
+        times.append(time.process_time() - start)
+
+    result = None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, min(times), peak
+
+
+def report(label, seconds, peak):
+    print('{:<40s} {:>8.2f}s {:>10.1f} MB'.format(label, seconds, peak / 2**20))
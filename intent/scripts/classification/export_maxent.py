@@ -0,0 +1,37 @@
+"""
+Export the weights of a trained MALLET MaxEnt gloss-line classifier, so
+that it can be scored in-process with :py:class:`intent.classify.maxent.MaxEntModel`.
+"""
+
+# Built-in imports -------------------------------------------------------------
+import argparse
+import os
+
+# Internal imports -------------------------------------------------------------
+from intent.classify.maxent import MaxEntModel, MODEL_EXT
+from intent.utils.argutils import existsfile
+
+
+def export_maxent(model_path, output=None):
+    """
+    :param model_path: Path to the trained MALLET classifier.
+    :param output: Destination for the weights. Defaults to the model path, with the weights extension.
+    """
+    if output is None:
+        output = os.path.splitext(model_path)[0] + MODEL_EXT
+
+    print("Reading classifier weights...", end=' ')
+    model = MaxEntModel.from_mallet(model_path)
+    print("Done.")
+
+    model.save(output)
+    print("{} features for {} classes written to {}".format(len(model.features), len(model.classes), output))
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('MODEL', help='Trained MALLET MaxEnt classifier', type=existsfile)
+    p.add_argument('-o', dest='output', help='Destination for the exported weights (should end in "{}")'.format(MODEL_EXT))
+
+    args = p.parse_args()
+
+    export_maxent(args.MODEL, args.output)
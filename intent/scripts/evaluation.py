@@ -10,6 +10,7 @@ from intent.igt.consts import GLOSS_WORD_ID, MANUAL_POS, INTENT_POS_PROJ, INTENT
 from intent.igt.igtutils import rgp
 from intent.igt.rgxigt import RGCorpus, RGIgt, strip_pos
 from intent.interfaces.mallet_maxent import MalletMaxent
+from intent.classify.maxent import load_classifier
 from intent.interfaces.stanford_tagger import StanfordPOSTagger
 from intent.utils.arg_consts import ALN_MANUAL
 from intent.utils.dicts import TwoLevelCountDict, POSEvalDict
@@ -39,10 +40,10 @@ def evaluate_intent(filelist, classifier_path=None, eval_alignment=None):
     # Set up the objects to run as "servers"
     # =============================================================================
 
-    classifier_obj = MalletMaxent(classifier)
+    classifier_obj = load_classifier(classifier)
 
     if classifier_path is not None:
-        classifier_obj = MalletMaxent(classifier_path)
+        classifier_obj = load_classifier(classifier_path)
 
 
     overall_prj = POSEvalDict()
@@ -6,23 +6,34 @@ Created on Mar 24, 2015
 
 import sys
 import logging
+from collections import deque
+from contextlib import ExitStack
+from itertools import islice
 from io import StringIO
+from multiprocessing.pool import Pool
 
-from intent.igt.consts import INTENT_POS_CLASS, INTENT_POS_PROJ, ODIN_GLOSS_TAG, ODIN_LANG_TAG, ODIN_TRANS_TAG
+from intent.igt.consts import INTENT_POS_CLASS, INTENT_POS_PROJ, ODIN_GLOSS_TAG, ODIN_LANG_TAG, ODIN_TRANS_TAG, \
+    ALIGNER_GIZA, ALIGNER_GIZA_SERVER
 from intent.igt.rgxigt import RGCorpus, GlossLangAlignException,\
     PhraseStructureProjectionException, ProjectionException,\
-    ProjectionTransGlossException, word_align, retrieve_normal_line, NoNormLineException, MultipleNormLineException
+    ProjectionTransGlossException, word_align, retrieve_normal_line, NoNormLineException, MultipleNormLineException, \
+    heur_align_igt, giza_t_g_alignments, incremental_giza_t_g_alignments, set_giza_t_g_alignment, parse_translation_lines, \
+    tag_trans_lines, classify_gloss_lines
+from intent.igt.codecs.xigtstream import XigtStreamWriter, encode_igt, corpus_open_tag
 from intent.utils.arg_consts import PARSE_VAR, PARSE_TRANS, POS_VAR, ALN_VAR, POS_LANG_CLASS, ALN_HEUR, \
-    ALN_GIZA, POS_LANG_PROJ, PARSE_LANG_PROJ, POS_TRANS, ALN_SYM_VAR, ALN_GIZA_HEUR
+    ALN_GIZA, POS_LANG_PROJ, PARSE_LANG_PROJ, POS_TRANS, ALN_SYM_VAR, ALN_GIZA_HEUR, STREAM_VAR, JOBS_VAR, ALN_INCREMENTAL_VAR, \
+    ALN_SERVER_VAR
 from intent.utils.env import c, posdict, odin_data, classifier
-from intent.utils.argutils import writefile
-from intent.interfaces.stanford_tagger import StanfordPOSTagger, TaggerError, CriticalTaggerError
+from intent.utils.argutils import writefile, replacing_writefile
+from intent.interfaces.stanford_tagger import StanfordPOSTagger, CriticalTaggerError
 from intent.interfaces.giza import GizaAlignmentException
 from intent.interfaces import mallet_maxent, stanford_parser
+from intent.classify.maxent import load_classifier
 
 
 # XIGT imports -----------------------------------------------------------------
 from xigt.codecs import xigtxml
+from xigt.consts import TRANSIENT
 from intent.scripts.igt.extract_lang import extract_lang
 from intent.scripts.conversion.odin_to_xigt import parse_text
 
@@ -53,6 +64,206 @@ def odin(**kwargs):
 # The ENRICH subcommand.
 #===============================================================================
 
+def _enrich_handles(pos_args, parse_args, class_path=classifier):
+    """
+    Start up the external tools (tagger, parser, classifier) that the
+    requested enrichments will need.
+
+    If any of the tools fails to start, the ones already started are closed
+    and the exception is raised.
+
+    :returns: A dict of the handles, suitable for passing as keyword arguments
+              to :py:func:`enrich_instance`.
+    :rtype: dict
+    """
+    ENRICH_LOG = logging.getLogger('ENRICH')
+    handles = {}
+
+    try:
+        #=======================================================================
+        # If the tagger is asked for, initialize it.
+        #=======================================================================
+        if POS_LANG_PROJ in pos_args or POS_TRANS in pos_args:
+            ENRICH_LOG.log(1000, 'Initializing tagger...')
+            tagger = c.getpath('stanford_tagger_trans')
+            handles['tagger'] = StanfordPOSTagger(tagger)
+
+        #=======================================================================
+        # Initialize the parser
+        #=======================================================================
+        if PARSE_TRANS in parse_args or PARSE_LANG_PROJ in parse_args:
+            ENRICH_LOG.log(1000, "Intializing English parser...")
+            handles['parser'] = stanford_parser.StanfordParser()
+
+        #=======================================================================
+        # If the classifier is asked for, initialize it...
+        #=======================================================================
+        if POS_LANG_CLASS in pos_args:
+            ENRICH_LOG.log(1000, "Initializing gloss-line classifier...")
+            handles['classifier'] = load_classifier(class_path)
+    except Exception:
+        _close_handles(handles)
+        raise
+
+    return handles
+
+def _close_handles(handles):
+    for handle in handles.values():
+        handle.close()
+
+def _start_handles(pos_args, parse_args, class_path=classifier):
+    """
+    Start the external tools with :py:func:`_enrich_handles`, exiting
+    if any of them can't be started.
+    """
+    try:
+        return _enrich_handles(pos_args, parse_args, class_path)
+    except Exception as e:
+        logging.getLogger('ENRICH').critical('Unable to start the enrichment tools: {}'.format(e))
+        sys.exit(2)
+
+
+def _has_lines(inst):
+    """
+    Check which of the normalized language, gloss and translation lines
+    are present (and non-empty) in an instance.
+
+    :returns: (has_lang, has_gloss, has_trans)
+    """
+    has_lines = []
+    for tag in [ODIN_LANG_TAG, ODIN_GLOSS_TAG, ODIN_TRANS_TAG]:
+        try:
+            n = retrieve_normal_line(inst, tag)
+            has_lines.append(bool(n is not None and n.value() is not None and n.value().strip()))
+        except (NoNormLineException, MultipleNormLineException) as e:
+            has_lines.append(False)
+    return tuple(has_lines)
+
+def _classify_gloss_lines(instances, classifier):
+    """
+    Classify the gloss lines of all the instances that have both
+    a gloss and language line in one pass through the classifier.
+    """
+    classify_gloss_lines([inst for inst in instances if all(_has_lines(inst)[:2])],
+                         classifier, posdict=posdict)
+
+
+def enrich_instance(inst, pos_args=(), parse_args=(), tagger=None, parser=None, classifier=None):
+    """
+    Run the per-instance enrichment steps (gloss/lang alignment, POS tagging,
+    classification, parsing and projection) on a single instance, in place.
+
+    Any corpus-level alignment must already have been added to the instance.
+    If ``tagger`` or ``parser`` is ``None``, the translation line is assumed to
+    have already been tagged or parsed (e.g. with :py:func:`tag_trans_lines` or
+    :py:func:`parse_translation_lines`), and likewise the gloss line classified
+    (with :py:func:`classify_gloss_lines`) if ``classifier`` is ``None``.
+
+    :type inst: RGIgt
+    """
+    ENRICH_LOG = logging.getLogger('ENRICH')
+
+    try:
+        has_lang, has_gloss, has_trans = _has_lines(inst)
+
+        has_all = lambda: (has_gloss and has_trans and has_lang)
+
+
+        # Attempt to align the gloss and language lines if requested... --------
+        if has_gloss and has_lang:
+            try:
+                word_align(inst.gloss, inst.lang)
+            except GlossLangAlignException as glae:
+                ENRICH_LOG.warn(str(glae))
+            except MultipleNormLineException as mnle:
+                pass # This will be errored out elsewhere...
+
+
+        # 3) POS tag the translation line (unless this has already been done
+        #    for a whole batch of instances) ----------------------------------
+        if tagger is not None and POS_LANG_PROJ in pos_args and has_trans:
+            # A CriticalTaggerError is left for the caller to handle, as this
+            # may be running in a worker process.
+            try:
+                inst.tag_trans_pos(tagger)
+            except MultipleNormLineException as mnle:
+                ENRICH_LOG.warn(str(mnle) + ' Not projecting POS tags.')
+
+
+        # 4) POS tag the gloss line (unless this has already been done
+        #    for a whole batch of instances) ----------------------------------
+        if POS_LANG_CLASS in pos_args and has_gloss and has_lang:
+            if classifier is not None:
+                inst.classify_gloss_pos(classifier, posdict=posdict)
+            try:
+                inst.project_gloss_to_lang(tag_method=INTENT_POS_CLASS)
+            except GlossLangAlignException:
+                ENRICH_LOG.warning('The gloss and language lines for instance id "{}" do not align. Language line not POS tagged.'.format(inst.id))
+
+        if POS_LANG_PROJ in pos_args and has_all():
+            pos_tags = inst.get_pos_tags(inst.trans.id)
+            aln = inst.get_trans_gloss_alignment()
+            if not pos_tags:
+                ENRICH_LOG.warn('No trans-line POS tags available for "{}". Not projecting POS tags from trans line.'.format(inst.id))
+            elif not aln:
+                ENRICH_LOG.warn('No trans-gloss alignment available for "{}". Not projecting POS tags from trans line.'.format(inst.id))
+            else:
+                try:
+                    inst.project_trans_to_gloss()
+                except ProjectionTransGlossException as ptge:
+                    ENRICH_LOG.warning('No alignment between translation and gloss lines found for instance "%s". Not projecting POS tags.' % inst.id)
+                except ProjectionException as pe:
+                    ENRICH_LOG.warning('No translation POS tags were found for instance "%s". Not projecting POS tags.' % inst.id)
+                else:
+                    try:
+                        inst.project_gloss_to_lang(tag_method=INTENT_POS_PROJ)
+                    except GlossLangAlignException as glae:
+                        ENRICH_LOG.warn(glae)
+
+
+        # 5) Parse the translation line (unless this has already been done
+        #    for a whole batch of instances) ----------------------------------
+        if parser is not None and ((PARSE_TRANS in parse_args) or (PARSE_LANG_PROJ in parse_args)) and has_trans:
+            # try:
+            inst.parse_translation_line(parser, pt=True, dt=True)
+            # except Exception as ve:
+                # pass
+                # ENRICH_LOG.critical("Unknown parse error in instance {}".format(inst1.id))
+                # ENRICH_LOG.critical(str(ve))
+
+        # If parse tree projection is enabled... -------------------------------
+        if PARSE_LANG_PROJ in parse_args and has_all():
+            aln = inst.get_trans_gloss_lang_alignment()
+
+            # If there's no alignment, just skip.
+            if aln is None or len(aln) == 0:
+                ENRICH_LOG.warning('No alignment available for "{}". Not projecting trees.'.format(inst.id))
+
+            # If there's alignment, try projecting.
+            else:
+                try:
+                    inst.project_pt()
+                except PhraseStructureProjectionException as pspe:
+                    ENRICH_LOG.warning('A parse for the translation line was not found for instance "%s", not projecting phrase structure.' % inst.id)
+                except ProjectionTransGlossException as ptge:
+                    ENRICH_LOG.warning('Alignment between translation and gloss lines was not found for instance "%s". Not projecting phrase structure.' % inst.id)
+
+                try:
+                    inst.project_ds()
+                except ProjectionException as pe:
+                    ENRICH_LOG.warning(pe)
+
+        # Sort the tiers... ----------------------------------------------------
+        inst.sort_tiers()
+
+    except Exception as e:
+        ENRICH_LOG.warn("Unknown Error occurred processing instance {}".format(inst.id))
+        ENRICH_LOG.warn(e)
+        raise(e)
+
+    return inst
+
+
 def enrich(**kwargs):
 
     ENRICH_LOG = logging.getLogger('ENRICH')
@@ -61,13 +272,6 @@ def enrich(**kwargs):
         ENRICH_LOG.critical("No output file specified.")
         sys.exit()
 
-    # =============================================================================
-    # Set up the alternate classifier path...
-    # =============================================================================
-
-    if kwargs.get('class_path'):
-        classifier_path = mallet_maxent.MalletMaxent(kwargs.get('class_path'))
-
     #===========================================================================
     # Set up the different arguments...
     #===========================================================================
@@ -89,37 +293,28 @@ def enrich(**kwargs):
         ENRICH_LOG.warn("You have asked for projection methods but have not requested " + \
                         "alignments to be generated. Projection may fail if alignment not already present in file.")
 
-    ENRICH_LOG.log(1000, 'Loading input file...')
-    corp = RGCorpus.load(inpath, basic_processing=True)
+    # The GIZA server is only used when asked for, as its alignments
+    # differ from those of resuming mgiza.
+    aligner = ALIGNER_GIZA_SERVER if kwargs.get(ALN_SERVER_VAR) else ALIGNER_GIZA
+    if aligner == ALIGNER_GIZA_SERVER and not (ALN_GIZA in aln_args or ALN_GIZA_HEUR in aln_args):
+        ENRICH_LOG.warn("The GIZA server was asked for, but no statistical alignment was requested.")
 
-    ENRICH_LOG.log(1000, "{} instances loaded...".format(len(corp)))
+    # Parallel enrichment always streams, as the instances are handed off
+    # to the workers one at a time anyway.
+    jobs = kwargs.get(JOBS_VAR) or 1
 
-    #===========================================================================
-    # If the tagger is asked for, initialize it.
-    #===========================================================================
-    if POS_LANG_PROJ in pos_args or POS_TRANS in pos_args:
-        ENRICH_LOG.log(1000, 'Initializing tagger...')
-        tagger = c.getpath('stanford_tagger_trans')
+    if kwargs.get(STREAM_VAR) or jobs > 1:
+        _enrich_stream(inpath, kwargs.get('OUT_FILE'), aln_args, pos_args, parse_args,
+                       symmetric=kwargs.get(ALN_SYM_VAR), class_path=kwargs.get('class_path', classifier),
+                       jobs=jobs, incremental=kwargs.get(ALN_INCREMENTAL_VAR, False), aligner=aligner)
+        return
 
-        try:
-            s = StanfordPOSTagger(tagger)
-        except TaggerError:
-            sys.exit(2)
+    ENRICH_LOG.log(1000, 'Loading input file...')
+    corp = RGCorpus.load(inpath, basic_processing=True)
 
-    #===========================================================================
-    # Initialize the parser
-    #===========================================================================
-    if PARSE_TRANS in parse_args or PARSE_LANG_PROJ in parse_args:
-        ENRICH_LOG.log(1000, "Intializing English parser...")
-        sp = stanford_parser.StanfordParser()
+    ENRICH_LOG.log(1000, "{} instances loaded...".format(len(corp)))
 
-    #===========================================================================
-    # If the classifier is asked for, initialize it...
-    #===========================================================================
-    if POS_LANG_CLASS in pos_args:
-        ENRICH_LOG.log(1000, "Initializing gloss-line classifier...")
-        p = posdict
-        m = mallet_maxent.MalletMaxent(classifier)
+    handles = _start_handles(pos_args, parse_args, kwargs.get('class_path', classifier))
 
     # -- 1a) Heuristic Alignment --------------------------------------------------
     if ALN_HEUR in aln_args:
@@ -128,147 +323,223 @@ def enrich(**kwargs):
 
     # -- 1b) Giza Gloss to Translation alignment --------------------------------------
     if ALN_GIZA in aln_args or ALN_GIZA_HEUR in aln_args:
-        ENRICH_LOG.log(1000, 'Aligning gloss and translation lines using mgiza++...')
+        ENRICH_LOG.log(1000, 'Aligning gloss and translation lines using {}...'.format(_aligner_name(aligner)))
 
         use_heur = ALN_GIZA_HEUR in aln_args
 
         try:
-            corp.giza_align_t_g(resume=True, use_heur=use_heur, symmetric=kwargs.get(ALN_SYM_VAR))
+            corp.giza_align_t_g(aligner=aligner, resume=True, use_heur=use_heur, symmetric=kwargs.get(ALN_SYM_VAR),
+                                incremental=kwargs.get(ALN_INCREMENTAL_VAR, False))
         except GizaAlignmentException as gae:
             gl = logging.getLogger('giza')
             gl.critical(str(gae))
             sys.exit(2)
 
-    # -- 2) Iterate through the corpus -----------------------------------------------
-    for inst in corp:
-
+    # -- 2) Tag, parse and classify all the lines in batches --------------------------
+    if 'tagger' in handles and POS_LANG_PROJ in pos_args:
+        ENRICH_LOG.log(1000, 'POS tagging translation lines...')
         try:
-            has_gloss = True
-            has_trans = True
-            has_lang  = True
+            corp.tag_trans_pos(handles.pop('tagger'))
+        except CriticalTaggerError as cte:
+            ENRICH_LOG.critical(str(cte))
+            sys.exit(2)
 
-            has_all = lambda: (has_gloss and has_trans and has_lang)
+    if 'parser' in handles:
+        ENRICH_LOG.log(1000, 'Parsing translation lines...')
+        corp.parse_translation_line(handles.pop('parser'), pt=True, dt=True)
 
-            # -- A) Language Lines
-            try:
-                n = retrieve_normal_line(inst, ODIN_LANG_TAG)
-                has_lang = n.value() is not None and n.value().strip()
-            except (NoNormLineException, MultipleNormLineException) as e:
-                has_lang = False
+    if 'classifier' in handles:
+        ENRICH_LOG.log(1000, 'Classifying gloss tokens...')
+        _classify_gloss_lines(corp, handles.pop('classifier'))
 
-            # -- B) Gloss Lines
-            try:
-                n = retrieve_normal_line(inst, ODIN_GLOSS_TAG)
-                has_gloss = n.value() is not None and n.value().strip()
-            except (NoNormLineException, MultipleNormLineException) as e:
-                has_gloss = False
+    # -- 3) Iterate through the corpus -----------------------------------------------
+    for inst in corp:
+        enrich_instance(inst, pos_args, parse_args, **handles)
 
-            # -- C) Trans Lines
-            try:
-                n = retrieve_normal_line(inst, ODIN_TRANS_TAG)
-                has_trans = n.value() is not None and n.value().strip()
-            except (NoNormLineException, MultipleNormLineException) as e:
-                has_trans = False
+    ENRICH_LOG.log(1000, 'Writing output file...')
 
+    if hasattr(kwargs.get('OUT_FILE'), 'write'):
+        xigtxml.dump(kwargs.get('OUT_FILE'), corp)
+    else:
+        xigtxml.dump(writefile(kwargs.get('OUT_FILE')), corp)
 
-            # Attempt to align the gloss and language lines if requested... --------
-            if has_gloss and has_lang:
-                try:
-                    word_align(inst.gloss, inst.lang)
-                except GlossLangAlignException as glae:
-                    ENRICH_LOG.warn(str(glae))
-                except MultipleNormLineException as mnle:
-                    pass # This will be errored out elsewhere...
+    ENRICH_LOG.log(1000, 'Done.')
+    ENRICH_LOG.log(1000, "{} instances written.".format(len(corp)))
 
 
-            # 3) POS tag the translation line --------------------------------------
-            if POS_LANG_PROJ in pos_args and has_trans:
-                try:
-                    inst.tag_trans_pos(s)
-                except CriticalTaggerError as cte:
-                    ENRICH_LOG.critical(str(cte))
-                    sys.exit(2)
-                except MultipleNormLineException as mnle:
-                    ENRICH_LOG.warn(str(mnle) + ' Not projecting POS tags.')
+#===============================================================================
+# Streaming (and parallel) enrichment
+#===============================================================================
 
+def _aligner_name(aligner):
+    return 'the GIZA server' if aligner == ALIGNER_GIZA_SERVER else 'mgiza++'
 
-            # 4) POS tag the gloss line --------------------------------------------
-            if POS_LANG_CLASS in pos_args and has_gloss and has_lang:
-                inst.classify_gloss_pos(m, posdict=p)
-                try:
-                    inst.project_gloss_to_lang(tag_method=INTENT_POS_CLASS)
-                except GlossLangAlignException:
-                    ENRICH_LOG.warning('The gloss and language lines for instance id "{}" do not align. Language line not POS tagged.'.format(inst.id))
-
-            if POS_LANG_PROJ in pos_args and has_all():
-                pos_tags = inst.get_pos_tags(inst.trans.id)
-                aln = inst.get_trans_gloss_alignment()
-                if not pos_tags:
-                    ENRICH_LOG.warn('No trans-line POS tags available for "{}". Not projecting POS tags from trans line.'.format(inst.id))
-                elif not aln:
-                    ENRICH_LOG.warn('No trans-gloss alignment available for "{}". Not projecting POS tags from trans line.'.format(inst.id))
-                else:
-                    try:
-                        inst.project_trans_to_gloss()
-                    except ProjectionTransGlossException as ptge:
-                        ENRICH_LOG.warning('No alignment between translation and gloss lines found for instance "%s". Not projecting POS tags.' % inst.id)
-                    except ProjectionException as pe:
-                        ENRICH_LOG.warning('No translation POS tags were found for instance "%s". Not projecting POS tags.' % inst.id)
-                    else:
-                        try:
-                            inst.project_gloss_to_lang(tag_method=INTENT_POS_PROJ)
-                        except GlossLangAlignException as glae:
-                            ENRICH_LOG.warn(glae)
-
-
-            # 5) Parse the translation line ----------------------------------------
-            if (PARSE_TRANS in parse_args) or (PARSE_LANG_PROJ in parse_args) and has_trans:
-                # try:
-                inst.parse_translation_line(sp, pt=True, dt=True)
-                # except Exception as ve:
-                    # pass
-                    # ENRICH_LOG.critical("Unknown parse error in instance {}".format(inst1.id))
-                    # ENRICH_LOG.critical(str(ve))
-
-            # If parse tree projection is enabled... -------------------------------
-            if PARSE_LANG_PROJ in parse_args and has_all():
-                aln = inst.get_trans_gloss_lang_alignment()
-
-                # If there's no alignment, just skip.
-                if aln is None or len(aln) == 0:
-                    ENRICH_LOG.warning('No alignment available for "{}". Not projecting trees.'.format(inst.id))
-
-                # If there's alignment, try projecting.
-                else:
-                    try:
-                        inst.project_pt()
-                    except PhraseStructureProjectionException as pspe:
-                        ENRICH_LOG.warning('A parse for the translation line was not found for instance "%s", not projecting phrase structure.' % inst.id)
-                    except ProjectionTransGlossException as ptge:
-                        ENRICH_LOG.warning('Alignment between translation and gloss lines was not found for instance "%s". Not projecting phrase structure.' % inst.id)
+def _enrich_job(inst, g_t_aln, aln_args, pos_args, parse_args, handles, fingerprint=None, aligner=ALIGNER_GIZA):
+    """
+    Add the alignments for a single instance and then enrich it.
+    """
+    if ALN_HEUR in aln_args:
+        heur_align_igt(inst)
+
+    if g_t_aln is not None:
+        set_giza_t_g_alignment(inst, g_t_aln, fingerprint, aligner=aligner)
+
+    return enrich_instance(inst, pos_args, parse_args, **handles)
+
+# The number of instances to read at a time when streaming, so
+# that batched steps (such as parsing) can still be batched.
+STREAM_WINDOW = 100
+
+# Each worker process in the enrich pool keeps its own external tool handles
+# (and the arguments they were started with) here, set up once by the
+# pool initializer.
+_worker = {}
+
+def _enrich_worker_init(aln_args, pos_args, parse_args, class_path, open_tag, aligner=ALIGNER_GIZA):
+    _worker['args'] = (aln_args, pos_args, parse_args, aligner)
+    _worker['open_tag'] = open_tag
+
+    # An exception escaping the initializer would only kill the worker, and
+    # the pool would keep starting new ones in its place, so hold on to it
+    # and raise it for each job instead, where the parent will see it.
+    try:
+        _worker['handles'] = _enrich_handles(pos_args, parse_args, class_path)
+    except Exception as e:
+        _worker['error'] = e
+
+def _enrich_worker(job):
+    """
+    Enrich a single instance inside a worker process.
+
+    Instances are passed to and from the workers as XIGT-XML strings, so the
+    worker loads (and basic-processes) the instance exactly as a full load
+    would, and the parent process only needs to write the result out.
+    """
+    if 'error' in _worker:
+        raise _worker['error']
+
+    igt_xml, g_t_aln, fingerprint = job
+    aln_args, pos_args, parse_args, aligner = _worker['args']
+
+    xc = RGCorpus.loads(_worker['open_tag'] + igt_xml + '</xigt-corpus>', basic_processing=True)
+    inst = _enrich_job(xc[0], g_t_aln, aln_args, pos_args, parse_args, _worker['handles'], fingerprint, aligner)
+    return encode_igt(inst, xc.nsmap)
+
+def _enrich_stream(inpath, outpath, aln_args, pos_args, parse_args, symmetric=None, class_path=classifier, jobs=1, incremental=False,
+                   aligner=ALIGNER_GIZA):
+    """
+    Enrich the corpus at ``inpath`` one instance at a time, writing each
+    enriched instance to ``outpath`` before the next one is read, so that
+    memory use does not grow with the size of the corpus.
+
+    Statistical alignment needs to see the whole corpus at once, so when it is
+    requested the input is read twice: the first pass only gathers the
+    gloss/translation tokens for the aligner, and the second applies the
+    resulting alignments as the instances stream past. With ``incremental``,
+    only the instances whose alignment is out of date are aligned.
+
+    When ``outpath`` is a path, the output is written to a temporary file
+    that only replaces it once every instance has been written, so a failed
+    run leaves no partial corpus behind.
+
+    With ``jobs`` greater than one, the instances are sharded across a pool
+    of worker processes, each of which starts its own tagger, parser and
+    classifier. The enriched instances are still written in their original order.
+    If a worker fails, the run is stopped with exit status 2.
+    """
+    ENRICH_LOG = logging.getLogger('ENRICH')
 
-                    try:
-                        inst.project_ds()
-                    except ProjectionException as pe:
-                        ENRICH_LOG.warning(pe)
+    use_giza = ALN_GIZA in aln_args or ALN_GIZA_HEUR in aln_args
+    use_heur = ALN_GIZA_HEUR in aln_args
 
+    # -- 1) First pass: statistical alignment --------------------------------------
+    g_t_alignments = None
+    if use_giza:
+        ENRICH_LOG.log(1000, 'Aligning gloss and translation lines using {}...'.format(_aligner_name(aligner)))
+        corp = RGCorpus.load(inpath, basic_processing=True, mode=TRANSIENT)
+        insts = (heur_align_igt(inst) for inst in corp) if ALN_HEUR in aln_args else corp
+        try:
+            if incremental:
+                g_t_alignments = incremental_giza_t_g_alignments(insts, aligner=aligner, resume=True, use_heur=use_heur,
+                                                                 symmetric=symmetric, corpus_id=corp.id)
+            else:
+                g_t_alignments = [(aln, None) for aln in giza_t_g_alignments(insts, aligner=aligner, resume=True, use_heur=use_heur,
+                                                                             symmetric=symmetric, corpus_id=corp.id)]
+        except GizaAlignmentException as gae:
+            gl = logging.getLogger('giza')
+            gl.critical(str(gae))
+            sys.exit(2)
 
-            # Sort the tiers... ----------------------------------------------------
-            inst.sort_tiers()
-        # except Exception as e:
-        #     raise e
+    # -- 2) Second pass: enrich and write each instance ----------------------------
 
-        except Exception as e:
-            ENRICH_LOG.warn("Unknown Error occurred processing instance {}".format(inst.id))
-            ENRICH_LOG.warn(e)
-            raise(e)
+    # When using a pool of workers, the instances are basic-processed by the
+    # workers rather than here.
+    corp = RGCorpus.load(inpath, basic_processing=(jobs <= 1), mode=TRANSIENT)
 
-    ENRICH_LOG.log(1000, 'Writing output file...')
+    def jobs_iter():
+        for i, inst in enumerate(corp):
+            g_t_aln, fingerprint = (None, None) if g_t_alignments is None else g_t_alignments[i]
+            yield inst, g_t_aln, fingerprint
 
-    if hasattr(kwargs.get('OUT_FILE'), 'write'):
-        xigtxml.dump(kwargs.get('OUT_FILE'), corp)
-    else:
-        xigtxml.dump(writefile(kwargs.get('OUT_FILE')), corp)
+    with ExitStack() as stack:
+        f = outpath if hasattr(outpath, 'write') else stack.enter_context(replacing_writefile(outpath))
+        writer = stack.enter_context(XigtStreamWriter(f, corp))
+
+        if jobs > 1:
+            # Check that the tools start here first, so that a misconfigured
+            # tool is reported once rather than by every worker.
+            _close_handles(_start_handles(pos_args, parse_args, class_path))
+
+            ENRICH_LOG.log(1000, 'Enriching and writing instances using {} processes...'.format(jobs))
+            with Pool(jobs, initializer=_enrich_worker_init,
+                      initargs=(aln_args, pos_args, parse_args, class_path, corpus_open_tag(corp), aligner)) as p:
+
+                # Keep a bounded number of instances in flight, and write
+                # them out in the order they were read, as each finishes.
+                # Any exception raised in a worker is raised again by get().
+                try:
+                    pending = deque()
+                    for inst, g_t_aln, fingerprint in jobs_iter():
+                        job = (encode_igt(inst, corp.nsmap), g_t_aln, fingerprint)
+                        pending.append(p.apply_async(_enrich_worker, (job,)))
+
+                        if len(pending) >= jobs * 4:
+                            writer.write_encoded(pending.popleft().get())
+
+                    while pending:
+                        writer.write_encoded(pending.popleft().get())
+                except Exception as e:
+                    ENRICH_LOG.critical('Enrichment failed in a worker process: {}'.format(e))
+                    sys.exit(2)
+        else:
+            ENRICH_LOG.log(1000, 'Enriching and writing instances...')
+            handles = _start_handles(pos_args, parse_args, class_path)
+            tagger = handles.pop('tagger', None) if POS_LANG_PROJ in pos_args else None
+            parser = handles.pop('parser', None)
+            classifier_obj = handles.pop('classifier', None)
+
+            # Read the instances a window at a time, so that the translation
+            # lines of the whole window can be sent to the tagger and parser at once.
+            all_jobs = jobs_iter()
+            while True:
+                window = list(islice(all_jobs, STREAM_WINDOW))
+                if not window:
+                    break
+
+                window_insts = [inst for inst, g_t_aln, fingerprint in window]
+                if tagger is not None:
+                    try:
+                        tag_trans_lines(window_insts, tagger)
+                    except CriticalTaggerError as cte:
+                        ENRICH_LOG.critical(str(cte))
+                        sys.exit(2)
+                if parser is not None:
+                    parse_translation_lines(window_insts, parser, pt=True, dt=True)
+                if classifier_obj is not None:
+                    _classify_gloss_lines(window_insts, classifier_obj)
+
+                for inst, g_t_aln, fingerprint in window:
+                    writer.write(_enrich_job(inst, g_t_aln, aln_args, pos_args, parse_args, handles, fingerprint, aligner))
 
     ENRICH_LOG.log(1000, 'Done.')
-    ENRICH_LOG.log(1000, "{} instances written.".format(len(corp)))
\ No newline at end of file
+    ENRICH_LOG.log(1000, "{} instances written.".format(writer.written))
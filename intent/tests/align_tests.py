@@ -1,7 +1,7 @@
 from unittest import TestCase
 
 from intent.alignment.Alignment import Alignment, heuristic_iteration, exact_match, stem_match, gram_match, \
-    heuristic_chain
+    heuristic_chain, symmetricize, AlignmentError, match_table, table_iteration
 
 
 class symmetricization_tests(TestCase):
@@ -24,8 +24,44 @@ class symmetricization_tests(TestCase):
         self.assertEqual(a, self.a1.grow_diag(self.a2))
 
     def test_grow_diag_final(self):
-        #TODO: Write testcase for grow_diag_final
-        raise Exception("NO TESTCASE DEFINED!")
+        """
+        (4,4) isn't next to the intersection, but neither
+        of its words is aligned, so "final" adds it.
+        """
+        a = Alignment([(1,1),(2,1),(3,2),(4,4)])
+        self.assertEqual(a, self.a1.grow_diag_final(self.a2))
+        self.assertEqual(a, self.a2.grow_diag_final(self.a1))
+
+    def test_lookups(self):
+        """
+        The lookups should follow changes to the alignment.
+        """
+        a = self.a1.copy()
+        self.assertEqual(sorted(a.tgt_to_src(1)), [1, 2])
+        self.assertTrue(a.contains_src(3))
+
+        a.discard((3,2))
+        a |= Alignment([(5,1)])
+        self.assertEqual(sorted(a.tgt_to_src(1)), [1, 2, 5])
+        self.assertFalse(a.contains_src(3))
+        self.assertFalse(a.contains_tgt(2))
+        self.assertEqual(a.row_masks(), {1: 0b10, 2: 0b10, 5: 0b10})
+
+    def test_symmetricize(self):
+        """
+        The reverse alignments should be flipped before combining.
+        """
+        reverse = [self.a2.flip(), self.a1.flip()]
+        self.assertEqual(symmetricize([self.a1, self.a2], reverse, 'intersection'),
+                         [self.a1.intersection(self.a2), self.a2.intersection(self.a1)])
+        self.assertEqual(symmetricize([self.a1, self.a2], reverse, 'grow_diag'),
+                         [self.a1.grow_diag(self.a2), self.a2.grow_diag(self.a1)])
+
+    def test_symmetricize_errors(self):
+        with self.assertRaises(AlignmentError):
+            symmetricize([self.a1], [self.a2], 'nonexistent')
+        with self.assertRaises(AlignmentError):
+            symmetricize([self.a1], [], 'intersection')
 
 class heur_align_tests(TestCase):
 
@@ -52,3 +88,21 @@ class heur_align_tests(TestCase):
 
     def test_heur_chain(self):
         print(sorted(heuristic_chain(self.gloss, self.trans, [exact_match, stem_match, gram_match])))
+
+    def test_match_table(self):
+        """
+        The table for each method should list the trans tokens that
+        each gloss token matches, as the comparison functions would.
+        """
+        for f in [exact_match, stem_match, gram_match, lambda g, t: g[0] == t[0]]:
+            self.assertEqual(match_table(self.gloss, self.trans, f),
+                             [[trans_i for trans_i, t in enumerate(self.trans) if f(g, t)] for g in self.gloss])
+
+    def test_second_pass(self):
+        """
+        The first pass should only align each token once, and the second
+        should only add multiple matches for tokens not yet aligned.
+        """
+        table = [[0, 1], [0, 1], [2]]
+        self.assertEqual(table_iteration(table, Alignment([(3, 3)]), multiple_matches=False), Alignment([(1, 1), (2, 2), (3, 3)]))
+        self.assertEqual(table_iteration(table, Alignment([(3, 1)])), Alignment([(1, 2), (2, 1), (2, 2), (3, 1)]))
@@ -0,0 +1,186 @@
+import os
+import shutil
+import tempfile
+from multiprocessing.pool import Pool, ThreadPool
+from unittest import TestCase
+
+from intent.igt import corpus_cache
+from intent.igt.codecs import snapshot
+from intent.igt.corpus_cache import CorpusCache
+from intent.igt.rgxigt import RGCorpus, RGIgt, RGTier, RGItem
+from intent.utils.env import testfile_dir
+from intent.utils.string_utils import StemCache, StemCacheInfo, stem_cache, lemmatize_token
+from xigt.codecs import xigtxml
+
+__author__ = 'rgeorgi'
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        self.xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/ctn-train-tests.xml'))
+
+    def test_roundtrip(self):
+        """
+        A corpus read back from a snapshot should serialize
+        to the same document as the original.
+        """
+        xc = snapshot.loads(snapshot.dumps(self.xc))
+        self.assertIsInstance(xc, RGCorpus)
+        self.assertEqual(xigtxml.dumps(xc), xigtxml.dumps(self.xc))
+
+    def test_structure(self):
+        """
+        The parents, id lookups and reference caches should all
+        be restored along with the objects.
+        """
+        xc = snapshot.loads(snapshot.dumps(self.xc))
+        inst = xc[0]
+        orig = self.xc[0]
+
+        self.assertIsInstance(inst, RGIgt)
+        self.assertIs(inst.corpus, xc)
+        self.assertIs(xc[orig.id], inst)
+
+        for tier, orig_tier in zip(inst, orig):
+            self.assertIsInstance(tier, RGTier)
+            self.assertIs(tier.igt, inst)
+            self.assertIs(inst[orig_tier.id], tier)
+            self.assertEqual(tier.referrers(), orig_tier.referrers())
+
+            for item, orig_item in zip(tier, orig_tier):
+                self.assertIsInstance(item, RGItem)
+                self.assertIs(item.tier, tier)
+                self.assertIs(inst.get_item(item.id), item)
+                self.assertEqual(item.index, orig_item.index)
+
+        # The restored instance can still be modified.
+        inst.append(RGTier(id='new', type='words'))
+        self.assertIs(inst.find(id='new'), inst['new'])
+
+class CorpusCacheTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'corpus.xml')
+        shutil.copy(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), self.path)
+        self.cache = CorpusCache(os.path.join(self.tmpdir, 'cache'), 1)
+
+    def tearDown(self):
+        corpus_cache.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit(self):
+        loads = []
+        def loader(path):
+            loads.append(path)
+            return RGCorpus.load(path)
+
+        first = self.cache.load(self.path, loader)
+        second = self.cache.load(self.path, loader)
+
+        self.assertEqual(len(loads), 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(xigtxml.dumps(first), xigtxml.dumps(second))
+
+    def test_changed_file(self):
+        """
+        Changing the file should change its key.
+        """
+        key = self.cache.key(self.path)
+        self.cache.put(key, RGCorpus.load(self.path))
+
+        with open(self.path, 'a') as f:
+            f.write('\n')
+
+        self.assertNotEqual(self.cache.key(self.path), key)
+        self.assertIsNone(self.cache.get(self.cache.key(self.path)))
+
+    def test_eviction(self):
+        """
+        The least recently used snapshots should be removed first.
+        """
+        xc = RGCorpus.load(self.path)
+        for i, key in enumerate(['a', 'b', 'c']):
+            self.cache.put(key, xc)
+            os.utime(self.cache._entry(key), (i, i))
+        self.cache.get('a')
+
+        self.cache.max_size = 2.5 * os.path.getsize(self.cache._entry('a')) / 2**20
+        self.cache.evict()
+
+        self.assertEqual(sorted(os.path.basename(e[0]) for e in self.cache.entries()),
+                         ['a.snapshot', 'c.snapshot'])
+
+    def test_unreadable(self):
+        os.makedirs(self.cache.cache_dir)
+        with open(self.cache._entry('a'), 'wb') as f:
+            f.write(b'not a snapshot')
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertFalse(os.path.exists(self.cache._entry('a')))
+
+    def test_corpus_load(self):
+        """
+        RGCorpus.load should go through the cache once it is enabled.
+        """
+        corpus_cache.enable(self.cache.cache_dir)
+        first = RGCorpus.load(self.path, basic_processing=True)
+        self.assertEqual(len(self.cache.entries()), 1)
+
+        second = RGCorpus.load(self.path, basic_processing=True)
+        self.assertEqual(xigtxml.dumps(first), xigtxml.dumps(second))
+
+class StemCacheTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'stems.json')
+        self.cache = StemCache(str.upper, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hits(self):
+        self.assertEqual([self.cache.stem(w) for w in ['a', 'b', 'a', 'c', 'b']], ['A', 'B', 'A', 'C', 'B'])
+
+        # "b" was the least recently used when "c" was added.
+        self.assertEqual(self.cache.info(), StemCacheInfo(hits=1, misses=4, max_size=2, size=2))
+
+    def test_save_load(self):
+        """
+        Saving should keep the stems that were already in the
+        file, and loading should keep the stems already in the cache.
+        """
+        self.cache.stem('a')
+        self.cache.save(self.path)
+
+        other = StemCache(str.upper, 2)
+        other.stem('b')
+        other.save(self.path)
+
+        self.cache.load(self.path)
+        self.assertEqual(self.cache._stems, {'a': 'A', 'b': 'B'})
+
+        self.cache.stem('c')
+        self.cache.load(self.path)
+        self.assertEqual(list(self.cache._stems), ['a', 'c'])
+
+    def test_unreadable(self):
+        with open(self.path, 'w') as f:
+            f.write('{"a": "A"}')
+        self.cache.load(self.path)
+        self.assertEqual(self.cache.info().size, 0)
+
+    def test_shared(self):
+        """
+        Threads should share the module's cache, and forked processes should
+        each start with a copy of it.
+        """
+        lemmatize_token('walking')
+        hits = stem_cache.info().hits
+        with ThreadPool(2) as pool:
+            pool.map(lemmatize_token, ['walking'] * 10)
+        self.assertEqual(stem_cache.info().hits, hits + 10)
+
+        with Pool(2) as pool:
+            self.assertEqual(pool.map(lemmatize_token, ['walking', 'walked']), ['walk', 'walk'])
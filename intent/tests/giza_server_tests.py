@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from threading import Thread
+from unittest import TestCase
+
+import intent.interfaces.giza_server
+from intent.alignment.Alignment import Alignment
+from intent.igt.consts import ALIGNER_GIZA, ALIGNER_GIZA_SERVER, DATA_PROV, DATA_ALIGNER
+from intent.igt.metadata import find_meta_attr
+from intent.igt.rgxigt import RGCorpus, giza_t_g_alignments, giza_t_g_fingerprint, set_giza_t_g_alignment, giza_t_g_tier
+from intent.interfaces.giza import GizaAlignmentException
+from intent.interfaces.giza_server import GizaModel, GizaServer, GizaClient, GizaServerException
+from intent.utils.env import testfile_dir
+
+__author__ = 'rgeorgi'
+
+class GizaModelTests(TestCase):
+
+    def setUp(self):
+        """
+        Write a tiny model, where "dog" translates "hund" and "cat"
+        translates "katze", and the alignment table prefers words
+        in the same position.
+        """
+        self.tmpdir = tempfile.mkdtemp()
+        prefix = os.path.join(self.tmpdir, 'aln')
+
+        with open(prefix+'_e.vcb', 'w', encoding='utf-8') as f:
+            f.write('2 dog 1\n3 cat 1\n4 the 2\n')
+        with open(prefix+'_f.vcb', 'w', encoding='utf-8') as f:
+            f.write('2 hund 1\n3 katze 1\n4 der 2\n')
+        with open(prefix+'.t3.final', 'w', encoding='utf-8') as f:
+            f.write('2 2 0.9\n3 3 0.9\n4 4 0.8\n0 4 0.1\n2 3 0.05\n')
+        with open(prefix+'.a3.final', 'w', encoding='utf-8') as f:
+            for i in range(3):
+                for j in range(1, 3):
+                    f.write('{} {} 2 100 {}\n'.format(i, j, 0.6 if i == j else 0.2))
+
+        self.model = GizaModel.load(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_align(self):
+        self.assertEqual(self.model.align(['the', 'dog'], ['der', 'hund']), Alignment([(1,1),(2,2)]))
+        self.assertEqual(self.model.align(['dog', 'cat'], ['katze', 'hund']), Alignment([(2,1),(1,2)]))
+
+    def test_unknown(self):
+        """
+        Words missing from the model should go to NULL, and be left unaligned.
+        """
+        self.assertEqual(self.model.align(['dog', 'bird'], ['vogel', 'hund']), Alignment([(1,2)]))
+
+    def test_unequal(self):
+        with self.assertRaises(GizaAlignmentException):
+            self.model.force_align([['dog']], [])
+
+    def test_server(self):
+        server = GizaServer({'g_t': self.model}, ('localhost', 0), authkey='test')
+        t = Thread(target=server.serve_forever, daemon=True)
+        t.start()
+
+        try:
+            with GizaClient(server.address, authkey='test') as client:
+                e_snts = [['the', 'dog'], ['dog', 'cat']]
+                f_snts = [['der', 'hund'], ['katze', 'hund']]
+                self.assertEqual(client.aligner('g_t').force_align(e_snts, f_snts),
+                                 self.model.force_align(e_snts, f_snts))
+
+                with self.assertRaises(GizaAlignmentException):
+                    client.force_align('g_t_reverse', e_snts, f_snts)
+        finally:
+            server.close()
+
+    def test_server_authkey(self):
+        """
+        The server shouldn't start without a key for clients to present.
+        """
+        for authkey in [None, '']:
+            with self.assertRaises(GizaServerException):
+                GizaServer({'g_t': self.model}, ('localhost', 0), authkey=authkey)
+
+class GizaServerAlignerTests(TestCase):
+
+    def setUp(self):
+        self.xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), basic_processing=True)
+        self.config = (intent.interfaces.giza_server.giza_server, intent.interfaces.giza_server.giza_server_authkey)
+
+    def tearDown(self):
+        intent.interfaces.giza_server.giza_server, intent.interfaces.giza_server.giza_server_authkey = self.config
+
+    def test_not_configured(self):
+        """
+        Asking for the server when none is set up should be an error,
+        rather than quietly aligning some other way.
+        """
+        intent.interfaces.giza_server.giza_server = None
+        with self.assertRaises(GizaAlignmentException):
+            giza_t_g_alignments(self.xc, aligner=ALIGNER_GIZA_SERVER, use_heur=False, symmetric=None)
+
+    def test_server_aligner(self):
+        model = GizaModel({'dog': 2}, {'hund': 2}, {2: {2: 0.9}}, {})
+        server = GizaServer({'g_t': model}, ('localhost', 0), authkey='test')
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        intent.interfaces.giza_server.giza_server = '{}:{}'.format(*server.address)
+        intent.interfaces.giza_server.giza_server_authkey = 'test'
+        try:
+            alns = giza_t_g_alignments(self.xc, aligner=ALIGNER_GIZA_SERVER, use_heur=False, symmetric=None)
+        finally:
+            server.close()
+        self.assertEqual(len(alns), len(self.xc))
+
+        # Which aligner was used should be kept with the alignment,
+        # and be part of its fingerprint.
+        inst = self.xc[0]
+        set_giza_t_g_alignment(inst, alns[0], aligner=ALIGNER_GIZA_SERVER)
+        self.assertEqual(find_meta_attr(giza_t_g_tier(inst), DATA_PROV, DATA_ALIGNER), ALIGNER_GIZA_SERVER)
+        self.assertNotEqual(giza_t_g_fingerprint(inst, aligner=ALIGNER_GIZA_SERVER),
+                            giza_t_g_fingerprint(inst, aligner=ALIGNER_GIZA))
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from intent.alignment.Alignment import Alignment
+from intent.interfaces.giza import A3files, a3_alignments, read_a3, GizaAlignmentException, GizaFiles, Vocab
+from intent.utils.env import proj_root
+
+__author__ = 'rgeorgi'
+
+A3_PATH = os.path.join(proj_root, 'data/glosses/gloss_trans.A3.final')
+
+class A3ReadTests(TestCase):
+
+    def test_alignments(self):
+        """
+        The streamed alignments should match reading the
+        whole file in and parsing every third line.
+        """
+        with open(A3_PATH, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        expected = [Alignment.from_giza(line) for line in lines[2::3]]
+
+        self.assertEqual(list(a3_alignments(A3_PATH)), expected)
+
+    def test_incomplete(self):
+        with open(A3_PATH, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[:5]
+
+        with self.assertRaises(GizaAlignmentException):
+            list(read_a3(lines))
+
+class A3MergeTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(A3_PATH, 'r', encoding='utf-8') as f:
+            self.pairs = list(read_a3(f))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_parts(self, parts):
+        for i, part in enumerate(parts):
+            with open(os.path.join(self.tmpdir, 'aln.A3.final.part{:03d}'.format(i)), 'w', encoding='utf-8') as f:
+                for num, lines in part:
+                    f.writelines(lines)
+
+    def merged(self):
+        merged_path = os.path.join(self.tmpdir, 'aln.A3.final.merged')
+        A3files(self.tmpdir).merge(merged_path)
+
+        with open(merged_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def expected(self):
+        return ''.join(''.join(lines) for num, lines in self.pairs)
+
+    def test_merge(self):
+        """
+        Pairs split across the parts in chunks, as GIZA does, should
+        be merged back into order, and the parts removed.
+        """
+        chunks = [self.pairs[i:i+7] for i in range(0, len(self.pairs), 7)]
+        self.write_parts([sum(chunks[i::3], []) for i in range(3)])
+
+        self.assertEqual(self.merged(), self.expected())
+        self.assertEqual(os.listdir(self.tmpdir), ['aln.A3.final.merged'])
+
+    def test_merge_unsorted(self):
+        """
+        Parts that are out of order should still be merged correctly.
+        """
+        self.write_parts([self.pairs[1::2], list(reversed(self.pairs[::2]))])
+        self.assertEqual(self.merged(), self.expected())
+
+class SntTests(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        e_path = os.path.join(self.tmpdir, 'e.txt')
+        f_path = os.path.join(self.tmpdir, 'f.txt')
+
+        with open(e_path, 'w', encoding='utf-8') as f:
+            f.write('a b\n\nb c b\n')
+        with open(f_path, 'w', encoding='utf-8') as f:
+            f.write('x\ny\ny x\n')
+
+        self.gf = GizaFiles(os.path.join(self.tmpdir, 'giza'), e_path, f_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_txt_to_snt(self):
+        """
+        The empty line pair should be skipped, and each id listed
+        once per key in the cooc files.
+        """
+        self.gf.txt_to_snt(ev=Vocab(), fv=Vocab())
+
+        self.assertEqual(self.read(self.gf.e_vcb), '2 a 1\n3 b 3\n4 c 1\n')
+        self.assertEqual(self.read(self.gf.f_vcb), '2 x 2\n3 y 1\n')
+
+        self.assertEqual(self.read(self.gf.ef_snt), '1\n2 3\n2\n1\n3 4 3\n3 2\n')
+        self.assertEqual(self.read(self.gf.fe_snt), '1\n2\n2 3\n1\n3 2\n3 4 3\n')
+
+        self.assertEqual(self.read(self.gf.ef_cooc), '0 2\n0 3\n2 2\n3 2\n3 3\n4 2\n4 3\n')
+        self.assertEqual(self.read(self.gf.fe_cooc), '0 2\n0 3\n0 4\n2 2\n2 3\n2 4\n3 3\n3 4\n')
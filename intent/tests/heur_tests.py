@@ -1,10 +1,14 @@
+import multiprocessing
+import os
 from unittest import TestCase
 
 from intent.alignment.Alignment import heur_alignments, Alignment
-from intent.igt.rgxigt import RGWordTier, RGIgt
+from intent.igt.consts import INTENT_ALN_HEUR
+from intent.igt.exceptions import MultipleNormLineException
+from intent.igt.rgxigt import RGWordTier, RGIgt, RGCorpus
 from intent.interfaces.mallet_maxent import MalletMaxent
 from intent.interfaces.stanford_tagger import StanfordPOSTagger
-from intent.utils.env import classifier, tagger_model
+from intent.utils.env import classifier, tagger_model, testfile_dir
 from intent.utils.token import tokenize_string
 
 
@@ -45,3 +49,61 @@ class heur_tests(TestCase):
         print(inst.heur_align(use_pos=True))
 
 
+class parallel_heur_tests(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(testfile_dir, 'xigt/ctn-train-tests.xml')
+
+    def corpus(self):
+        xc = RGCorpus.load(self.path, basic_processing=True)
+
+        # Add an instance that can't be aligned, as it has
+        # multiple normalized translation lines.
+        bad = RGCorpus.load(os.path.join(testfile_dir, 'xigt/3191.xml'), basic_processing=True)[0]
+        bad.id = 'bad'
+        xc.insert(4, bad)
+        return xc
+
+    def alignments(self, xc):
+        return [inst.get_trans_gloss_alignment(INTENT_ALN_HEUR) for inst in xc if inst.id != 'bad']
+
+    def test_parallel(self):
+        """
+        Aligning in worker processes should give the same alignments.
+        """
+        serial = self.corpus()
+        serial.heur_align()
+
+        parallel = self.corpus()
+        parallel.heur_align(jobs=2)
+
+        self.assertEqual(self.alignments(serial), self.alignments(parallel))
+
+    def test_parallel_spawn(self):
+        """
+        The workers shouldn't depend on being forked with a copy of the corpus.
+        """
+        serial = self.corpus()
+        serial.heur_align()
+
+        start_method = multiprocessing.get_start_method()
+        multiprocessing.set_start_method('spawn', force=True)
+        try:
+            parallel = self.corpus()
+            parallel.heur_align(jobs=2)
+        finally:
+            multiprocessing.set_start_method(start_method, force=True)
+
+        self.assertEqual(self.alignments(serial), self.alignments(parallel))
+
+    def test_parallel_error(self):
+        """
+        The instances before the one that can't be aligned
+        should be aligned before the error is raised.
+        """
+        xc = self.corpus()
+        with self.assertRaises(MultipleNormLineException):
+            xc.heur_align(jobs=2, error=True)
+
+        self.assertEqual([inst.get_trans_gloss_alignment(INTENT_ALN_HEUR) is not None for inst in xc[:4]], [True] * 4)
+        self.assertIsNone(xc[5].get_trans_gloss_alignment(INTENT_ALN_HEUR))
@@ -0,0 +1,103 @@
+import os
+from threading import Barrier
+from unittest import TestCase
+
+from intent.alignment.Alignment import Alignment, AlignmentError
+from intent.alignment.HMMAligner import HMMAligner
+from intent.igt.consts import ALIGNER_HMM, DATA_PROV, DATA_FINGERPRINT
+from intent.igt.metadata import find_meta_attr
+from intent.igt.rgxigt import RGCorpus, giza_t_g_alignments, align_both_ways, incremental_giza_t_g_alignments, \
+    giza_t_g_tier
+from intent.utils.env import testfile_dir
+
+__author__ = 'rgeorgi'
+
+class HMMAlignerTests(TestCase):
+
+    def setUp(self):
+        self.e_snts = ['the house is blue'.split(),
+                       'my dog is in the house'.split(),
+                       'the house is big'.split(),
+                       'house'.split(),
+                       'go to the house'.split()]
+
+        self.f_snts = ['das haus blau ist'.split(),
+                       'meine hund ist in dem haus'.split(),
+                       'das haus ist gross'.split(),
+                       'haus'.split(),
+                       'gehen zur haus'.split()]
+
+    def test_toy(self):
+        alns = HMMAligner().train_align(self.e_snts, self.f_snts)
+        self.assertEqual(alns[0], Alignment([(1,1),(2,2),(3,4),(4,3)]))
+        self.assertEqual(alns[2], Alignment([(1,1),(2,2),(3,3),(4,4)]))
+        self.assertEqual(alns[3], Alignment([(1,1)]))
+
+    def test_unknown(self):
+        """
+        Words that weren't seen in training should be left unaligned.
+        """
+        ha = HMMAligner()
+        ha.train(self.e_snts, self.f_snts)
+        self.assertEqual(ha.align([['the', 'house', 'cat']], [['das', 'katze', 'haus']]),
+                         [Alignment([(1,1),(2,3)])])
+
+    def test_empty(self):
+        ha = HMMAligner()
+        ha.train(self.e_snts + [[]], self.f_snts + [['leer']])
+        self.assertEqual(ha.align([[], ['house']], [['leer'], []]), [Alignment(), Alignment()])
+
+    def test_unequal(self):
+        with self.assertRaises(AlignmentError):
+            HMMAligner().train(self.e_snts, self.f_snts[1:])
+
+class HMMCorpusTests(TestCase):
+
+    def test_giza_t_g_alignments(self):
+        """
+        The HMM aligner should give one alignment per instance,
+        including when symmetrizing.
+        """
+        xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), basic_processing=True)
+        for symmetric in [None, 'intersection']:
+            alns = giza_t_g_alignments(xc, aligner=ALIGNER_HMM, use_heur=False, symmetric=symmetric)
+            self.assertEqual(len(alns), len(xc))
+
+    def test_align_both_ways(self):
+        """
+        Both directions should run at the same time, so each can
+        wait for the other to start.
+        """
+        barrier = Barrier(2, timeout=10)
+        def align(e, f):
+            barrier.wait()
+            return e, f
+
+        self.assertEqual(align_both_ways((align, ('g', 't')), (align, ('t', 'g'))), (('g', 't'), ('t', 'g')))
+        self.assertEqual(align_both_ways((len, ('gt',)), None), (2, None))
+
+class IncrementalAlignmentTests(TestCase):
+
+    def setUp(self):
+        self.xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/ctn-train-tests.xml'), basic_processing=True)
+        self.settings = dict(aligner=ALIGNER_HMM, use_heur=False, symmetric=None)
+
+    def changed(self, **kwargs):
+        settings = dict(self.settings, **kwargs)
+        return [i for i, (aln, fingerprint) in enumerate(incremental_giza_t_g_alignments(self.xc, **settings))
+                if aln is not None]
+
+    def test_incremental(self):
+        self.xc.giza_align_t_g(incremental=True, **self.settings)
+        for inst in self.xc:
+            self.assertIsNotNone(find_meta_attr(giza_t_g_tier(inst), DATA_PROV, DATA_FINGERPRINT))
+
+        # Nothing has changed...
+        self.assertEqual(self.changed(), [])
+
+        # ...until an alignment is removed...
+        giza_t_g_tier(self.xc[1]).delete()
+        self.assertEqual(self.changed(), [1])
+
+        # ...or the settings change.
+        self.assertEqual(self.changed(symmetric='intersection'), list(range(len(self.xc))))
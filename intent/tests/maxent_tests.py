@@ -0,0 +1,80 @@
+import math
+import os
+import shutil
+import tempfile
+from unittest import TestCase, skipUnless
+
+from intent.classify.maxent import MaxEntModel, load_classifier, MODEL_EXT
+from intent.igt.rgxigt import RGCorpus
+from intent.interfaces.mallet_maxent import MalletMaxent, EmptyStringException, read_classifier_info, feature_string
+from intent.utils.env import classifier, mallet_bin, posdict, testfile_dir
+
+__author__ = 'rgeorgi'
+
+INFO = """FEATURES FOR CLASS NOUN
+ <default> 0.5
+ dog 2.0
+ gram-suffix-1-s 0.25
+FEATURES FOR CLASS VERB
+ <default> -0.5
+ run 3.0
+ gram-suffix-1-s 1.0
+"""
+
+class MaxEntScorerTests(TestCase):
+
+    def setUp(self):
+        self.m = MaxEntModel.from_weights(read_classifier_info(INFO.splitlines()))
+
+    def test_read_weights(self):
+        self.assertEqual(self.m.classes, ['NOUN', 'VERB'])
+        self.assertEqual(len(self.m.features), 3)
+        self.assertEqual(list(self.m.defaults), [0.5, -0.5])
+
+    def test_score(self):
+        result = self.m.classify('NONE\tdog:1\tgram-suffix-1-s:1\tunseen:1')
+
+        noun = 0.5 + 2.0 + 0.25
+        verb = -0.5 + 1.0
+        total = math.exp(noun) + math.exp(verb)
+
+        self.assertEqual(result.gold, 'NONE')
+        self.assertAlmostEqual(result['NOUN'], math.exp(noun) / total)
+        self.assertAlmostEqual(result['VERB'], math.exp(verb) / total)
+        self.assertEqual(result.largest()[0], 'NOUN')
+
+    def test_classify_many(self):
+        lines = ['NONE\tdog:1', 'NONE\trun:1']
+        self.assertEqual([r.largest()[0] for r in self.m.classify_many(lines)], ['NOUN', 'VERB'])
+        self.assertRaises(EmptyStringException, self.m.classify_many, lines + [' '])
+
+    def test_save_load(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'model' + MODEL_EXT)
+            self.m.save(path)
+            loaded = load_classifier(path)
+            self.assertIsInstance(loaded, MaxEntModel)
+            self.assertEqual(sorted(loaded.classify('NONE\trun:1').items()), sorted(self.m.classify('NONE\trun:1').items()))
+        finally:
+            shutil.rmtree(tmpdir)
+
+@skipUnless(os.path.exists(mallet_bin) and classifier, 'MALLET is not installed.')
+class MaxEntParityTests(TestCase):
+    """
+    The exported weights should classify the same as MALLET itself.
+    """
+
+    def test_parity(self):
+        mallet_c = MalletMaxent(classifier)
+        model = MaxEntModel.from_mallet(classifier)
+
+        xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), basic_processing=True)
+        features = [f for inst in xc for f in inst.gloss_pos_features(posdict=posdict) if f is not None]
+
+        for feature, expected, actual in zip(features, mallet_c.classify_many(features), model.classify_many(features)):
+            self.assertEqual(expected.largest()[0], actual.largest()[0], feature)
+            for tag in expected.keys():
+                self.assertAlmostEqual(expected[tag], actual[tag], places=4)
+
+        mallet_c.close()
@@ -1,11 +1,14 @@
 import logging
 import os
+import sys
+from subprocess import Popen, PIPE
 from unittest import TestCase
 
-from intent.igt.consts import ODIN_LANG_TAG, ODIN_JUDGMENT_ATTRIBUTE, ODIN_TRANS_TAG
+from intent.igt.consts import ODIN_LANG_TAG, ODIN_JUDGMENT_ATTRIBUTE, ODIN_TRANS_TAG, PS_TIER_TYPE
 from xigt.codecs import xigtxml
 
-from intent.igt.rgxigt import RGCorpus, retrieve_normal_line, retrieve_lang_phrase_tier, retrieve_trans_phrase
+from intent.igt.rgxigt import RGCorpus, retrieve_normal_line, retrieve_lang_phrase_tier, retrieve_trans_phrase, \
+    parse_translation_lines
 from intent.interfaces.stanford_parser import StanfordParser
 from intent.subcommands import enrich
 from intent.trees import DepTree, DEPSTR_PTB, project_ds
@@ -204,3 +207,88 @@ class DepTreeTests(TestCase):
         d['IN_FILE'] = os.path.join(testfile_dir, 'xigt/814.xml')
         self.assertIsNone(enrich(**d))
 
+
+
+# Stands in for the parser process: answers each line with a flat phrase
+# structure over its words, and a dependency from the first word to each
+# of the others, in the parser's output format.
+ECHO_PARSER = r"""
+import sys
+for line in sys.stdin:
+    words = line.split()
+    print('(ROOT (S {}))'.format(' '.join('(NN {})'.format(w) for w in words)))
+    print()
+    print('root(ROOT-0, {}-1)'.format(words[0]))
+    for i, w in enumerate(words[1:], start=2):
+        print('dep({}-1, {}-{})'.format(words[0], w, i))
+    print()
+"""
+
+class EchoParser(StanfordParser):
+    """
+    A :py:class:`StanfordParser` talking to :py:data:`ECHO_PARSER` rather
+    than Java, that keeps the size of each batch it is given.
+    """
+    def __init__(self):
+        self.p = Popen([sys.executable, '-u', '-c', ECHO_PARSER], stdin=PIPE, stdout=PIPE)
+        self.batches = []
+
+    def parse_batch(self, sentences):
+        self.batches.append(len(sentences))
+        return super().parse_batch(sentences)
+
+class ParseBatchTests(TestCase):
+
+    def setUp(self):
+        self.parser = EchoParser()
+
+    def tearDown(self):
+        self.parser.close()
+
+    def test_parse_batch(self):
+        """
+        Each sentence should get its own parse back, with empty
+        sentences left unparsed and whitespace (including newlines)
+        within a sentence treated as a single space.
+        """
+        sents = ['John ran', '', 'into  the\nwoods', '   ', 'home']
+        results = self.parser.parse_batch(sents)
+
+        self.assertEqual([[str(l) for l in r.pt.leaves()] if r.pt else None for r in results],
+                         [['John', 'ran'], None, ['into', 'the', 'woods'], None, ['home']])
+        self.assertEqual(results[2].dt.to_indices(), [(0, 1), (1, 2), (1, 3)])
+        self.assertIsNone(results[1].dt)
+
+    def test_many(self):
+        """
+        More sentences than fit in the pipes at once should not
+        leave the parser and the reader waiting on each other.
+        """
+        sents = ['sentence number {} of many'.format(i) for i in range(5000)]
+        results = self.parser.parse_batch(sents)
+        self.assertEqual([str(r.pt.leaves()[2]) for r in results], [str(i) for i in range(5000)])
+
+    def test_parse_translation_lines(self):
+        """
+        The parses should be added to the instances they came from, across
+        batch boundaries, skipping any instance without a translation line.
+        """
+        xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/ctn-train-tests.xml'), basic_processing=True)
+
+        # Take the translation line out of one of the instances.
+        no_trans = xc[4]
+        for tier_id in ['tw', 't']:
+            no_trans.find(id=tier_id).delete()
+        trans_line = retrieve_normal_line(no_trans, ODIN_TRANS_TAG)
+        trans_line.tier.remove(trans_line)
+
+        parse_translation_lines(xc, self.parser, pt=True, dt=True, batch_size=3)
+        self.assertEqual(self.parser.batches, [3, 3, 2])
+
+        for inst in xc:
+            if inst is no_trans:
+                self.assertIsNone(inst.find(type=PS_TIER_TYPE))
+            else:
+                words = [w.value() for w in inst.trans]
+                self.assertEqual([str(l) for l in inst.get_trans_ps().leaves()], words)
+                self.assertEqual(len(inst.get_ds(inst.trans).to_indices()), len(words))
@@ -0,0 +1,142 @@
+import os
+from unittest import TestCase
+
+from intent.igt.consts import ALN_TIER_TYPE, GLOSS_WORD_ID, INTENT_GLOSS_WORD
+from intent.igt.rgxigt import RGCorpus, RGTier, RGItem, add_word_level_info, get_word_level_info, \
+    remove_word_level_info
+from intent.igt.search import _find_in_self, _build_filterlist
+from intent.utils.env import testfile_dir
+from xigt.consts import ALIGNMENT, SEGMENTATION, CONTENT
+from xigt.mixins import XigtContainerMixin
+
+__author__ = 'rgeorgi'
+
+def scan_findall(obj, **kwargs):
+    """
+    The plain recursive search, without the index.
+    """
+    found = []
+    if _find_in_self(obj, _build_filterlist(**kwargs)) is not None:
+        found.append(obj)
+    if isinstance(obj, XigtContainerMixin):
+        for child in obj:
+            found += scan_findall(child, **kwargs)
+    return found
+
+class FindIndexTests(TestCase):
+
+    def setUp(self):
+        self.xc = RGCorpus.load(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), basic_processing=True)
+        self.xc.heur_align()
+        self.inst = self.xc[0]
+
+    def queries(self):
+        for tier in self.inst:
+            for obj in [tier] + tier.items:
+                yield {'id':obj.id}
+                yield {'type':obj.type}
+                for ref_type in (ALIGNMENT, SEGMENTATION, CONTENT):
+                    if obj.attributes.get(ref_type):
+                        yield {ref_type:obj.attributes[ref_type].split(',')[0]}
+                        yield {ref_type:obj.attributes[ref_type].split(',')[0], 'type':obj.type}
+
+    def assertMatchesScan(self):
+        for query in self.queries():
+            expected = scan_findall(self.inst, **query)
+            self.assertEqual(self.inst.findall(**query), expected)
+            self.assertIs(self.inst.find(**query), expected[0] if expected else None)
+
+    def test_indexed_find(self):
+        self.assertMatchesScan()
+
+    def test_corpus_find(self):
+        inst = self.xc[-1]
+        item = inst.tiers[-1][0]
+        self.assertIs(self.xc.find(id=inst.id), inst)
+        self.assertEqual(self.xc.findall(id=item.id), [i.find(id=item.id) for i in self.xc if i.find(id=item.id)])
+
+    def test_tier_changes(self):
+        self.assertIsNone(self.inst.find(id='new'))
+
+        t = RGTier(id='new', type='new-type')
+        self.inst.append(t)
+        self.assertIs(self.inst.find(id='new'), t)
+
+        t.add(RGItem(id='new1', alignment=GLOSS_WORD_ID+'1'))
+        self.assertIs(self.inst.find(id='new1'), t[0])
+        self.assertIn(t[0], self.inst.findall(alignment=GLOSS_WORD_ID+'1'))
+
+        t.delete()
+        self.assertIsNone(self.inst.find(id='new'))
+        self.assertIsNone(self.inst.find(id='new1'))
+        self.assertMatchesScan()
+
+    def test_attribute_changes(self):
+        tier = self.inst.find(type=ALN_TIER_TYPE)
+        self.assertIsNotNone(tier)
+
+        tier.type = 'other-type'
+        self.assertNotIn(tier, self.inst.findall(type=ALN_TIER_TYPE))
+        self.assertIs(self.inst.find(type='other-type'), tier)
+
+        tier.id = 'renamed'
+        self.assertIs(self.inst.find(id='renamed'), tier)
+
+        item = self.inst[0][0]
+        item.alignment = 'renamed'
+        self.assertIs(self.inst.find(alignment='renamed'), item)
+        self.assertMatchesScan()
+
+    def test_sort_tiers(self):
+        last = self.inst.tiers[-1]
+        self.inst.remove(last)
+        self.inst.insert(0, last)
+        self.assertMatchesScan()
+
+        self.inst.sort_tiers()
+        self.assertMatchesScan()
+
+class TierCacheTests(TestCase):
+
+    def setUp(self):
+        self.inst = RGCorpus.load(os.path.join(testfile_dir, 'xigt/kor-ex.xml'), basic_processing=True)[0]
+        self.names = ['lang', 'gloss', 'trans', 'glosses', 'morphemes']
+
+    def tiers(self):
+        return [getattr(self.inst, name) for name in self.names]
+
+    def test_cached(self):
+        tiers = self.tiers()
+        for name, tier in zip(self.names, tiers):
+            self.assertIs(getattr(self.inst, name), tier)
+            self.assertIs(self.inst._tier_cache[name], tier)
+
+    def test_invalidation(self):
+        """
+        Deleting a tier should discard the cache, so
+        that a new tier is found (or created) in its place.
+        """
+        gloss = self.inst.gloss
+        self.inst.append(RGTier(id='new', type='new-type'))
+        self.assertIsNone(self.inst._tier_cache)
+        self.assertIs(self.inst.gloss, gloss)
+
+        gloss.delete()
+        new_gloss = self.inst.gloss
+        self.assertIsNot(new_gloss, gloss)
+        self.assertIs(self.inst.find(id=new_gloss.id), new_gloss)
+
+    def test_word_level_info(self):
+        """
+        The glosses tier is found by its word-level info, so
+        changing that should discard the cache too.
+        """
+        glosses = self.inst.glosses
+
+        # Removing it when there is none shouldn't.
+        self.assertIsNone(get_word_level_info(glosses))
+        remove_word_level_info(glosses)
+        self.assertIs(self.inst._tier_cache['glosses'], glosses)
+
+        add_word_level_info(glosses, INTENT_GLOSS_WORD)
+        self.assertIsNone(self.inst._tier_cache)
@@ -1,6 +1,6 @@
 import os
 from unittest import TestCase
-from intent.igt.rgxigt import RGCorpus, odin_span, x_span_contains_y, x_contains_y
+from intent.igt.rgxigt import RGCorpus, odin_span, x_span_contains_y, x_contains_y, find_gloss_word, RGTier, RGWord
 from intent.utils.env import testfile_dir
 from xigt.model import Item
 
@@ -24,6 +24,26 @@ class span_test(TestCase):
         self.assertEqual(odin_span(self.w1), [(0,6)])
         self.assertEqual(odin_span(self.new_m), [(0,2),(25,26)])
 
+    def test_find_gloss_word(self):
+        gloss = self.inst.gloss
+        self.assertTrue(self.inst.span_table.tier_index(gloss).disjoint)
+
+        for morph in self.inst.glosses:
+            expected = [g for g in gloss if x_contains_y(self.inst, g, morph)][0]
+            self.assertIs(find_gloss_word(self.inst, morph), expected)
+
+    def test_span_table_invalidation(self):
+        table = self.inst.span_table
+        self.assertEqual(odin_span(self.w1), [(0,6)])
+
+        # Any change to the instance should give it a new table.
+        t = RGTier(id='new', type='words', segmentation=self.w1.tier.id)
+        self.inst.append(t)
+        self.assertIsNot(self.inst.span_table, table)
+
+        t.add(RGWord(id='new1', segmentation='w1[2:4]'))
+        self.assertEqual(odin_span(t[0]), [(2,4)])
+
     def test_contains(self):
         self.assertTrue(x_contains_y(self.inst, self.p1, self.m2_1))
         self.assertFalse(x_contains_y(self.inst, self.m2_1, self.p1))
@@ -0,0 +1,148 @@
+import os
+import re
+import shutil
+import tempfile
+from io import StringIO
+from multiprocessing import TimeoutError
+from multiprocessing.pool import Pool
+from unittest import TestCase
+
+from intent.igt.codecs.xigtstream import XigtStreamWriter
+from intent.igt.rgxigt import RGCorpus, RGIgt
+from intent.subcommands import enrich, _enrich_worker_init, _enrich_worker
+from intent.utils.arg_consts import POS_LANG_CLASS
+from intent.utils.env import testfile_dir
+from xigt.codecs import xigtxml
+from xigt.consts import TRANSIENT
+
+__author__ = 'rgeorgi'
+
+class StreamingLoadTests(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(testfile_dir, 'xigt/kor-ex.xml')
+
+    def test_transient_load(self):
+        """
+        Loading in transient mode should produce the same instances
+        as a full load, without the corpus holding on to them.
+        """
+        full = RGCorpus.load(self.path)
+        transient = RGCorpus.load(self.path, mode=TRANSIENT)
+
+        ids = []
+        for inst in transient:
+            self.assertIsInstance(inst, RGIgt)
+            ids.append(inst.id)
+            self.assertEqual(len(transient.igts), 0)
+
+        self.assertEqual(ids, [inst.id for inst in full])
+
+    def test_stream_writer(self):
+        """
+        Writing the instances one at a time should give the same
+        document as dumping the corpus all at once.
+        """
+        full = RGCorpus.load(self.path)
+
+        sio = StringIO()
+        corp = RGCorpus.load(self.path, mode=TRANSIENT)
+        with XigtStreamWriter(sio, corp) as writer:
+            for inst in corp:
+                writer.write(inst)
+
+        self.assertEqual(writer.written, len(full))
+        self.assertEqual(xigtxml.loads(sio.getvalue()), xigtxml.loads(xigtxml.dumps(full)))
+
+    def test_stream_writer_error(self):
+        """
+        If writing fails part way, the corpus shouldn't be closed off
+        as though it were complete.
+        """
+        sio = StringIO()
+        corp = RGCorpus.load(self.path, mode=TRANSIENT)
+        with self.assertRaises(ValueError):
+            with XigtStreamWriter(sio, corp) as writer:
+                for inst in corp:
+                    writer.write(inst)
+                raise ValueError()
+        self.assertNotIn('</xigt-corpus>', sio.getvalue())
+
+class StreamingEnrichTests(TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(testfile_dir, 'xigt/ctn-train-tests.xml')
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def enrich_to_string(self, **kwargs):
+        out_path = os.path.join(self.tmpdir, 'out.xml')
+        with open(out_path, 'w', encoding='utf-8') as f:
+            enrich(IN_FILE=self.path, OUT_FILE=f, alignment_list=['heur'], **kwargs)
+        # The alignment metadata is dated, so leave that out of the comparison.
+        with open(out_path, 'r', encoding='utf-8') as f:
+            return re.sub('date="[^"]*"', '', f.read())
+
+    def test_stream_enrich(self):
+        """
+        Streaming enrichment should give the same output as loading
+        the whole corpus.
+        """
+        self.assertEqual(self.enrich_to_string(stream=True), self.enrich_to_string())
+
+    def test_parallel_enrich(self):
+        """
+        Enriching with a pool of workers should write the same instances,
+        in the same order, as enriching serially.
+        """
+        self.assertEqual(self.enrich_to_string(jobs=3), self.enrich_to_string())
+
+    def test_parallel_tool_failure(self):
+        """
+        A tool that can't be started should end a parallel run,
+        rather than leaving it waiting on the workers.
+        """
+        class_path = os.path.join(self.tmpdir, 'missing.weights')
+        with self.assertRaises(SystemExit) as cm:
+            self.enrich_to_string(jobs=2, pos_list=[POS_LANG_CLASS], class_path=class_path)
+        self.assertEqual(cm.exception.code, 2)
+
+    def test_worker_init_failure(self):
+        """
+        If the tools fail to start in a worker, its jobs should raise
+        the error rather than never finishing.
+        """
+        class_path = os.path.join(self.tmpdir, 'missing.weights')
+        with Pool(2, initializer=_enrich_worker_init,
+                  initargs=([], [POS_LANG_CLASS], [], class_path, '<xigt-corpus>')) as p:
+            result = p.apply_async(_enrich_worker, (('<igt id="i1"/>', None, None),))
+            try:
+                result.get(timeout=60)
+            except TimeoutError:
+                self.fail('The job never finished.')
+            except Exception as e:
+                self.assertIsInstance(e, FileNotFoundError)
+            else:
+                self.fail('The job should have raised the error from the initializer.')
+
+    def test_stream_to_path(self):
+        """
+        Streaming to a path should only replace what is there once the
+        whole corpus has been written.
+        """
+        out_path = os.path.join(self.tmpdir, 'out.xml')
+        with open(out_path, 'w', encoding='utf-8') as f:
+            f.write('previous')
+
+        class_path = os.path.join(self.tmpdir, 'missing.weights')
+        with self.assertRaises(SystemExit):
+            enrich(IN_FILE=self.path, OUT_FILE=out_path, stream=True, pos_list=[POS_LANG_CLASS], class_path=class_path)
+        with open(out_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'previous')
+        self.assertEqual(os.listdir(self.tmpdir), ['out.xml'])
+
+        enrich(IN_FILE=self.path, OUT_FILE=out_path, stream=True)
+        self.assertEqual(len(RGCorpus.load(out_path)), len(RGCorpus.load(self.path)))
+        self.assertEqual(os.listdir(self.tmpdir), ['out.xml'])
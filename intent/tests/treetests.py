@@ -7,7 +7,7 @@ from intent.alignment.Alignment import Alignment
 from intent.igt.rgxigt import RGWordTier
 from intent.scripts.basic.corpus_stats import pos_stats, CONLL_TYPE
 from intent.trees import IdTree, project_ps, TreeMergeError, DepTree, Terminal, TreeError, project_ds, get_dep_edges, \
-    DEPSTR_CONLL, DEPSTR_PTB, DEPSTR_STANFORD, read_conll_file
+    DEPSTR_CONLL, DEPSTR_PTB, DEPSTR_STANFORD, read_conll_file, build_dep_edges
 from intent.utils.env import testfile_dir
 
 __author__ = 'rgeorgi'
@@ -158,6 +158,21 @@ class PromoteTest(unittest.TestCase):
         self.assertNotEqual(self.t, t2)
         self.assertEqual(t2, t3)
 
+class ReorderTests(unittest.TestCase):
+
+    def test_span_change(self):
+        """
+        Reordering the children of a node can change its span, in which case
+        the nodes above it have to be reordered again.
+        """
+        src_t = IdTree.fromstring('(ROOT (VP (VP (X (NN e1) (NN e2))) (S (Y (VP (VB e3) (NN e4) (VB e5)) (DT e6) (DT e7)))))')
+        tgt_w = RGWordTier.from_string('f1 f2 f3 f4 f5 f6 f7 f8 f9')
+        aln = Alignment([(1, 7), (2, 7), (3, 9), (4, 7), (5, 2), (6, 3)])
+
+        proj = project_ps(src_t, tgt_w, aln)
+        self.assertEqual(proj.pformat(margin=1000),
+                         '(ROOT (VP (UNK f1) (VB f2) (DT f3) (UNK f4) (UNK f5) (UNK f6) (NN f7) (UNK f8) (VB f9)))')
+
 class SpanTest(unittest.TestCase):
 
     def setUp(self):
@@ -173,6 +188,29 @@ class SpanTest(unittest.TestCase):
     def test_span(self):
         self.assertEqual(self.t.span(), (1,5))
 
+    def test_cached_span(self):
+        """
+        Cached spans should follow changes to the tree.
+        """
+        sq = self.t[0,1]
+        self.assertEqual(sq.span(), (2,5))
+        self.assertEqual(sq._span, (2,5))
+
+        sq.swap(0, 2)
+        self.assertEqual(sq.span(), (2,5))
+
+        sq[0].promote()
+        self.assertEqual([c.span() for c in sq], [(4,4), (5,5), (3,3), (2,2)])
+
+        sq[0].delete()
+        sq[0].delete()
+        self.assertEqual(sq.span(), (2,3))
+        self.assertEqual(self.t.span(), (1,3))
+
+        sq[0].insert_sibling(IdTree('NN', [Terminal('it', 8)]))
+        self.assertEqual(sq.span(), (2,8))
+        self.assertEqual(self.t.span(), (1,8))
+
 class MergeTests(unittest.TestCase):
     def setUp(self):
         self.t = IdTree.fromstring('''(ROOT
@@ -356,6 +394,118 @@ class DepTreeTests(unittest.TestCase):
         self.assertRaises(TreeError, DepTree.fromstring, dep_string)
 
 
+class BuildDepEdgesTests(unittest.TestCase):
+
+    def test_order(self):
+        """
+        Children should be attached in the order of their edges, even
+        when the edges come before their heads are in the tree.
+        """
+        dt = DepTree.fromstring('det(woods-5, the-4) prep_into(ran-2, woods-5) nsubj(ran-2, John-1) root(ROOT-0, ran-2)')
+        self.assertEqual(str(dt), '(ROOT[0] (ran[2] (woods[5] (the[4])) (John[1])))')
+
+    def test_multiple_heads(self):
+        """
+        A word with more than one head appears under each of them, and
+        its own dependents attach to its first occurrence in the tree.
+        """
+        dt = DepTree.fromstring('root(ROOT-0, x-1) root(ROOT-0, y-2) dep(y-2, z-3) dep(x-1, z-3) dep(z-3, w-4)')
+        self.assertEqual(str(dt), '(ROOT[0] (x[1] (z[3] (w[4]))) (y[2] (z[3])))')
+
+    def test_duplicates(self):
+        edges = get_dep_edges('root(ROOT-0, ran-2) nsubj(ran-2, John-1) nsubj(ran-2, John-1)')
+        self.assertEqual(len(edges), 2)
+        self.assertEqual(build_dep_edges(edges).to_indices(), [(0, 2), (2, 1)])
+
+    def test_unattached(self):
+        self.assertRaises(TreeError, DepTree.fromstring, 'root(ROOT-0, ran-2) det(woods-5, the-4)')
+
+class ReadBracketedTests(unittest.TestCase):
+
+    def test_ids(self):
+        """
+        The IDs given as the tree is read should be
+        the same as assigning them afterward.
+        """
+        t = IdTree.fromstring('(S (NP (DT The) (NN Boy)) (VP (VB Ran) (PP (IN to) (NP (NN school)))))', id_base='ps')
+        t2 = t.copy()
+        t2.assign_ids('ps')
+        self.assertEqual(t, t2)
+        self.assertEqual([l.index for l in t.leaves()], [1, 2, 3, 4, 5])
+
+    def test_empty_top_bracketing(self):
+        t = IdTree.fromstring('( (S (NP (NN John)) (VP (VB ran))))', remove_empty_top_bracketing=True)
+        self.assertEqual(t.label(), 'S')
+        self.assertIsNone(t.parent())
+        self.assertEqual(t.id, '3')
+
+    def test_deep(self):
+        """
+        Deeply nested trees should be read without hitting the recursion limit.
+        """
+        depth = 5000
+        t = IdTree.fromstring('(ROOT {}{})'.format('(S (NN w) ' * depth, ')' * depth))
+        t = t[0]
+        for i in range(depth-1):
+            t = t[1]
+        self.assertEqual(t[0][0].index, depth)
+
+        dt = DepTree.fromstring('(ROOT[0] {}{})'.format(''.join('(w[{}] '.format(i+1) for i in range(depth)), ')' * depth), stype=DEPSTR_PTB)
+        for i in range(depth):
+            dt = dt[0]
+        self.assertEqual(dt.word_index, depth)
+
+    def test_escaped(self):
+        dt = DepTree.fromstring('(ROOT[0] (\\([1]-punct))', stype=DEPSTR_PTB)
+        self.assertEqual(dt[0].label(), '(')
+
+    def test_malformed(self):
+        for s in ['(S (NP John)', '(S (NP John)))', '(S John) (S Mary)']:
+            self.assertRaises(TreeError, IdTree.fromstring, s)
+        self.assertRaises(TreeError, DepTree.fromstring, '(ROOT[0] (ran))', stype=DEPSTR_PTB)
+
+class CopyTests(unittest.TestCase):
+
+    def test_copy(self):
+        """
+        Copies should be equal to the original, with their own nodes,
+        leaves and parent pointers.
+        """
+        t = IdTree.fromstring('(S (NP (DT The) (NN Boy)) (VP (VB Ran) (PP (IN to) (NP (NN school)))))', id_base='ps')
+        self.assertEqual(t.span(), (1,5))
+
+        t2 = t.copy()
+        self.assertEqual(t, t2)
+        self.assertEqual(t2.span(), (1,5))
+        for st, st2 in zip(t.subtrees(), t2.subtrees()):
+            self.assertIsNot(st, st2)
+            self.assertEqual(st.id, st2.id)
+            if st2 is not t2:
+                self.assertIs(st2.root(), t2)
+        for l, l2 in zip(t.leaves(), t2.leaves()):
+            self.assertIsNot(l, l2)
+            self.assertEqual(l.index, l2.index)
+
+        # Changing the copy shouldn't change the original.
+        t2[1,1].delete()
+        self.assertEqual(t2.span(), (1,3))
+        self.assertEqual(t.span(), (1,5))
+
+    def test_dep_copy(self):
+        dt = DepTree.fromstring('(ROOT[0] (ran[2] (John[1]) (woods[5] (the[4]))))', stype=DEPSTR_PTB)
+        dt2 = dt.copy()
+        self.assertEqual(str(dt), str(dt2))
+        self.assertEqual(dt2.to_indices(), dt.to_indices())
+        self.assertIs(dt2[0,1].parent(), dt2[0])
+
+    def test_deep(self):
+        depth = 5000
+        t = IdTree.fromstring('(ROOT {}{})'.format('(S (NN w) ' * depth, ')' * depth)).copy()
+        t = t[0]
+        for i in range(depth-1):
+            t = t[1]
+        self.assertEqual(t[0][0].index, depth)
+
 class DepTreeCycleTest(unittest.TestCase):
 
     def test_cycle(self):
@@ -1,6 +1,7 @@
 import re
 from collections import defaultdict
 from copy import copy
+import heapq
 import itertools
 import logging
 from intent.alignment.Alignment import Alignment
@@ -16,6 +17,9 @@ DEPSTR_STANFORD = 'stanford'
 DEPSTR_CONLL    = 'conll'
 DEPSTR_PTB      = 'ptb-like'
 
+# The word, index and (optional) type of a node in a PTB-like dependency tree, e.g. "ran[2]"
+DEPSTR_PTB_LABEL_RE = re.compile('(.*?)(?:\[([0-9]+)\])(-.*?)?')
+
 #===============================================================================
 # Exceptions
 #===============================================================================
@@ -38,11 +42,58 @@ class IdTree(ParentedTree):
     """
     This is a tree that inherits from NLTK's tree implementation,
     but assigns IDs that can be used in writing out the Xigt format.
+
+    Each node caches its span once it has been asked for, and the
+    caches of a node and its ancestors are cleared whenever its list of
+    children is changed. (Changing the index of a :py:class:`Terminal`
+    that is already in the tree is not noticed.)
     """
+    _span = None
+
     def __init__(self, label, children=None, id=None):
         super().__init__(label, children)
         self.id = id
 
+    def _invalidate_span(self):
+        """
+        Clear the cached spans of this node and its ancestors. A node's span
+        is only cached after those of its descendants, so we can stop at the
+        first node without one.
+        """
+        t = self
+        while t is not None and t._span is not None:
+            t._span = None
+            t = t.parent()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._invalidate_span()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._invalidate_span()
+
+    def append(self, child):
+        super().append(child)
+        self._invalidate_span()
+
+    def extend(self, children):
+        super().extend(children)
+        self._invalidate_span()
+
+    def insert(self, index, child):
+        super().insert(index, child)
+        self._invalidate_span()
+
+    def pop(self, index=-1):
+        child = super().pop(index)
+        self._invalidate_span()
+        return child
+
+    def remove(self, child):
+        super().remove(child)
+        self._invalidate_span()
+
     def __eq__(self, other):
         q = ParentedTree.__eq__(self, other)
         return q and (self.id == other.id)
@@ -187,24 +238,66 @@ class IdTree(ParentedTree):
 
         :rtype: IdTree
         """
-        new_children = [t.copy() for t in self]
-        return IdTree(self.label(), new_children, id=copy(self.id))
+        return copy_tree(self)
+
+    def _copy_node(self):
+        """
+        Return a copy of this node alone, without its children.
+
+        This is called for every node in a copy, so the attributes are
+        set directly rather than going through NLTK's constructor.
+        """
+        node = IdTree.__new__(IdTree)
+        node._label = self._label
+        node._parent = None
+        node.id = copy(self.id)
+        node._span = self._span
+        return node
 
 
     @classmethod
-    def fromstring(cls, tree_string, id_base='', **kwargs):
+    def fromstring(cls, tree_string, id_base='', remove_empty_top_bracketing=False):
         """
+        Read a phrase structure tree, numbering the leaves and assigning
+        the IDs (in the same order as :py:meth:`assign_ids`) as it is read.
+
         :param tree_string:  String of a phrase structure tree in PTB format.
-        :param id_base:
-        :param kwargs:
+        :param id_base: ID string on which to base the IDs in this tree.
+        :param remove_empty_top_bracketing: Whether to strip an unlabeled bracket around the tree, as in ``( (S ...))``
         :rtype : IdTree
         """
-        t = super(IdTree, cls).fromstring(tree_string,
-                                          # When leaves are read in, make them Terminal objects.
-                                        read_leaf=lambda x: Terminal(x), **kwargs)
-        t.assign_ids()
-        for i, leaf in enumerate(t.leaves()):
-            leaf.index = i+1
+        # Nodes are only made as their brackets close, so
+        # keep track of where each one falls in preorder.
+        nodes = {}
+        num_leaves = Count()
+
+        def read_leaf(token):
+            num_leaves.inc()
+            return Terminal(token, num_leaves.val())
+
+        def make_node(label, children, position):
+            node = cls(label, children)
+            nodes[position] = (node, node.is_preterminal())
+            return node
+
+        trees = read_bracketed(tree_string, make_node, read_leaf)
+        if len(trees) != 1 or not isinstance(trees[0], Tree):
+            raise TreeError('Expected a single tree, but found {} in "{}"'.format(len(trees), tree_string))
+
+        t = trees[0]
+        if remove_empty_top_bracketing and t.label() == '' and len(t) == 1 and isinstance(t[0], Tree):
+            del nodes[0]
+            t = t.pop()
+
+        nodes = [nodes[position] for position in sorted(nodes)]
+
+        # Per the conventions, the preterminals are numbered first.
+        i = 1
+        for preterminal in [True, False]:
+            for node, is_preterminal in nodes:
+                if is_preterminal == preterminal:
+                    node.id = '%s%d' % (id_base, i)
+                    i += 1
 
         return t
 
@@ -222,7 +315,8 @@ class IdTree(ParentedTree):
         Check whether or not the given node is a preterminal (its height
         should be == 2)
         """
-        return self.height() == 2
+        # That is, it has children, and none of them have children of their own.
+        return bool(self) and not any(isinstance(c, Tree) and len(c) for c in self)
 
     def indices_labels(self):
         """
@@ -249,20 +343,24 @@ class IdTree(ParentedTree):
         """
         Return the span of indices covered by this node.
         """
+        if self._span is not None:
+            return self._span
 
         # 1) If we only have one child, then simply
         #    return the span of that child.
         if len(self) == 1:
-            return self[0].span(caller=caller)
+            self._span = self[0].span(caller=caller)
 
         # 2) Otherwise, return a span consisting of
         #    the (leftmost, rightmost) indices of the
         #    children.
         else:
-            subspans = sorted(s.span(caller=caller) for s in self)
+            subspans = [s.span(caller=caller) for s in self]
             if not subspans:
                 raise TreeProjectionError('Dangling unary: {} - root = {}'.format(self, self.root()))
-            return (subspans[0][0], subspans[-1][1])
+            self._span = (min(subspans)[0], max(subspans)[1])
+
+        return self._span
 
     def promote(self):
         """
@@ -422,17 +520,18 @@ class IdTree(ParentedTree):
         assert not self.is_preterminal(), "Should not be preterminal"
 
         last_index = None
+        my_start, my_stop = t.span()
         for i, sibling in enumerate(self):
             sib_start, sib_stop = sibling.span()
-            my_start, my_stop = t.span()
             if sib_start > my_start:
                 last_index = i
                 break
 
         last_index = last_index if last_index is not None else len(self)
 
-        PS_LOG.debug('Inserting {} into {} at position {}'.format(t.pformat(margin=5000), self.pformat(margin=5000), last_index))
-        PS_LOG.debug('Tree is now: {}'.format(self.root()))
+        if PS_LOG.isEnabledFor(logging.DEBUG):
+            PS_LOG.debug('Inserting {} into {} at position {}'.format(t.pformat(margin=5000), self.pformat(margin=5000), last_index))
+            PS_LOG.debug('Tree is now: {}'.format(self.root()))
         self.insert(last_index, t)
 
 class Terminal(object):
@@ -745,7 +844,7 @@ def project_ps(src_t, tgt_w, aln):
     PS_LOG.debug('             ' + aln_indices([t.value() for t in tgt_w]))
 
 
-    src_is = [x[0] for x in aln]
+    src_is = set([x[0] for x in aln])
 
     # 1) Copy the English PS... ---
     tgt_t = src_t.copy()
@@ -769,10 +868,15 @@ def project_ps(src_t, tgt_w, aln):
     # to replace the old ones with.
     nodes_to_replace = defaultdict(list)
 
+    # Look up the preterminals by index, as find_index() would.
+    preterminals = {}
+    for pt in tgt_t.preterminals():
+        preterminals.setdefault(pt.span(), pt)
+
     for src_i, tgt_i in aln:
 
         # Get the t for the new tree...
-        tgt_n = tgt_t.find_index(src_i)
+        tgt_n = preterminals.get((src_i, src_i))
 
         # This must be a preterminal...
         assert(tgt_n.is_preterminal())
@@ -813,18 +917,16 @@ def project_ps(src_t, tgt_w, aln):
             p.insert(i, preterm)
 
 
-    PS_LOG.debug('Current Tree: {}'.format(tgt_t.pformat(margin=100)))
+    if PS_LOG.isEnabledFor(logging.DEBUG):
+        PS_LOG.debug('Current Tree: {}'.format(tgt_t.pformat(margin=100)))
 
     # 3) Reorder the tree...
     PS_LOG.debug('#'*10+' Now reordering tree...' + '#'*10)
     reorder_tree(tgt_t)
 
-    # TODO: Re-examine why the children in the tree are "losing" their parents.
-    fix_tree_parents(tgt_t)
-
     # 4) Time to reattach unattached tgt words. ---
     PS_LOG.debug('#'*10+' Now reattaching unaligned words...' + '#'*10)
-    aligned_indices = [t for s, t in aln]
+    aligned_indices = set([t for s, t in aln])
 
     unaligned_tgt_words = [w for w in tgt_w if w.index not in aligned_indices]
 
@@ -872,14 +974,13 @@ def project_ps(src_t, tgt_w, aln):
 
             lowest_ancestor = None
 
-            for left_ancestor in left_ancestors:
-
-                for right_ancestor in right_ancestors:
-                    if left_ancestor == right_ancestor:
-                        lowest_ancestor = left_ancestor
-                        break
+            # (Compare the nodes themselves, rather than
+            # checking whether their subtrees are equal.)
+            right_ancestor_ids = set([id(right_ancestor) for right_ancestor in right_ancestors])
 
-                if lowest_ancestor is not None:
+            for left_ancestor in left_ancestors:
+                if id(left_ancestor) in right_ancestor_ids:
+                    lowest_ancestor = left_ancestor
                     break
 
             lowest_ancestor.insert_by_span(t)
@@ -906,112 +1007,120 @@ def lowest_common_ancestor(t1, t2):
 
 # Contained items function
 def contains(t, s_sup, s_sub):
-    PS_LOG.debug('{} {} is contained in {} {}'.format(s_sub.label(), s_sub.span(), s_sup.label(), s_sup.span()))
-    # PS_LOG.debug('{}'.format(s_sub.root()))
-    # PS_LOG.debug('{}'.format(s_sup.root()))
-    PS_LOG.debug('PROMOTE: {} [{}] into {}'.format(s_sub, s_sub.span(), s_sup))
+    PS_LOG.debug('%s %s is contained in %s %s', s_sub.label(), s_sub.span(), s_sup.label(), s_sup.span())
+    PS_LOG.debug('PROMOTE: %s [%s] into %s', s_sub, s_sub.span(), s_sup)
     s_sup.promote()
     assert s_sup.parent() == None
-    PS_LOG.debug('TREE is now: {}'.format(t.root()))
+    PS_LOG.debug('TREE is now: %s', t.root())
 
-def reorder_tree(t, prev_t_list = []):
+def reorder_children(t):
     """
-    Recursively reorder a tree.
+    Look through the pairs of children of ``t`` for the first that are out
+    of order or overlap, and fix them as described in :py:func:`project_ps`.
 
-    :param t:
-    :type t:
+    :returns: Whether any change was made.
+    :rtype: bool
     """
+    # Try each combination pairwise...
+    for (i, s_i), (j, s_j) in itertools.combinations(enumerate(t), 2):
+        a_i, b_i = s_i.span()
+        a_j, b_j = s_j.span()
+
+        # 3a) The nodes are already in order and do not overlap. Do nothing. ---
+        if b_i < a_j:
+            continue
+
+        # 3b) The nodes are swapped. ---
+        elif a_i > a_j and b_i > b_j:
+            PS_LOG.debug('SWAPPING: %30s [%s,%s] for [%s,%s] %-12s', s_i, a_i, b_i, a_j, b_j, s_j)
+            t.swap(i, j)
+
+        # 3c-i) S_i contains S_j              ---
+        # delete s_i and promote its children.
+        elif a_i < a_j and b_i > b_j:
+            contains(t, s_i, s_j)
+
+        # 3c-ii) S_j is contained by S_i ---
+        #  delete s_j and promote its children.
+        elif a_i > a_j and b_i < b_j:
+            contains(t, s_j, s_i)
+
+        # d) S_j and S_i overlap but are not subsets. ---
+
+        # 3di) They are the same span. ---
+        #    Merge them
+        elif a_i == a_j and b_i == b_j:
+            PS_LOG.debug('Merging: %30s [%s,%s] with [%s,%s] %s', s_i, a_i, b_i, a_j, b_j, s_j)
+            t.merge(i, j)
+            PS_LOG.debug('New tree:\n%s', t.root())
+
+        # 3dii) They are different ---
+        # Promote both of them.
+        else:
+            PS_LOG.debug('Non-exclusive overlap')
+            to_promote = [s for s in [s_i, s_j] if not s.is_preterminal()]
+            if not to_promote:
+                raise TreeProjectionError('Overlapping preterminals {} and {} cannot be reordered.'.format(s_i, s_j))
 
-    was_changed = False
-
-    prev_t = t.root().copy()
-
-    if not t.is_preterminal():
-        if len(t) == 1:
-            PS_LOG.debug('Unary node {}[{}], skipping.'.format(t.label(), t.span(caller=t)))
-
-        elif len(t) >= 2:
+            for s in to_promote:
+                PS_LOG.debug('Promoting %s[%s]', s.label(), s.span())
+                s.promote()
 
-            # Try each combination pairwise...
-            for s_i, s_j in itertools.combinations(t, 2):
-                a_i, b_i = s_i.span()
-                a_j, b_j = s_j.span()
+            PS_LOG.debug('New tree:\n%s', t.root())
 
-                # TODO: FIXME: How is it that the parent pointers get corrupted?
-                s_i._parent = t
-                s_j._parent = t
+        return True
 
-                s_i_idx = s_i.parent_index()
-                s_j_idx = s_j.parent_index()
+    return False
 
-                # 3a) The nodes are already in order and do not overlap. Do nothing. ---
-                if b_i < a_j:
-                    #PS_LOG.debug('Nothing to be done for {}[{}] and {}[{}]'.format(s_i.label(), s_i.span(), s_j.label(), s_j.span()))
-                    pass
+def reorder_tree(t):
+    """
+    Reorder the tree from the top down, so that the spans of the
+    children of every node are in order and do not overlap.
 
-                # 3b) The nodes are swapped. ---
-                elif a_i > a_j and b_i > b_j:
-                    PS_LOG.debug('SWAPPING: {:>30} [{},{}] for [{},{}] {:<12}'.format(str(s_i), a_i, b_i, a_j, b_j, str(s_j)))
-                    t.swap(s_i_idx, s_j_idx)
-                    was_changed = 'SWAPPED'
-                    break
+    The tree is walked in preorder, fixing the children of each node
+    before moving on to them. Fixing a node's children only changes
+    its own subtree, so the nodes before it only need to be looked at
+    again when its span (and so that of its ancestors) has changed. Then
+    the walk starts again from the highest ancestor with a changed child.
 
-                # 3c-i) S_i contains S_j              ---
-                # delete s_i and promote its children.
-                elif a_i < a_j and b_i > b_j:
-                    contains(t, s_i, s_j)
-                    was_changed = 'PROMOTED {} into {}'.format(s_j, s_i)
-                    break
+    :param t:
+    :type t: IdTree
+    """
+    nodes = [t]
 
-                # 3c-ii) S_j is contained by S_i ---
-                #  delete s_j and promote its children.
-                elif a_i > a_j and b_i < b_j:
-                    was_changed = 'T WAS: {} \n\n PROMOTED {} into {}'.format(t.root(), s_i.lprint(), s_j.lprint())
-                    contains(t, s_j, s_i)
-                    was_changed += ' to become\n\n {}'.format(t.root())
-                    break
+    # The node that each node was reached from, and the
+    # length of the stack, as it was when it was reached.
+    reached = {}
 
-                # d) S_j and S_i overlap but are not subsets. ---
+    while nodes:
+        t = nodes.pop()
+        reached[id(t)] = (t, len(nodes))
 
+        if t.is_preterminal():
+            continue
 
-                # 3di) They are the same span. ---
-                #    Merge them
-                elif a_i == a_j and b_i == b_j:
-                    PS_LOG.debug('Merging: {:>30} [{},{}] with [{},{}] {:<}'.format(str(s_i), a_i, b_i, a_j, b_j, str(s_j)))
-                    t.merge(s_i_idx, s_j_idx)
-                    PS_LOG.debug('New tree:\n{}'.format(t.root()))
-                    was_changed = 'MERGED {} and {}'.format(s_i, s_j)
-                    break
+        if len(t) == 1:
+            PS_LOG.debug('Unary node %s[%s], skipping.', t.label(), t.span(caller=t))
 
-                # 3dii) They are different ---
-                # Promote both of them.
-                else:
-                    PS_LOG.debug('Non-exclusive overlap')
-                    for s in [s_i, s_j]:
-                        if not s.is_preterminal():
-                            PS_LOG.debug('Promoting {}[{}]'.format(s_i.label(), s_i.span()))
-                            s.promote()
-
-                    PS_LOG.debug('New tree:\n{}'.format(t.root()))
-                    was_changed = 'Promoted {} and {}'.format(s_i, s_j)
-                    break
+        while len(t) >= 2:
+            path = [t] + t.ancestors()
+            spans = [n.span() for n in path]
 
-        # If we changed somewhere along the way, let's try again from the top first.
-        if was_changed:
-            prev_t_list.append(prev_t)
-            reorder_tree(t.root(), prev_t_list)
-            return t.root()
+            if not reorder_children(t):
+                break
 
-        # Otherwise, this node does not require changes, but let's
-        # recurse down it's children.
-        else:
-            for child in t:
+            # Find the highest ancestor with a child whose span has changed.
+            restart = None
+            for child, parent, span in zip(path, path[1:], spans):
+                if child.span() != span:
+                    restart = parent
 
-                changed_tree = reorder_tree(child, prev_t_list)
+            if restart is not None:
+                t, stack_len = reached[id(restart)]
+                del nodes[stack_len:]
+                reached[id(t)] = (t, len(nodes))
 
-                if changed_tree:
-                    ct = reorder_tree(changed_tree, prev_t_list)
-                    return ct
+        nodes.extend(reversed([child for child in t if isinstance(child, Tree)]))
 
 class DepEdge(object):
     """
@@ -1028,7 +1137,7 @@ class DepEdge(object):
         return self.head == other.head and self.dep == other.dep and self.type == other.type and self.pos == other.pos
 
     def __hash__(self):
-        return '{}_{}_{}_{}'.format(self.head, self.dep, self.type, self.pos)
+        return hash((self.head, self.dep, self.type, self.pos))
 
 
 class DepTree(IdTree):
@@ -1077,12 +1186,25 @@ class DepTree(IdTree):
         # =============================================================================
 
         if stype == DEPSTR_PTB:
-            def parse_label(s, children):
-                label, index, type = re.search('(.*?)(?:\[([0-9]+)\])(-.*?)?', s).groups()
+            def parse_label(label, children, position):
+                # Any words outside the node's own brackets are part of its label.
+                words = [c for c in children if isinstance(c, str)]
+                if words:
+                    label = ' '.join([label] + words).strip()
+                    children = [c for c in children if not isinstance(c, str)]
+                if '\\' in label:
+                    label = re.sub(r'\\([()])', r'\1', label)
+
+                match = DEPSTR_PTB_LABEL_RE.match(label)
+                if match is None:
+                    raise TreeError('No word index found for dependency tree node "{}"'.format(label))
+
+                label, index, type = match.groups()
                 return cls(label, children, type=type, word_index=int(index))
 
-            results = paren_level_contents(tree_string, f=parse_label)
-            assert len(results) == 1
+            results = [r for r in read_bracketed(tree_string, parse_label) if not isinstance(r, str)]
+            if len(results) != 1:
+                raise TreeError('Expected a single tree, but found {} in "{}"'.format(len(results), tree_string))
             return results[0]
 
         # =============================================================================
@@ -1217,10 +1339,15 @@ class DepTree(IdTree):
     def span(self):
         raise TreeError('Span is not supported for dependency tree.')
 
-    def copy(self):
-        children = [c.copy() for c in self]
-        dt = DepTree(copy(self.label()), children, id=copy(self.id), type=copy(self.type), word_index=copy(self.word_index))
-        return dt
+    def _copy_node(self):
+        node = DepTree.__new__(DepTree)
+        node._label = self._label
+        node._parent = None
+        node.id = copy(self.id)
+        node.type = copy(self.type)
+        node._word_index = copy(self.word_index)
+        node.pos = None
+        return node
 
     def delete(self, promote=True):
         """
@@ -1263,6 +1390,9 @@ def get_dep_edges(string, stype=DEPSTR_STANFORD):
     edges = []
 
     if stype == DEPSTR_STANFORD:
+        w_i_re = re.compile('(\S+)-(\d+)')
+        seen = set()
+
         #                    Sometimes the parser seems to place a spurious quote after the digit?
         nodes = re.findall('(\S+)\((.*?\d+)\'*\)', string)
 
@@ -1276,15 +1406,14 @@ def get_dep_edges(string, stype=DEPSTR_STANFORD):
         for name, pair in nodes:
             head, child = re.split(',\s', pair)
 
-            w_i_re = re.compile('(\S+)-(\d+)')
-
             head  = Terminal(*re.search(w_i_re, head).groups())
             child = Terminal(*re.search(w_i_re, child).groups())
 
             edge = DepEdge(head, child, type=name)
-            if edge in edges:
+            if edge in seen:
                 continue
 
+            seen.add(edge)
             edges.append(edge)
 
     # -----------------------------------------------------------------------------
@@ -1327,68 +1456,106 @@ class Count():
     def val(self):
         return self._i
 
-def build_dep_edges(edges):
-    dt = DepTree.root()
-    while edges:
+def _preorder_position(node):
+    """
+    Return the child indices leading from the root to ``node``, which
+    sort in the order that :py:meth:`IdTree.find` would visit the nodes.
+    """
+    position = []
+    while node.parent() is not None:
+        position.append(node.parent_index())
+        node = node.parent()
+    return position[::-1]
 
-        edge_found = False
+def build_dep_edges(edges):
+    """
+    Build a :py:class:`DepTree` from a list of :py:class:`DepEdge` objects.
 
-        for i, edge in enumerate(edges):
-            #
-            node = dt.find_terminal(edge.head)
+    Edges are attached in the order they are given, as soon as their head
+    is in the tree, and a head that occurs more than once in the tree takes
+    its children at its first occurrence. The edges are indexed by head so
+    that each is only visited once, rather than rescanning the list and
+    searching the tree for every attachment.
 
-            if node is not None:
-                node.append(DepTree(edge.dep.label, [], word_index=edge.dep.index, type=edge.type, pos=edge.pos))
-                del edges[i]
-                edge_found = True
-                break
+    :type edges: list[DepEdge]
+    :rtype: DepTree
+    """
+    dt = DepTree.root()
 
-        if not edge_found:
-            edge_children = [(e.dep.label,e.dep.index) for e in edges]
-            raise TreeError("Dependency Tree could not be built, edges remain: {}.".format(edge_children))
+    # Index the edges by their head...
+    head_edges = defaultdict(list)
+    for i, edge in enumerate(edges):
+        head_edges[(edge.head.label, edge.head.index)].append(i)
+
+    # The first occurrence of each (label, index) in the tree, and the
+    # edges (by their position in the list) whose head is in the tree.
+    nodes = {}
+    attachable = []
+
+    def add_node(node):
+        key = (node.label(), node.word_index)
+        if key not in nodes:
+            nodes[key] = node
+            for i in head_edges.pop(key, []):
+                heapq.heappush(attachable, i)
+        elif _preorder_position(node) < _preorder_position(nodes[key]):
+            nodes[key] = node
+
+    add_node(dt)
+
+    while attachable:
+        edge = edges[heapq.heappop(attachable)]
+        head = nodes[(edge.head.label, edge.head.index)]
+        head.append(DepTree(edge.dep.label, [], word_index=edge.dep.index, type=edge.type, pos=edge.pos))
+        add_node(head[-1])
+
+    if head_edges:
+        remaining = sorted(i for indices in head_edges.values() for i in indices)
+        edge_children = [(edges[i].dep.label, edges[i].dep.index) for i in remaining]
+        raise TreeError("Dependency Tree could not be built, edges remain: {}.".format(edge_children))
 
     return dt
 
-def paren_level_contents(string, f=lambda x, y: [x,y], i=None):
-    """
-    Tail-recursive way to parse a matched set of parens
+# A token is an opening bracket (with the label that follows it), a closing
+# bracket, or a leaf. Brackets inside labels and leaves are escaped with a backslash.
+TREE_TOKEN_RE = re.compile(r'\(\s*((?:\\[()]|[^\s()])*)|\)|(?:\\[()]|[^\s()])+')
 
-    :param string:
-    :type string: str
-    :param f:
-    :param init_open_parens:
+def read_bracketed(string, make_node, read_leaf=lambda x: x):
     """
+    Read the trees in a bracketed string, such as ``(S (NP (NNP John)) (VP (VBD ran)))``,
+    in a single pass with a stack of the open brackets, rather than by recursion,
+    so that very long or deeply nested trees can be read.
+
+    :param make_node: Called with ``(label, children, position)`` as each bracket closes,
+                      where ``position`` is the bracket's place in preorder. Its result
+                      is added to the children of the enclosing bracket.
+    :param read_leaf: Called on each leaf token, in the order they appear.
+    :returns: The nodes (and leaves) that are not inside any bracket.
+    :rtype: list
+    """
+    stack = [(None, [], None)]
+    position = 0
 
-    # Make sure that the "i" gets re-initialized properly on
-    # each call. (No mutable default args!)
-    if i is None:
-        i = Count()
-
-    content = ''
-
-    children = []
+    for match in TREE_TOKEN_RE.finditer(string):
+        token = match.group()
 
-    escaped = False
+        if token[0] == '(':
+            stack.append((match.group(1), [], position))
+            position += 1
 
-    while i.val() < len(string):
-        char = string[i.val()]
-        i.inc() # Increment the counter...
-                # this counter will persist through recursive calls
+        elif token == ')':
+            if len(stack) == 1:
+                raise TreeError('Unmatched ")" at position {} in "{}"'.format(match.start(), string))
+            label, children, node_position = stack.pop()
+            stack[-1][1].append(make_node(label, children, node_position))
 
-        if escaped == True:
-            content += char
-            escaped = False
-        elif char == '\\':
-            escaped = True
-        elif char == ')':
-            return f(content.strip(), children)
-        elif char == '(':
-            children.append(paren_level_contents(string, f=f, i=i))
         else:
-            content += char
+            stack[-1][1].append(read_leaf(token))
+
+    if len(stack) > 1:
+        raise TreeError('{} unclosed bracket(s) in "{}"'.format(len(stack)-1, string))
 
-    # We reach this point only after we have built up all the
-    return children
+    return stack[0][1]
 
 def read_conll_file(path):
     """
@@ -1409,6 +1576,38 @@ def read_conll_file(path):
     return trees
 
 
+def copy_tree(t):
+    """
+    Copy a tree without recursion, using each node's ``_copy_node()``
+    for the nodes and ``copy()`` for the leaves.
+
+    The children are added to the new nodes directly: the copies have no
+    other parents, so there's no need for NLTK to check each one as it
+    is added.
+
+    :type t: IdTree
+    """
+    root = t._copy_node()
+    nodes = [(t, root)]
+
+    while nodes:
+        node, node_copy = nodes.pop()
+
+        children = []
+        for child in node:
+            if isinstance(child, Tree):
+                child_copy = child._copy_node()
+                child_copy._parent = node_copy
+                nodes.append((child, child_copy))
+            else:
+                child_copy = child.copy()
+            children.append(child_copy)
+
+        list.extend(node_copy, children)
+
+    return root
+
+
 def fix_tree_parents(t, preceding_parent = None):
     """
     For some reason, the parents are getting broken during tree projection
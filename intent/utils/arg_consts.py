@@ -15,6 +15,9 @@ ALN_VAR = 'alignment_list'
 ALN_SYM_VAR = 'align_symmetric'
 ALN_SYM_TYPES = [None, SYMMETRIC_INTERSECT, SYMMETRIC_UNION, SYMMETRIC_GROW_DIAG_FINAL, SYMMETRIC_GROW_DIAG]
 
+ALN_INCREMENTAL_VAR = 'align_incremental'
+ALN_SERVER_VAR = 'align_server'
+
 # POS Stuff
 POS_TRANS = 'trans'
 POS_LANG_CLASS = 'class'
@@ -32,3 +35,7 @@ PARSE_TYPES = [PARSE_TRANS, PARSE_LANG_PROJ]
 
 PARSE_VAR = 'parse_list'
 
+# Processing stuff
+STREAM_VAR = 'stream'
+JOBS_VAR = 'jobs'
+
@@ -3,6 +3,7 @@ Created on Aug 26, 2013
 
 :author: rgeorgi
 """
+from contextlib import contextmanager
 from glob import glob
 import sys
 import os
@@ -123,6 +124,30 @@ def writefile(path, mode='w', encoding='utf-8'):
 
     return f
 
+@contextmanager
+def replacing_writefile(path, mode='w', encoding='utf-8'):
+    """
+    As :py:func:`writefile`, but as a context manager that writes to a
+    temporary file next to ``path``, and only moves it into place once the
+    block finishes without an error. If the block fails, the temporary file
+    is removed and anything already at ``path`` is left as it was.
+
+    Paths that aren't regular files (such as ``/dev/null``) are written to directly.
+    """
+    if os.path.exists(path) and not os.path.isfile(path):
+        with writefile(path, mode, encoding) as f:
+            yield f
+        return
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with writefile(tmp_path, mode, encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
 def csv_choices(choice_list):
 
     def in_choices(x):
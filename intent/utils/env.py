@@ -44,6 +44,13 @@ odin_data		 = c.getpath('odin_data')
 mst_parser       = c.getpath('mst_parser')
 fast_align_bin   = c.getpath('fast_align_bin')
 fast_align_atool = c.getpath('fast_align_atool')
+corpus_cache      = c.get('corpus_cache', False)
+corpus_cache_dir  = c.getpath('corpus_cache_dir') or os.path.join(proj_root, 'data/cache/corpora')
+corpus_cache_size = c.get('corpus_cache_size', 1024)
+giza_server       = c.get('giza_server')
+giza_server_authkey = c.get('giza_server_authkey')
+stem_cache_size   = c.get('stem_cache_size', 50000)
+stem_cache_file   = c.getpath('stem_cache_file')
 
 #===============================================================================
 # Try to import the XIGT module.
@@ -5,14 +5,144 @@
 from nltk.stem.snowball import EnglishStemmer
 
 #from nltk.stem import WordNetLemmatizer
+import atexit
+import json
+import logging
+import os
 import re
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+
+from intent.utils.env import stem_cache_size, stem_cache_file
+
+STEM_LOG = logging.getLogger('STEM_CACHE')
+
+StemCacheInfo = namedtuple('StemCacheInfo', ['hits', 'misses', 'max_size', 'size'])
+
+class StemCache(object):
+    """
+    A bounded memo of the stems of words, which discards the least
+    recently used stems once it holds ``max_size`` of them.
+
+    The cache can be used from several threads at once. A process forked
+    from this one starts with a copy of the stems (and a fresh lock), and
+    :py:meth:`save` replaces the file in one step, so several processes can
+    share a stem file without leaving it partly written.
+    """
+
+    def __init__(self, stem_func, max_size):
+        self.stem_func = stem_func
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._stems = OrderedDict()
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @property
+    def lock(self):
+        # A lock copied into a forked process may have been held
+        # by another thread at the time, so make a new one.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+        return self._lock
+
+    def stem(self, word):
+        with self.lock:
+            stem = self._stems.get(word)
+            if stem is not None:
+                self.hits += 1
+                self._stems.move_to_end(word)
+                return stem
+            self.misses += 1
+
+        stem = self.stem_func(word)
+        with self.lock:
+            self._add(word, stem)
+        return stem
+
+    def _add(self, word, stem):
+        self._stems[word] = stem
+        self._stems.move_to_end(word)
+        while len(self._stems) > self.max_size:
+            self._stems.popitem(last=False)
+
+    def info(self):
+        """
+        :rtype: StemCacheInfo
+        """
+        with self.lock:
+            return StemCacheInfo(self.hits, self.misses, self.max_size, len(self._stems))
+
+    def clear(self):
+        with self.lock:
+            self._stems.clear()
+            self.hits = self.misses = 0
+
+    def load(self, path):
+        """
+        Add the stems saved in ``path`` (if it exists) to the cache, behind
+        the ones already in it.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stems = [(word, stem) for word, stem in json.load(f)]
+        except FileNotFoundError:
+            return
+        except (ValueError, TypeError) as ve:
+            STEM_LOG.warning('Ignoring unreadable stem cache "{}": {}'.format(path, ve))
+            return
+
+        with self.lock:
+            current = list(self._stems.items())
+            self._stems.clear()
+            for word, stem in stems + current:
+                self._add(word, stem)
+
+    def save(self, path):
+        """
+        Write the stems to ``path``, along with any that another process
+        has saved there in the meantime.
+        """
+        saved = StemCache(self.stem_func, self.max_size)
+        saved.load(path)
+        with self.lock:
+            for word, stem in self._stems.items():
+                saved._add(word, stem)
+
+        # Write to a temporary file first, so that a file that is
+        # only partly written is never picked up by another process.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(list(saved._stems.items()), f)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
 
 s = EnglishStemmer()
+
+# The stems shared by stem_token and lemmatize_token.
+stem_cache = StemCache(s.stem, stem_cache_size)
+
+def _save_stem_cache():
+    try:
+        stem_cache.save(stem_cache_file)
+    except OSError as ose:
+        STEM_LOG.warning('Unable to save the stem cache to "{}": {}'.format(stem_cache_file, ose))
+
+if stem_cache_file:
+    stem_cache.load(stem_cache_file)
+    atexit.register(_save_stem_cache)
+
 def stem_token(st):
-    return s.stem(st)
+    return stem_cache.stem(st)
 
 def lemmatize_token(st, pos=None):
-    return s.stem(st)
+    return stem_cache.stem(st)
 
 #l = WordNetLemmatizer()
 # TODO: Decide on wordnet lemmatizer versus standard stemmer.